@@ -0,0 +1,11 @@
+"""
+Performance benchmarks for the secure lab apps
+
+    python -m benchmarks                          # every scenario, test client
+    python -m benchmarks --driver server ch04     # real HTTP server, ch04 only
+    python -m benchmarks --save-baseline benchmarks/baseline.json
+    python -m benchmarks --baseline benchmarks/baseline.json --threshold 0.2
+    python -m benchmarks.micro                    # helper micro-benchmarks
+
+See `python -m benchmarks --help` for all options.
+"""
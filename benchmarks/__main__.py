@@ -0,0 +1,99 @@
+"""
+Command line entry point: python -m benchmarks [options] [filter ...]
+"""
+import argparse
+import json
+import sys
+from datetime import datetime, timezone
+from itertools import groupby
+from pathlib import Path
+
+from .harness import DRIVERS, chapter_app, compare_to_baseline, run_load
+from .scenarios import SCENARIOS
+
+WARMUP_REQUESTS = 10
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description='Load-test the secure lab apps')
+    parser.add_argument('filters', nargs='*',
+                        help='only scenarios whose name contains one of these (e.g. ch04 /login)')
+    parser.add_argument('--driver', choices=['testclient', 'server', 'both'], default='both',
+                        help='Flask test client, local WSGI server, or both (default)')
+    parser.add_argument('-c', '--concurrency', default='1,4,16',
+                        help='comma separated concurrency levels (default: 1,4,16)')
+    parser.add_argument('-n', '--requests', type=int, default=200,
+                        help='requests per scenario and concurrency level (default: 200)')
+    parser.add_argument('--json', metavar='FILE', help='write results to FILE')
+    parser.add_argument('--save-baseline', metavar='FILE',
+                        help='write results to FILE for later --baseline runs')
+    parser.add_argument('--baseline', metavar='FILE',
+                        help='compare against a saved baseline and fail on regressions')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='allowed slowdown before a run counts as regressed (default: 0.2)')
+    return parser.parse_args(argv)
+
+
+def selected_scenarios(filters):
+    if not filters:
+        return list(SCENARIOS)
+    return [s for s in SCENARIOS if any(f in s.name or f in s.chapter for f in filters)]
+
+
+def print_result(result):
+    print(f"  {result.scenario:<26} {result.driver:<10} c={result.concurrency:<3} "
+          f"{result.rps:>9.1f} req/s  p50 {result.p50_ms:>8.2f}  p95 {result.p95_ms:>8.2f}  "
+          f"p99 {result.p99_ms:>8.2f} ms  errors {result.errors}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    levels = [int(c) for c in args.concurrency.split(',') if c.strip()]
+    drivers = ['testclient', 'server'] if args.driver == 'both' else [args.driver]
+    scenarios = selected_scenarios(args.filters)
+    if not scenarios:
+        print('No scenario matches the given filters')
+        return 1
+
+    results = []
+    for chapter, chapter_scenarios in groupby(scenarios, key=lambda s: s.chapter):
+        print(f"[{chapter}]")
+        for scenario in chapter_scenarios:
+            # 시나리오마다 새 작업 디렉터리/DB에서 시작
+            with chapter_app(chapter) as module:
+                make_request = scenario.setup(module)
+                total = min(args.requests, scenario.max_requests or args.requests)
+                for driver_name in drivers:
+                    with DRIVERS[driver_name](module.app) as driver:
+                        for i in range(min(WARMUP_REQUESTS, total)):
+                            driver.send(make_request(i))
+                        for level in levels:
+                            result = run_load(driver, make_request, total, level, scenario.name)
+                            print_result(result)
+                            results.append(result)
+
+    payload = {
+        'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'requests': args.requests,
+        'results': [dict(vars(r), key=r.key()) for r in results],
+    }
+    for path in filter(None, [args.json, args.save_baseline]):
+        Path(path).write_text(json.dumps(payload, indent=2), encoding='utf-8')
+        print(f"Results written to {path}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8'))
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressions over {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print(f"\nNo regressions over {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
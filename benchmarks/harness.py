@@ -0,0 +1,282 @@
+"""
+Load-test harness for the secure lab apps
+
+Loads a chapter's `secure/app.py`, then fires requests at it from a pool of
+threads either through Flask's test client (no network, measures the app)
+or through a real local WSGI server (adds HTTP parsing and sockets).
+"""
+import contextlib
+import http.client
+import importlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import urlencode
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+@dataclass
+class Request:
+    """One HTTP request a scenario wants to send"""
+    method: str
+    path: str
+    form: dict = None
+    files: dict = None  # field -> (filename, bytes, content type)
+    headers: dict = field(default_factory=dict)
+
+
+@dataclass
+class Result:
+    scenario: str
+    driver: str
+    concurrency: int
+    requests: int
+    errors: int
+    wall_time: float
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+    def key(self) -> str:
+        return f"{self.scenario}|{self.driver}|c{self.concurrency}"
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _forget_chapter_modules():
+    for name in list(sys.modules):
+        if name in ('secure', 'vulnerable') or name.startswith(('secure.', 'vulnerable.')):
+            del sys.modules[name]
+
+
+@contextlib.contextmanager
+def chapter_app(chapter: str, env: dict = None):
+    """Import `<chapter>/secure/app.py` inside a scratch working directory.
+
+    The labs create their SQLite files, uploads and logs relative to the
+    working directory, so the benchmark runs in a temporary one. Every
+    chapter calls its package `secure`, so the previous chapter's modules are
+    dropped first.
+    """
+    chapter_dir = REPO_ROOT / chapter
+    saved_cwd = os.getcwd()
+    saved_env = {k: os.environ.get(k) for k in (env or {})}
+    with tempfile.TemporaryDirectory(prefix=f'bench-{chapter}-') as workdir:
+        os.chdir(workdir)
+        os.environ.update(env or {})
+        sys.path.insert(0, str(chapter_dir))
+        _forget_chapter_modules()
+        try:
+            module = importlib.import_module('secure.app')
+            yield module
+        finally:
+            sys.path.remove(str(chapter_dir))
+            _forget_chapter_modules()
+            for key, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+            os.chdir(saved_cwd)
+
+
+class TestClientDriver:
+    """Sends requests through app.test_client(), one client per thread"""
+
+    name = 'testclient'
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def send(self, req: Request) -> int:
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        data = dict(req.form or {})
+        for name, (filename, content, content_type) in (req.files or {}).items():
+            data[name] = (io.BytesIO(content), filename, content_type)
+        resp = client.open(req.path, method=req.method, data=data or None, headers=req.headers)
+        resp.close()
+        return resp.status_code
+
+
+class _QuietHandler(WSGIRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so we measure requests, not connects
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class ServerDriver:
+    """Serves the app on 127.0.0.1 with a threaded werkzeug server"""
+
+    name = 'server'
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def __enter__(self):
+        self.server = make_server('127.0.0.1', 0, self.app, threaded=True,
+                                  request_handler=_QuietHandler)
+        self.port = self.server.server_port
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self._thread.join()
+        return False
+
+    def _connection(self, fresh=False):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or fresh:
+            if conn is not None:
+                conn.close()
+            conn = self._local.conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+        return conn
+
+    def send(self, req: Request) -> int:
+        body, headers = encode_body(req)
+        for attempt in range(2):
+            conn = self._connection(fresh=attempt > 0)
+            try:
+                conn.request(req.method, req.path, body=body, headers=headers)
+                resp = conn.getresponse()
+                resp.read()
+                if resp.getheader('Connection', '').lower() == 'close':
+                    self._local.conn = None
+                    conn.close()
+                return resp.status
+            except (ConnectionError, http.client.HTTPException):
+                if attempt:
+                    raise
+        return 0
+
+
+def encode_body(req: Request):
+    """Form-encode (or multipart-encode, with files) a request body"""
+    headers = dict(req.headers)
+    if req.files:
+        boundary = uuid.uuid4().hex
+        parts = []
+        for name, value in (req.form or {}).items():
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+                f'{value}\r\n'.encode()
+            )
+        for name, (filename, content, content_type) in req.files.items():
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; '
+                f'filename="{filename}"\r\nContent-Type: {content_type}\r\n\r\n'.encode()
+                + content + b'\r\n'
+            )
+        parts.append(f'--{boundary}--\r\n'.encode())
+        headers['Content-Type'] = f'multipart/form-data; boundary={boundary}'
+        return b''.join(parts), headers
+    if req.form is not None:
+        headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        return urlencode(req.form).encode(), headers
+    return None, headers
+
+
+DRIVERS = {'testclient': TestClientDriver, 'server': ServerDriver}
+
+
+def run_load(driver, make_request, total: int, concurrency: int, scenario: str) -> Result:
+    """Send `total` requests with `concurrency` threads and summarise latency"""
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def worker():
+        nonlocal errors
+        local_latencies = []
+        local_errors = 0
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            req = make_request(i)
+            started = time.perf_counter()
+            try:
+                status = driver.send(req)
+            except Exception:
+                status = 0
+            local_latencies.append(time.perf_counter() - started)
+            if status == 0 or status >= 500:
+                local_errors += 1
+        with lock:
+            latencies.extend(local_latencies)
+            errors += local_errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    wall_time = time.perf_counter() - started
+
+    latencies.sort()
+    return Result(
+        scenario=scenario,
+        driver=driver.name,
+        concurrency=concurrency,
+        requests=total,
+        errors=errors,
+        wall_time=round(wall_time, 4),
+        rps=round(total / wall_time, 2) if wall_time else 0.0,
+        p50_ms=round(percentile(latencies, 50) * 1000, 3),
+        p95_ms=round(percentile(latencies, 95) * 1000, 3),
+        p99_ms=round(percentile(latencies, 99) * 1000, 3),
+    )
+
+
+def compare_to_baseline(results: list, baseline: dict, threshold: float) -> list:
+    """Return human-readable regressions against a saved baseline.
+
+    A result regresses if its throughput dropped, or its p95 latency grew,
+    by more than `threshold` (0.2 == 20 %). Entries missing from the
+    baseline are ignored.
+    """
+    previous = {r['key']: r for r in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        old = previous.get(result.key())
+        if not old:
+            continue
+        if old['rps'] and result.rps < old['rps'] * (1 - threshold):
+            regressions.append(
+                f"{result.key()}: {result.rps:.1f} req/s vs baseline {old['rps']:.1f}"
+            )
+        if old['p95_ms'] and result.p95_ms > old['p95_ms'] * (1 + threshold):
+            regressions.append(
+                f"{result.key()}: p95 {result.p95_ms:.2f} ms vs baseline {old['p95_ms']:.2f} ms"
+            )
+    return regressions
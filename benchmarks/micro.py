@@ -0,0 +1,477 @@
+"""
+Micro-benchmarks for hot helper functions in the secure lab apps
+
+    python -m benchmarks.micro                    # every micro-benchmark
+    python -m benchmarks.micro validate_hosts     # names containing a filter
+    python -m benchmarks.micro --json micro.json
+
+Each case loads a chapter's `secure/app.py` (see harness.chapter_app) and
+returns the implementations to compare. The first one is the baseline, and
+every variant must return the same result as the baseline.
+"""
+import argparse
+import json
+import random
+import sys
+import timeit
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable
+
+from .harness import chapter_app
+
+
+@dataclass
+class MicroBenchmark:
+    name: str
+    chapter: str
+    setup: Callable  # (secure.app module) -> {label: zero-argument callable}
+    env: dict = None  # environment variables set while the app is imported
+
+
+MICRO_BENCHMARKS = []
+
+
+def micro(chapter: str, name: str, env: dict = None):
+    """Register a micro-benchmark case"""
+    def register(setup):
+        MICRO_BENCHMARKS.append(MicroBenchmark(name, chapter, setup, env))
+        return setup
+    return register
+
+
+def best_time(fn, repeat: int, min_time: float) -> float:
+    """Best seconds per call over `repeat` runs of at least `min_time` each"""
+    timer = timeit.Timer(fn)
+    number, elapsed = timer.autorange()
+    if elapsed < min_time:
+        number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+# --- ch02 입력값 검증 ---------------------------------------------------------
+
+def _legacy_registration_model():
+    """UserRegistration as it was before the validation cache (reference)"""
+    import re
+    from typing import Optional
+
+    from pydantic import BaseModel, EmailStr, HttpUrl, field_validator
+
+    class LegacyUserRegistration(BaseModel):
+        username: str
+        email: EmailStr
+        age: int
+        url: Optional[HttpUrl] = None
+        gender: str
+        phone: str
+
+        @field_validator("username")
+        @classmethod
+        def validate_username(cls, v):
+            if not v or len(v) < 3 or len(v) > 20:
+                raise ValueError("Username must be 3-20 characters")
+            if not re.match(r"^[a-zA-Z0-9_]+$", v):
+                raise ValueError("Username can only contain letters, numbers, underscore")
+            return v
+
+        @field_validator("age")
+        @classmethod
+        def validate_age(cls, v):
+            if v < 0 or v > 150:
+                raise ValueError("Age must be between 0 and 150")
+            return v
+
+        @field_validator("gender")
+        @classmethod
+        def validate_gender(cls, v):
+            if not v or len(v) < 3 or len(v) > 10:
+                raise ValueError("Gender must be 3-20 characters")
+            return v
+
+        @field_validator("phone")
+        @classmethod
+        def validate_phone(cls, v):
+            if not re.match(r"^\d{2,3}\-\d{3,4}\-\d{4}$", v):
+                raise ValueError("Phone number can only contain numbers")
+            return v
+
+    return LegacyUserRegistration
+
+
+def _registration_rows(count: int, distinct: int) -> list:
+    """Form-like rows; emails/URLs repeat the way returning users' do"""
+    return [
+        {'username': f'user_{i}', 'email': f'user{i % distinct}@example.com', 'age': 20 + i % 50,
+         'url': f'https://example.com/u/{i % distinct}', 'gender': 'other', 'phone': '010-1234-5678'}
+        for i in range(count)
+    ]
+
+
+@micro('ch02-input-validation', 'ch02 UserRegistration 1k rows')
+def registration_ch02(module):
+    legacy = _legacy_registration_model()
+    rows = _registration_rows(1000, distinct=100)
+    return {
+        'uncached model': lambda: [legacy(**row).model_dump(mode='json') for row in rows],
+        'cached validators': lambda: [module.UserRegistration(**row).model_dump(mode='json')
+                                      for row in rows],
+    }
+
+
+@micro('ch02-input-validation', 'ch02 /register/bulk vs 1k /register')
+def register_bulk_ch02(module):
+    client = module.app.test_client()
+    rows = [{k: str(v) for k, v in row.items()} for row in _registration_rows(1000, distinct=1000)]
+    rows[::10] = [dict(row, email='not-an-email') for row in rows[::10]]
+    body = '\n'.join(json.dumps(row) for row in rows)
+
+    def one_by_one():
+        return [client.post('/register', data=row).get_json() for row in rows]
+
+    def bulk():
+        lines = client.post('/register/bulk', data=body,
+                            content_type='application/x-ndjson').get_data(as_text=True).splitlines()
+        results = [json.loads(line) for line in lines[:-1]]  # 마지막 줄은 요약
+        for result in results:
+            del result['row']
+        return results
+
+    return {'1k x /register': one_by_one, '/register/bulk': bulk}
+
+
+EVIL_PATTERNS = [r'(a+)+$', r'(\w+\s?)*$', r'^(a|a?)+$', r'(.*a){12}']
+
+
+@micro('ch02-input-validation', 'ch02 evil regex re vs linear')
+def evil_regex_ch02(module):
+    import re
+    cases = [(pattern, 'a' * 20 + '!') for pattern in EVIL_PATTERNS]
+    compiled = [(module.compile_pattern(p, 'linear'), text) for p, text in cases]
+    return {
+        're (backtracking)': lambda: [bool(re.search(p, text)) for p, text in cases],
+        'linear NFA': lambda: [regex.search(text) for regex, text in compiled],
+    }
+
+
+# --- ch04 SQL 인젝션 ----------------------------------------------------------
+
+def _seed_users(module, count: int, needles: int = 10):
+    """count random users, `needles` of them containing 'needle' (trigger-indexed)"""
+    rng = random.Random(4)
+    alphabet = 'abcdefghijklmnopqrstuvwxyz'
+    needle_at = set(rng.sample(range(count), needles))
+    rows = [(f"{'needle_' if i in needle_at else ''}{''.join(rng.choices(alphabet, k=8))}_{i}",
+             f'u{i}@example.com', 'x', 'user') for i in range(count)]
+    with module.db.engine.begin() as conn:
+        conn.exec_driver_sql(
+            'INSERT INTO "user" (username, email, password_hash, role) VALUES (?, ?, ?, ?)', rows)
+
+
+def _user_search_case(size: int):
+    def setup(module):
+        module.init_db()
+        # seeding and the variants go through the Flask-SQLAlchemy engine/session
+        module.app.app_context().push()
+        _seed_users(module, size)
+        User = module.User
+
+        def ilike_scan():
+            users = User.query.filter(User.username.ilike('%needle%')).all()
+            return [u.id for u in users]
+
+        return {
+            "ILIKE '%q%' scan": ilike_scan,
+            'FTS5 trigram': lambda: [u.id for u in module.search_users('needle', 50)],
+        }
+    return setup
+
+
+@micro('ch04-sql-injection', 'ch04 search page ORM vs Core 1000 rows', env={'DATABASE_URL': 'sqlite://'})
+def search_page_ch04(module):
+    module.init_db()
+    module.app.app_context().push()
+    _seed_users(module, 100_000)
+    User = module.User
+
+    def orm_objects():
+        users = (User.query.filter(User.username.ilike('%a%'))
+                 .order_by(User.id).limit(1000).all())
+        return [{'id': u.id, 'username': u.username, 'email': u.email} for u in users]
+
+    def core_rows():
+        rows = module.search_users('a', 1000)
+        return [{'id': r.id, 'username': r.username, 'email': r.email} for r in rows]
+
+    return {'ORM User objects': orm_objects, 'Core select (3 columns)': core_rows}
+
+
+for _size in (10_000, 100_000, 1_000_000):
+    # in-memory database: a fresh table per size, nothing left in the chapter's instance/
+    micro('ch04-sql-injection', f'ch04 user search {_size // 1000}k users',
+          env={'DATABASE_URL': 'sqlite://'})(_user_search_case(_size))
+
+
+# --- ch05 XSS -----------------------------------------------------------------
+
+def _guestbook_case(count: int):
+    def setup(module):
+        from flask import render_template, render_template_string
+        messages = [(i, f'user{i}', f'<b>hello</b> & "world" #{i}', '2024-01-01 00:00:00')
+                    for i in range(count)]
+
+        def from_source():
+            with module.app.test_request_context():
+                return render_template_string(module.TEMPLATE, messages=messages, search_query='q')
+
+        def precompiled():
+            with module.app.test_request_context():
+                return render_template(module.GUESTBOOK_TEMPLATE, messages=messages, search_query='q')
+
+        return {'render_template_string': from_source, 'precompiled Template': precompiled}
+    return setup
+
+
+for _count in (20, 200, 2000):
+    micro('ch05-xss', f'ch05 guestbook render {_count} messages')(_guestbook_case(_count))
+
+
+@micro('ch05-xss', 'ch05 GET / 20 messages')
+def guestbook_index_ch05(module):
+    module.init_db()
+    client = module.app.test_client()
+    for i in range(20):
+        client.post('/post', data={'name': f'user{i}', 'message': f'<b>hello</b> & "world" #{i}'})
+
+    def uncached():
+        module.page_cache.clear()
+        return client.get('/').data
+
+    return {
+        'query + render messages': uncached,
+        'cached page': lambda: client.get('/').data,
+    }
+
+
+def _seed_messages(module, count: int, needles: int = 10):
+    """count short random messages, `needles` of them containing 'needle' (trigger-indexed)"""
+    rng = random.Random(5)
+    words = ['hello', 'world', 'guest', 'book', 'nice', 'day', 'lab', 'xss', 'safe', 'page']
+    needle_at = set(rng.sample(range(count), needles))
+    start = datetime(2024, 1, 1)
+    rows = [(f'user{i}', ' '.join(rng.choices(words, k=8)) + (' needle' if i in needle_at else ''),
+             (start + timedelta(seconds=i)).strftime('%Y-%m-%d %H:%M:%S')) for i in range(count)]
+    with module.db_pool.connection() as conn:
+        conn.executemany('INSERT INTO messages (name, message, created_at) VALUES (?, ?, ?)', rows)
+        conn.commit()
+
+
+def _message_search_case(size: int):
+    def setup(module):
+        module.init_db()
+        _seed_messages(module, size)
+
+        def like_scan():
+            rows = module.fetch_messages(
+                'SELECT id, name, message, created_at FROM messages WHERE message LIKE ?',
+                ('%needle%',))
+            return sorted(row[0] for row in rows)
+
+        def fts_page():
+            messages, _, _ = module.search_messages('needle')
+            return sorted(row[0] for row in messages)
+
+        return {"LIKE '%q%' scan": like_scan, 'FTS5 MATCH + bm25 + snippet': fts_page}
+    return setup
+
+
+for _size in (10_000, 100_000, 1_000_000):
+    micro('ch05-xss', f'ch05 message search {_size // 1000}k messages')(_message_search_case(_size))
+
+
+def _latest_page_case(size: int):
+    def setup(module):
+        module.init_db()
+        _seed_messages(module, size)
+        no_index = module.LATEST_MESSAGES_SQL.replace('FROM messages', 'FROM messages NOT INDEXED')
+
+        def ids(rows):
+            return [row[0] for row in rows]
+
+        return {
+            'full sort (no index)': lambda: ids(module.fetch_messages(no_index, (20,))),
+            'idx_messages_created_at': lambda: ids(module.list_messages(20)),
+        }
+    return setup
+
+
+for _size in (10_000, 100_000, 1_000_000):
+    micro('ch05-xss', f'ch05 latest messages page {_size // 1000}k messages')(_latest_page_case(_size))
+
+
+@micro('ch05-xss', 'ch05 messages page at 50k of 100k OFFSET vs keyset')
+def deep_page_ch05(module):
+    module.init_db()
+    _seed_messages(module, 100_000)
+    offset_sql = module.LATEST_MESSAGES_SQL.replace('LIMIT ?', 'LIMIT ? OFFSET ?')
+    before = module.fetch_messages(offset_sql, (1, 49_999))[0][0]  # last id of the previous page
+
+    return {
+        'LIMIT 20 OFFSET 50000': lambda: [r[0] for r in module.fetch_messages(offset_sql, (20, 50_000))],
+        'keyset before=<id>': lambda: [r[0] for r in module.list_messages(20, before)],
+    }
+
+
+@micro('ch05-xss', 'ch05 security headers after_request vs WSGI middleware')
+def security_headers_ch05(module):
+    from flask import Flask
+    from werkzeug.test import EnvironBuilder
+
+    headers = {'Content-Security-Policy': module.CONTENT_SECURITY_POLICY, **module.SECURITY_HEADERS}
+
+    def bare_app():
+        app = Flask('bench')
+        app.add_url_rule('/', 'index', lambda: 'ok')
+        return app
+
+    hooked = bare_app()
+
+    @hooked.after_request
+    def add_security_headers(response):  # the hook as it was before the middleware
+        for name, value in headers.items():
+            response.headers[name] = value
+        return response
+
+    wrapped = bare_app()
+    wrapped.wsgi_app = module.SecurityHeadersMiddleware(
+        wrapped.wsgi_app, module.SECURITY_HEADERS, csp=module.CONTENT_SECURITY_POLICY)
+    environ = EnvironBuilder('/').get_environ()
+
+    def call(app):
+        def run():
+            captured = []
+            body = b''.join(app(dict(environ), lambda status, h, exc_info=None: captured.extend(h)))
+            return body, sorted(captured)
+        return run
+
+    return {'after_request hook': call(hooked), 'SecurityHeadersMiddleware': call(wrapped)}
+
+
+def _guestbook_message(size: int) -> str:
+    """About `size` characters of ordinary guestbook text: allowed tags, &, <3, CRLF, a stray <span>"""
+    rng = random.Random(22)
+    words = ['hello', 'world', '방명록', '좋은', '하루', '&', '<3', '"quoted"', "it's", 'a>b', '😀']
+    parts, length = [], 0
+    while length < size:
+        roll = rng.random()
+        if roll < 0.1:
+            part = f'<b>{rng.choice(words)}</b> '
+        elif roll < 0.15:
+            part = f'<i>{rng.choice(words)}</i> '
+        elif roll < 0.18:
+            part = f'<p>{rng.choice(words)} {rng.choice(words)}</p>\r\n'
+        elif roll < 0.2:
+            part = '<br>'
+        elif roll < 0.21:
+            part = f'<span>{rng.choice(words)}</span> '
+        else:
+            part = rng.choice(words) + ' '
+        parts.append(part)
+        length += len(part)
+    return ''.join(parts)
+
+
+def _sanitize_case(size: int):
+    def setup(module):
+        message = _guestbook_message(size)
+        variants = {'bleach': module.make_sanitizer(module.ALLOWED_TAGS, 'bleach')}
+        for backend in ('stream', 'nh3'):
+            try:
+                variants[backend] = module.make_sanitizer(module.ALLOWED_TAGS, backend)
+            except ValueError:  # nh3 not installed
+                continue
+        return {label: (lambda s=sanitizer: s.clean(message)) for label, sanitizer in variants.items()}
+    return setup
+
+
+for _size in (1_000, 10_000, 100_000):
+    micro('ch05-xss', f'ch05 sanitize {_size // 1000}KB message')(_sanitize_case(_size))
+
+
+# --- ch03 명령어 인젝션 -------------------------------------------------------
+
+def _host_inventory(size: int) -> list:
+    """Mixed inventory: IPs, hostnames, out-of-range octets and injection attempts"""
+    rng = random.Random(3)
+    hosts = []
+    for i in range(size):
+        kind = i % 5
+        if kind == 0:
+            hosts.append('.'.join(str(rng.randint(0, 255)) for _ in range(4)))
+        elif kind == 1:
+            hosts.append(f'host-{rng.randint(0, 99999)}.example.com')
+        elif kind == 2:
+            hosts.append('.'.join(str(rng.randint(0, 400)) for _ in range(4)))
+        elif kind == 3:
+            hosts.append(f'10.0.0.{rng.randint(0, 255)}; cat /etc/passwd')
+        else:
+            hosts.append(f'srv{rng.randint(0, 999)}.internal.lab.net')
+    return hosts
+
+
+@micro('ch03-command-injection', 'ch03 validate_hosts 100k')
+def validate_hosts_ch03(module):
+    hosts = _host_inventory(100_000)
+    return {
+        'validate_host loop': lambda: [i for i, h in enumerate(hosts) if module.validate_host(h)],
+        'validate_hosts': lambda: module.validate_hosts(hosts),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.micro',
+                                     description='Micro-benchmark helper functions of the secure lab apps')
+    parser.add_argument('filters', nargs='*', help='only cases whose name contains one of these')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='timing runs per variant (default: 5)')
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help='minimum seconds per timing run (default: 0.2)')
+    parser.add_argument('--json', metavar='FILE', help='write results to FILE')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    cases = [c for c in MICRO_BENCHMARKS
+             if not args.filters or any(f in c.name for f in args.filters)]
+    if not cases:
+        print('No micro-benchmark matches the given filters')
+        return 1
+
+    results = []
+    for case in cases:
+        print(f"[{case.name}]")
+        with chapter_app(case.chapter, case.env) as module:
+            variants = case.setup(module)
+            baseline_label, baseline = next(iter(variants.items()))
+            expected = baseline()
+            baseline_time = None
+            for label, fn in variants.items():
+                if fn is not baseline and fn() != expected:
+                    raise AssertionError(f"{case.name}: {label!r} disagrees with {baseline_label!r}")
+                seconds = best_time(fn, args.repeat, args.min_time)
+                baseline_time = baseline_time or seconds
+                speedup = baseline_time / seconds
+                print(f"  {label:<32} {seconds * 1e3:>10.3f} ms/call  x{speedup:.2f}")
+                results.append({'case': case.name, 'variant': label,
+                                'ms_per_call': round(seconds * 1e3, 4),
+                                'speedup': round(speedup, 3)})
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({'results': results}, indent=2), encoding='utf-8')
+        print(f"Results written to {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
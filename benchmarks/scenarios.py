@@ -0,0 +1,150 @@
+"""
+Endpoint scenarios for the secure lab apps
+
+Each scenario prepares whatever state its endpoint needs (database rows,
+a logged-in session, a signed token, a ciphertext) and returns a
+`make_request(i)` callable producing the i-th request to send.
+"""
+from dataclasses import dataclass
+from typing import Callable
+
+from .harness import Request
+
+
+@dataclass
+class Scenario:
+    chapter: str
+    method: str
+    path: str
+    setup: Callable  # (secure.app module) -> make_request(i) -> Request
+    max_requests: int = None  # cap for deliberately slow endpoints (bcrypt, ...)
+
+    @property
+    def name(self) -> str:
+        return f"{self.chapter.split('-')[0]} {self.method} {self.path}"
+
+
+def _init_db(module):
+    if hasattr(module, 'init_db'):
+        module.init_db()
+
+
+# --- ch02 입력값 검증 ---------------------------------------------------------
+
+def register_ch02(module):
+    form = {
+        'username': 'bench_user', 'email': 'bench@example.com', 'age': '30',
+        'url': 'https://example.com/bench', 'gender': 'other', 'phone': '010-1234-5678',
+    }
+    return lambda i: Request('POST', '/register', form=form)
+
+
+# --- ch04 SQL 인젝션 ----------------------------------------------------------
+
+def login_ch04(module):
+    _init_db(module)
+    form = {'username': 'admin', 'password': 'admin123'}
+    return lambda i: Request('POST', '/login', form=form)
+
+
+def search_ch04(module):
+    _init_db(module)
+    return lambda i: Request('GET', '/search?q=al')
+
+
+# --- ch05 XSS -----------------------------------------------------------------
+
+def post_ch05(module):
+    _init_db(module)
+    return lambda i: Request('POST', '/post', form={
+        'name': f'user{i}', 'message': f'<b>hello</b> #{i} <script>alert(1)</script>',
+    })
+
+
+def search_ch05(module):
+    _init_db(module)
+    client = module.app.test_client()
+    for i in range(100):
+        client.post('/post', data={'name': f'user{i}', 'message': f'hello world {i}'})
+    return lambda i: Request('GET', '/search?q=world')
+
+
+# --- ch06 CSRF ----------------------------------------------------------------
+
+def _session_cookie(app, path, form):
+    """Log in through the test client and return a Cookie header for it"""
+    client = app.test_client()
+    client.post(path, data=form)
+    cookie = client.get_cookie(app.config.get('SESSION_COOKIE_NAME', 'session'))
+    return {'Cookie': f'{cookie.key}={cookie.value}'} if cookie else {}
+
+
+def transfer_ch06(module):
+    _init_db(module)
+    # 벤치마크는 세션 쿠키를 재사용하므로 CSRF 토큰 검증은 끈다
+    module.app.config['WTF_CSRF_ENABLED'] = False
+    headers = _session_cookie(module.app, '/login', {'username': 'alice'})
+    form = {'to': 'bob', 'amount': '1'}
+    return lambda i: Request('POST', '/transfer', form=form, headers=headers)
+
+
+# --- ch07 파일 업로드 ---------------------------------------------------------
+
+def upload_ch07(module):
+    content = b'benchmark upload\n' * 64
+    return lambda i: Request('POST', '/upload', files={
+        'file': (f'note{i}.txt', content, 'text/plain'),
+    })
+
+
+# --- ch08 역직렬화 -----------------------------------------------------------
+
+def load_session_ch08(module):
+    resp = module.app.test_client().post('/save_session', data={'username': 'alice'})
+    token = resp.get_json()['session_token']
+    return lambda i: Request('POST', '/load_session', form={'session_token': token})
+
+
+# --- ch09 인증 ----------------------------------------------------------------
+
+def login_ch09(module):
+    _init_db(module)
+    form = {'username': 'admin', 'password': 'admin123'}
+    return lambda i: Request('POST', '/login', form=form)
+
+
+# --- ch10 암호화 --------------------------------------------------------------
+
+def encrypt_ch10(module):
+    form = {'data': 'benchmark plaintext ' * 8}
+    return lambda i: Request('POST', '/encrypt', form=form)
+
+
+def decrypt_ch10(module):
+    resp = module.app.test_client().post('/encrypt', data={'data': 'benchmark plaintext ' * 8})
+    form = {'encrypted': resp.get_json()['encrypted']}
+    return lambda i: Request('POST', '/decrypt', form=form)
+
+
+# --- ch11 에러 처리 -----------------------------------------------------------
+
+def transfer_ch11(module):
+    _init_db(module)
+    form = {'from': 'admin', 'to': 'alice', 'amount': '1'}
+    return lambda i: Request('POST', '/transfer', form=form)
+
+
+SCENARIOS = [
+    Scenario('ch02-input-validation', 'POST', '/register', register_ch02),
+    Scenario('ch04-sql-injection', 'POST', '/login', login_ch04, max_requests=100),
+    Scenario('ch04-sql-injection', 'GET', '/search', search_ch04),
+    Scenario('ch05-xss', 'POST', '/post', post_ch05),
+    Scenario('ch05-xss', 'GET', '/search', search_ch05),
+    Scenario('ch06-csrf', 'POST', '/transfer', transfer_ch06),
+    Scenario('ch07-file-upload', 'POST', '/upload', upload_ch07),
+    Scenario('ch08-deserialization', 'POST', '/load_session', load_session_ch08),
+    Scenario('ch09-authentication', 'POST', '/login', login_ch09, max_requests=20),
+    Scenario('ch10-encryption', 'POST', '/encrypt', encrypt_ch10),
+    Scenario('ch10-encryption', 'POST', '/decrypt', decrypt_ch10),
+    Scenario('ch11-error-handling', 'POST', '/transfer', transfer_ch11),
+]
@@ -3,55 +3,57 @@
 화이트리스트 + Pydantic 사용
 """
 
+import json
+import os
 import re
-from typing import Optional
+import shutil
+import tempfile
+import threading
+import time
+import uuid
 
-from flask import Flask, jsonify, request
-from pydantic import BaseModel, EmailStr, HttpUrl, ValidationError, field_validator
+from flask import Flask, Response, jsonify, request, send_file, stream_with_context
+from pydantic import ValidationError
+
+try:
+    from .csv_validate import CSVProgress, validate_csv
+    from .jsonstream import InvalidLine, JSONStreamError, iter_json_items
+    from .linear_regex import RegexError, StepLimitExceeded, compile_pattern
+    from .models import (
+        UserRegistration,
+        format_errors,
+        registration_fields,
+        validate_rows,
+    )
+except ImportError:
+    from csv_validate import CSVProgress, validate_csv
+    from jsonstream import InvalidLine, JSONStreamError, iter_json_items
+    from linear_regex import RegexError, StepLimitExceeded, compile_pattern
+    from models import (
+        UserRegistration,
+        format_errors,
+        registration_fields,
+        validate_rows,
+    )
 
 app = Flask(__name__)
 app.json.ensure_ascii = False
 
+# /register/bulk 제한
+BULK_CHUNK_SIZE = int(os.environ.get("BULK_CHUNK_SIZE", "500"))
+BULK_MAX_ROWS = int(os.environ.get("BULK_MAX_ROWS", "100000"))
 
-class UserRegistration(BaseModel):
-    """Pydantic 모델로 입력 검증"""
-
-    username: str
-    email: EmailStr
-    age: int
-    url: Optional[HttpUrl] = None
-    gender: str
-    phone: str
-
-    @field_validator("username")
-    @classmethod
-    def validate_username(cls, v):
-        if not v or len(v) < 3 or len(v) > 20:
-            raise ValueError("Username must be 3-20 characters")
-        if not re.match(r"^[a-zA-Z0-9_]+$", v):
-            raise ValueError("Username can only contain letters, numbers, underscore")
-        return v
-
-    @field_validator("age")
-    @classmethod
-    def validate_age(cls, v):
-        if v < 0 or v > 150:
-            raise ValueError("Age must be between 0 and 150")
-        return v
-
-    @field_validator("gender")
-    @classmethod
-    def validate_gender(cls, v):
-        if not v or len(v) < 3 or len(v) > 10:
-            raise ValueError("Gender must be 3-20 characters")
-        return v
-
-    @field_validator("phone")
-    @classmethod
-    def validate_phone(cls, v):
-        if not re.match(r"^\d{2,3}\-\d{3,4}\-\d{4}$", v):
-            raise ValueError("Phone number can only contain numbers")
-        return v
+# /validate/csv 작업: 업로드 파일과 rejects 파일을 둘 디렉터리, 검증 프로세스 수
+CSV_JOB_DIR = os.environ.get("CSV_JOB_DIR", os.path.join(tempfile.gettempdir(), "csv-jobs"))
+CSV_WORKERS = int(os.environ.get("CSV_WORKERS", "0"))
+# 끝난 작업(과 rejects 파일)을 보관할 시간(초)과 최대 작업 수 (넘으면 오래된 끝난 작업부터 삭제)
+CSV_JOB_TTL = float(os.environ.get("CSV_JOB_TTL", "3600"))
+CSV_MAX_JOBS = int(os.environ.get("CSV_MAX_JOBS", "100"))
+csv_jobs = {}  # job_id → CSVProgress (등록 순서)
+csv_jobs_lock = threading.Lock()
+
+# /search 사용자 정규식 엔진: auto(re2가 있으면 re2, 없으면 선형 NFA) / linear / re2
+SEARCH_REGEX_ENGINE = os.environ.get("SEARCH_REGEX_ENGINE", "auto")
 
 
 # 안전한 정규식 (ReDoS 방지)
@@ -80,6 +82,7 @@ def index():
         <li>길이 제한</li>
         <li>타입 강제</li>
         <li>ReDoS 안전한 정규식</li>
+        <li>사용자 정규식은 선형 시간 엔진으로만 실행</li>
     </ul>
     """
 
@@ -88,26 +91,171 @@ def index():
 def register():
     try:
         # Pydantic으로 자동 검증
-        user = UserRegistration(
-            username=request.form.get("username", ""),
-            email=request.form.get("email", ""),
-            age=int(request.form.get("age", 0)),
-            url=request.form.get("url") or None,
-            gender=request.form.get("gender", ""),
-            phone=request.form.get("phone", ""),
-        )
-        return jsonify({"status": "success", "data": user.model_dump()})
+        fields = registration_fields(request.form.get)
+        fields["age"] = int(fields["age"])
+        user = UserRegistration(**fields)
+        # mode="json": HttpUrl 등을 JSON으로 보낼 수 있는 문자열로 변환
+        return jsonify({"status": "success", "data": user.model_dump(mode="json")})
 
     except ValidationError as e:
-        errors = [f"{err['loc'][0]}: {err['msg']}" for err in e.errors()]
-        return jsonify({"errors": errors, "status": "error"})
+        return jsonify({"errors": format_errors(e.errors()), "status": "error"})
     except ValueError as e:
         return jsonify({"status": "error", "errors": ["Invalid input format"]})
 
 
+@app.route("/register/bulk", methods=["POST"])
+def register_bulk():
+    """여러 사용자 등록 검증: JSON 배열 또는 NDJSON을 읽는 대로 검증해 NDJSON으로 응답
+
+    각 줄은 {"row": 번호, ...register() 응답...}, 마지막 줄은 전체 요약
+    """
+    return Response(stream_with_context(_bulk_results(request.stream)),
+                    mimetype="application/x-ndjson")
+
+
+def _bulk_results(stream):
+    total = valid = 0
+    chunk, invalid_lines = [], {}
+
+    def flush():
+        nonlocal valid
+        results = validate_rows(chunk)
+        for offset, result in enumerate(results):
+            row = total - len(chunk) + offset
+            if row in invalid_lines:
+                result = {"errors": ["row: Invalid JSON"], "status": "error"}
+            valid += result["status"] == "success"
+            yield json.dumps({"row": row, **result}, ensure_ascii=False) + "\n"
+        chunk.clear()
+        invalid_lines.clear()
+
+    try:
+        for item in iter_json_items(stream):
+            if total >= BULK_MAX_ROWS:
+                yield json.dumps({"status": "error", "errors": [
+                    f"Too many rows (max {BULK_MAX_ROWS})"
+                ]}) + "\n"
+                break
+            if isinstance(item, InvalidLine):
+                invalid_lines[total] = True
+                item = {}
+            elif isinstance(item, dict):
+                item = registration_fields(item.get)
+            chunk.append(item)
+            total += 1
+            if len(chunk) >= BULK_CHUNK_SIZE:
+                yield from flush()
+    except JSONStreamError as e:
+        yield from flush()
+        yield json.dumps({"status": "error", "errors": [str(e)]}) + "\n"
+    else:
+        yield from flush()
+    yield json.dumps({"status": "done", "total": total, "valid": valid,
+                      "invalid": total - valid}) + "\n"
+
+
+@app.route("/validate/csv", methods=["POST"])
+def validate_csv_upload():
+    """CSV 사용자 목록 검증 작업 시작: 업로드를 디스크에 받아 두고 백그라운드에서 검증
+
+    multipart의 file 필드 또는 text/csv 본문을 받는다.
+    진행 상황은 GET /validate/csv/<job_id>, 실패한 행은 .../rejects 로 조회
+    """
+    upload = request.files.get("file")
+    if upload is None and not request.content_length:
+        return jsonify({"status": "error", "errors": ["CSV file is required"]}), 400
+
+    job_id = uuid.uuid4().hex
+    os.makedirs(CSV_JOB_DIR, exist_ok=True)
+    source = os.path.join(CSV_JOB_DIR, f"{job_id}.csv")
+    # 메모리에 올리지 않고 그대로 파일로 복사
+    if upload is not None:
+        upload.save(source)
+    else:
+        with open(source, "wb") as f:
+            shutil.copyfileobj(request.stream, f)
+
+    progress = CSVProgress()
+    with csv_jobs_lock:
+        csv_jobs[job_id] = progress
+    _prune_csv_jobs()
+    threading.Thread(target=_run_csv_job, args=(job_id, source, progress), daemon=True).start()
+    return jsonify({"status": "accepted", "job_id": job_id}), 202
+
+
+def _rejects_path(job_id: str) -> str:
+    return os.path.join(CSV_JOB_DIR, f"{job_id}.rejects.csv")
+
+
+def _prune_csv_jobs():
+    """CSV_JOB_TTL이 지났거나 CSV_MAX_JOBS를 넘는 끝난 작업을 지우고 rejects 파일도 삭제
+
+    실행 중인 작업은 지우지 않는다.
+    """
+    now = time.monotonic()
+    with csv_jobs_lock:
+        excess = len(csv_jobs) - CSV_MAX_JOBS
+        evicted = []
+        for job_id, progress in csv_jobs.items():  # 오래된 작업부터
+            if progress.finished is None:
+                continue
+            if len(evicted) < excess or now - progress.finished >= CSV_JOB_TTL:
+                evicted.append(job_id)
+        for job_id in evicted:
+            del csv_jobs[job_id]
+    for job_id in evicted:
+        try:
+            os.remove(_rejects_path(job_id))
+        except FileNotFoundError:
+            pass
+
+
+def _get_csv_job(job_id: str):
+    _prune_csv_jobs()
+    with csv_jobs_lock:
+        return csv_jobs.get(job_id)
+
+
+def _run_csv_job(job_id: str, source: str, progress: CSVProgress):
+    try:
+        with open(source, newline="", encoding="utf-8") as src, \
+                open(_rejects_path(job_id), "w", newline="", encoding="utf-8") as rejects:
+            validate_csv(src, rejects, workers=CSV_WORKERS, progress=progress)
+    except Exception:
+        progress.finish(error="CSV validation failed")
+    finally:
+        os.remove(source)
+
+
+@app.route("/validate/csv/<job_id>", methods=["GET"])
+def validate_csv_status(job_id):
+    """CSV 검증 진행 상황: 처리 행 수, 초당 행 수, 거부율"""
+    progress = _get_csv_job(job_id)
+    if progress is None:
+        return jsonify({"status": "error", "errors": ["Unknown job"]}), 404
+    return jsonify({"job_id": job_id, **progress.snapshot()})
+
+
+@app.route("/validate/csv/<job_id>/rejects", methods=["GET"])
+def validate_csv_rejects(job_id):
+    """검증에 실패한 행 (row, 원래 값, errors 열) CSV 다운로드"""
+    progress = _get_csv_job(job_id)
+    if progress is None:
+        return jsonify({"status": "error", "errors": ["Unknown job"]}), 404
+    if progress.status == "running":
+        return jsonify({"status": "error", "errors": ["Job is still running"]}), 409
+    try:
+        return send_file(_rejects_path(job_id), mimetype="text/csv",
+                         as_attachment=True, download_name=f"{job_id}.rejects.csv")
+    except FileNotFoundError:  # 조회 직후 다른 요청이 작업을 정리함
+        return jsonify({"status": "error", "errors": ["Unknown job"]}), 404
+
+
 @app.route("/search", methods=["GET"])
 def search():
-    """안전한 검색: 사용자 정규식 거부"""
+    """안전한 검색: q는 단순 문자열, pattern은 선형 시간 엔진으로만 실행"""
+    if "pattern" in request.args:
+        return regex_search(request.args["pattern"], request.args.get("text", ""))
     query = request.args.get("q", "")
 
     # 정규식 사용 금지, 단순 문자열 검색만 허용
@@ -126,5 +274,17 @@ def search():
     )
 
 
+def regex_search(pattern: str, text: str):
+    """사용자 정규식 검색: 되추적 없는 엔진 + 복잡도 예산 + 단계 수 제한"""
+    try:
+        regex = compile_pattern(pattern, SEARCH_REGEX_ENGINE)
+        matched = regex.search(text)
+    except StepLimitExceeded:
+        return jsonify({"error": "Search took too many steps"}), 422
+    except RegexError as e:
+        return jsonify({"error": f"Unsupported pattern: {e}"}), 400
+    return jsonify({"status": "success", "matched": matched, "engine": regex.engine})
+
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -0,0 +1,168 @@
+"""
+대용량 CSV 사용자 목록 검증 (상수 메모리)
+- 한 행씩 읽어 chunk_size 행 단위로 UserRegistration 검증
+- 실패한 행은 rejects CSV에 원래 값 + 에러 메시지로 기록
+- workers > 0이면 묶음을 프로세스 풀에 나눠 검증 (동시에 떠 있는 묶음 수 제한)
+- 진행 상황(처리 행 수, 초당 행 수, 거부율)은 CSVProgress로 실행 중에도 조회
+
+CLI:
+    python secure/csv_validate.py users.csv --rejects rejects.csv --workers 4
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from .models import registration_fields, validate_rows
+except ImportError:
+    from models import registration_fields, validate_rows
+
+CSV_CHUNK_SIZE = int(os.environ.get("CSV_CHUNK_SIZE", "1000"))
+
+
+class CSVProgress:
+    """검증 진행 상황 (다른 스레드에서 snapshot()으로 조회)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.status = "running"
+        self.rows = 0
+        self.rejected = 0
+        self.error = None
+        self.started = time.monotonic()
+        self.finished = None
+
+    def add(self, rows: int, rejected: int):
+        with self._lock:
+            self.rows += rows
+            self.rejected += rejected
+
+    def finish(self, error: str = None):
+        with self._lock:
+            self.status = "failed" if error else "done"
+            self.error = error
+            self.finished = time.monotonic()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            elapsed = (self.finished or time.monotonic()) - self.started
+            return {
+                "status": self.status,
+                "rows": self.rows,
+                "valid": self.rows - self.rejected,
+                "rejected": self.rejected,
+                "elapsed": round(elapsed, 3),
+                "rows_per_sec": round(self.rows / elapsed, 1) if elapsed > 0 else 0.0,
+                "reject_rate": round(self.rejected / self.rows, 4) if self.rows else 0.0,
+                "error": self.error,
+            }
+
+
+def validate_chunk(rows: list) -> list:
+    """묶음 하나 검증 → [(행 위치, 에러 목록), ...] (프로세스 풀에서도 실행)"""
+    results = validate_rows([registration_fields(row.get) for row in rows])
+    return [(i, r["errors"]) for i, r in enumerate(results) if r["status"] == "error"]
+
+
+def _chunks(reader, chunk_size: int):
+    chunk = []
+    for row in reader:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def validate_csv(src, rejects=None, chunk_size: int = None, workers: int = 0,
+                 progress: CSVProgress = None) -> CSVProgress:
+    """텍스트 스트림 src의 CSV를 검증하고 실패한 행을 rejects(텍스트 스트림)에 기록
+
+    메모리에는 처리 중인 묶음만 올라가며, 프로세스 풀을 쓸 때도 최대
+    workers * 2개 묶음까지만 제출한다.
+    """
+    chunk_size = chunk_size or CSV_CHUNK_SIZE
+    progress = progress or CSVProgress()
+    reader = csv.DictReader(src)
+    writer = None
+    first_row = 1  # 데이터 행 번호 (헤더 제외, 1부터)
+
+    def record(chunk, rejected):
+        nonlocal writer, first_row
+        if rejected and rejects is not None:
+            if writer is None:
+                fields = ["row", *(reader.fieldnames or []), "errors"]
+                writer = csv.DictWriter(rejects, fieldnames=fields, extrasaction="ignore")
+                writer.writeheader()
+            for i, errors in rejected:
+                writer.writerow({**chunk[i], "row": first_row + i, "errors": "; ".join(errors)})
+        first_row += len(chunk)
+        progress.add(len(chunk), len(rejected))
+
+    try:
+        if workers and workers > 0:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = deque()
+                for chunk in _chunks(reader, chunk_size):
+                    pending.append((chunk, pool.submit(validate_chunk, chunk)))
+                    if len(pending) >= workers * 2:
+                        chunk, future = pending.popleft()
+                        record(chunk, future.result())
+                while pending:
+                    chunk, future = pending.popleft()
+                    record(chunk, future.result())
+        else:
+            for chunk in _chunks(reader, chunk_size):
+                record(chunk, validate_chunk(chunk))
+    except (csv.Error, UnicodeDecodeError) as e:
+        progress.finish(error=f"Invalid CSV near data row {first_row}: {e}")
+        return progress
+    progress.finish()
+    return progress
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate a users CSV against UserRegistration")
+    parser.add_argument("csv", help="input CSV (header: username,email,age,url,gender,phone)")
+    parser.add_argument("--rejects", help="write rejected rows with their errors to this CSV")
+    parser.add_argument("--chunk-size", type=int, default=CSV_CHUNK_SIZE,
+                        help=f"rows per validation chunk (default: {CSV_CHUNK_SIZE})")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="validate chunks in this many processes (default: 0, in-process)")
+    parser.add_argument("--interval", type=float, default=2.0,
+                        help="seconds between progress lines on stderr (default: 2)")
+    args = parser.parse_args(argv)
+
+    progress = CSVProgress()
+    stop = threading.Event()
+
+    def report():
+        while not stop.wait(args.interval):
+            snap = progress.snapshot()
+            print(f"{snap['rows']} rows, {snap['rows_per_sec']} rows/s, "
+                  f"reject rate {snap['reject_rate']:.2%}", file=sys.stderr)
+
+    reporter = threading.Thread(target=report, daemon=True)
+    reporter.start()
+    rejects = open(args.rejects, "w", newline="", encoding="utf-8") if args.rejects else None
+    try:
+        with open(args.csv, newline="", encoding="utf-8") as src:
+            validate_csv(src, rejects, args.chunk_size, args.workers, progress)
+    finally:
+        stop.set()
+        if rejects:
+            rejects.close()
+    snap = progress.snapshot()
+    print(json.dumps(snap, ensure_ascii=False))
+    return 0 if snap["status"] == "done" else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+요청 본문을 통째로 메모리에 올리지 않고 JSON 배열 / NDJSON 항목을 하나씩 읽기
+"""
+import codecs
+import json
+
+READ_SIZE = 64 * 1024
+MAX_ITEM_SIZE = 64 * 1024  # 항목 하나(행 하나)의 최대 크기
+
+
+class JSONStreamError(ValueError):
+    """본문이 올바른 JSON 배열 / NDJSON이 아님"""
+
+
+class InvalidLine:
+    """NDJSON에서 JSON으로 읽을 수 없던 줄 (다음 줄은 계속 읽음)"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+def _chunks(stream, read_size: int):
+    decoder = codecs.getincrementaldecoder("utf-8")("replace")
+    while True:
+        data = stream.read(read_size)
+        if not data:
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield tail
+            return
+        yield decoder.decode(data)
+
+
+def iter_json_array(stream, read_size: int = READ_SIZE, max_item_size: int = MAX_ITEM_SIZE):
+    """[item, item, ...] 형태의 바이트 스트림에서 항목을 하나씩 생성"""
+    decoder = json.JSONDecoder()
+    chunks = _chunks(stream, read_size)
+    buf, pos, eof = "", 0, False
+    started = False
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+        else:
+            buf = buf[pos:] + chunk
+            pos = 0
+
+    while True:
+        # 공백 건너뛰기
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            fill()
+        if pos >= len(buf):
+            raise JSONStreamError("Unexpected end of JSON array")
+
+        ch = buf[pos]
+        if not started:
+            if ch != "[":
+                raise JSONStreamError("Expected a JSON array")
+            started, pos = True, pos + 1
+            expect_item = True
+            allow_close = True
+            continue
+        if ch == "]" and allow_close:
+            return
+        if not expect_item:
+            if ch != ",":
+                raise JSONStreamError("Expected ',' or ']' in JSON array")
+            pos += 1
+            expect_item, allow_close = True, False
+            continue
+
+        # 항목 하나 해석: 뒤에 구분자가 보일 때까지 읽어야 숫자 등이 잘리지 않음
+        while True:
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+                if end < len(buf) or eof:
+                    break
+            except json.JSONDecodeError:
+                if eof:
+                    raise JSONStreamError("Malformed JSON array item") from None
+            if len(buf) - pos > max_item_size:
+                raise JSONStreamError("JSON array item too large")
+            fill()
+        pos = end
+        expect_item, allow_close = False, True
+        yield item
+
+
+def iter_ndjson(stream, max_item_size: int = MAX_ITEM_SIZE):
+    """한 줄에 JSON 하나인 스트림에서 항목을 생성 (빈 줄은 건너뜀)
+
+    JSON이 아닌 줄은 InvalidLine으로 돌려주고 다음 줄을 계속 읽는다.
+    """
+    while True:
+        line = stream.readline(max_item_size + 1)
+        if not line:
+            return
+        if len(line) > max_item_size and not line.endswith(b"\n"):
+            raise JSONStreamError("NDJSON line too large")
+        text = line.decode("utf-8", "replace").strip()
+        if not text:
+            continue
+        try:
+            yield json.loads(text)
+        except json.JSONDecodeError:
+            yield InvalidLine(text)
+
+
+def iter_json_items(stream):
+    """첫 글자가 '['이면 JSON 배열, 아니면 NDJSON으로 읽기"""
+    head = b""
+    while True:
+        data = stream.read(1)
+        if not data:
+            return iter(())
+        if not data.isspace():
+            head = data
+            break
+    stream = _Prepended(head, stream)
+    return iter_json_array(stream) if head == b"[" else iter_ndjson(stream)
+
+
+class _Prepended:
+    """이미 읽은 첫 바이트를 다시 앞에 붙인 스트림"""
+
+    def __init__(self, head: bytes, stream):
+        self.head = head
+        self.stream = stream
+
+    def read(self, size: int = -1) -> bytes:
+        head, self.head = self.head, b""
+        if size is not None and 0 <= size <= len(head):
+            self.head = head[size:]
+            return head[:size]
+        rest = self.stream.read(-1 if size is None or size < 0 else size - len(head))
+        return head + rest
+
+    def readline(self, size: int = -1) -> bytes:
+        head, self.head = self.head, b""
+        if head.endswith(b"\n"):
+            return head
+        rest = self.stream.readline(-1 if size is None or size < 0 else size - len(head))
+        return head + rest
@@ -0,0 +1,440 @@
+"""
+사용자 정규식을 선형 시간에 실행하는 검색 엔진 (ReDoS 방어)
+- 패턴을 Thompson NFA로 컴파일하고, 입력을 한 글자씩 한 번만 읽으며 상태 집합을 진행
+  (되추적이 없으므로 (a+)+$ 같은 패턴도 입력 길이에 비례하는 시간만 씀)
+- 지나간 상태 집합 → 다음 상태 집합은 DFA처럼 캐시해 반복 검색을 빠르게
+- 복잡도 예산: 패턴 길이, 컴파일된 명령어 수 / 매치 한 번의 단계 수 제한
+- re2 모듈이 설치되어 있으면 (예산 검사 후) re2로 매칭
+
+지원 문법: 리터럴, ., [...], \\d \\w \\s (+대문자), ^ $ \\A \\Z \\b \\B, (...), (?:...), |,
+* + ? {m} {m,} {m,n} (게으른 수량자도 허용). 역참조, 전후방 탐색은 거부.
+"""
+import os
+from functools import lru_cache
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+MAX_PATTERN_LENGTH = int(os.environ.get("SEARCH_MAX_PATTERN", "100"))
+MAX_PROGRAM_SIZE = int(os.environ.get("SEARCH_MAX_PROGRAM", "500"))
+MAX_STEPS = int(os.environ.get("SEARCH_MAX_STEPS", "200000"))
+MAX_DFA_STATES = 1000  # 넘으면 상태 캐시를 비우고 다시 쌓음
+MAX_REPEAT = 1000
+
+
+class RegexError(ValueError):
+    """지원하지 않거나 잘못된 패턴"""
+
+
+class RegexBudgetError(RegexError):
+    """패턴이 복잡도 예산을 넘음"""
+
+
+class StepLimitExceeded(RegexError):
+    """매치 한 번이 단계 수 제한을 넘음"""
+
+
+# 명령어 종류
+CHAR, SPLIT, JMP, ASSERT, MATCH = range(5)
+# 위치 조건 (ASSERT 인자, 위치별 flags 비트)
+BOL, EOL, END, WORDB, NOT_WORDB = 1, 2, 4, 8, 16
+
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+CLASS_ESCAPES = {
+    "d": str.isdecimal,
+    "D": lambda ch: not ch.isdecimal(),
+    "w": _is_word,
+    "W": lambda ch: not _is_word(ch),
+    "s": str.isspace,
+    "S": lambda ch: not ch.isspace(),
+}
+ASSERT_ESCAPES = {"A": BOL, "Z": END, "b": WORDB, "B": NOT_WORDB}
+CHAR_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "f": "\f", "v": "\v", "a": "\a"}
+
+
+# --- 파서: 패턴 → 구문 트리 --------------------------------------------------
+# ("char", test) / ("cat", [..]) / ("alt", [..]) / ("rep", node, min, max) / ("assert", flag)
+
+class _Parser:
+    def __init__(self, pattern: str):
+        self.p = pattern
+        self.i = 0
+
+    def error(self, msg: str):
+        raise RegexError(f"{msg} at position {self.i}")
+
+    def peek(self):
+        return self.p[self.i] if self.i < len(self.p) else None
+
+    def parse(self):
+        node = self.alternation()
+        if self.i < len(self.p):
+            self.error("unbalanced parenthesis")
+        return node
+
+    def alternation(self):
+        branches = [self.concat()]
+        while self.peek() == "|":
+            self.i += 1
+            branches.append(self.concat())
+        return branches[0] if len(branches) == 1 else ("alt", branches)
+
+    def concat(self):
+        items = []
+        while self.peek() not in (None, "|", ")"):
+            items.append(self.repeat())
+        return ("cat", items)
+
+    def repeat(self):
+        start = self.i
+        node = self.atom()
+        bounds = self.quantifier()
+        if bounds is None:
+            return node
+        if node[0] == "assert":
+            self.i = start
+            self.error("nothing to repeat")
+        if self.peek() == "?":  # 게으른 수량자: 참/거짓 검색 결과는 같음
+            self.i += 1
+        elif self.peek() == "+":
+            self.error("possessive quantifiers are not supported")
+        if self.quantifier() is not None:
+            self.error("multiple repeat")
+        return ("rep", node, *bounds)
+
+    def quantifier(self):
+        ch = self.peek()
+        if ch in ("*", "+", "?"):
+            self.i += 1
+            return {"*": (0, None), "+": (1, None), "?": (0, 1)}[ch]
+        if ch != "{":
+            return None
+        end = self.p.find("}", self.i)
+        body = self.p[self.i + 1:end] if end != -1 else ""
+        lo, sep, hi = body.partition(",")
+        if end == -1 or not (lo.isdigit() or (sep and (lo == "" or lo.isdigit()))) \
+                or not (hi == "" or hi.isdigit()) or not body.isascii():
+            return None  # 파이썬 re처럼 수량자가 아닌 {는 리터럴
+        lo = int(lo) if lo else 0
+        hi = None if sep and hi == "" else int(hi) if sep else lo
+        if lo > MAX_REPEAT or (hi is not None and hi > MAX_REPEAT):
+            raise RegexBudgetError(f"Repeat count exceeds {MAX_REPEAT}")
+        if hi is not None and hi < lo:
+            self.error("min repeat greater than max repeat")
+        self.i = end + 1
+        return lo, hi
+
+    def atom(self):
+        ch = self.p[self.i]
+        self.i += 1
+        if ch == "(":
+            if self.p.startswith("?:", self.i):
+                self.i += 2
+            elif self.peek() == "?":
+                self.error("only (?:...) groups are supported")
+            node = self.alternation()
+            if self.peek() != ")":
+                self.error("missing ), unterminated subpattern")
+            self.i += 1
+            return node
+        if ch in "*+?":
+            self.i -= 1
+            self.error("nothing to repeat")
+        if ch == "{" and self.quantifier_at(self.i - 1):
+            self.i -= 1
+            self.error("nothing to repeat")
+        if ch == ".":
+            return ("char", lambda c: c != "\n")
+        if ch == "^":
+            return ("assert", BOL)
+        if ch == "$":
+            return ("assert", EOL)
+        if ch == "[":
+            return ("char", self.char_class())
+        if ch == "\\":
+            return self.escape(in_class=False)
+        return ("char", ch.__eq__)
+
+    def quantifier_at(self, pos: int) -> bool:
+        saved, self.i = self.i, pos
+        try:
+            return self.quantifier() is not None
+        finally:
+            self.i = saved
+
+    def escape(self, in_class: bool):
+        ch = self.peek()
+        if ch is None:
+            self.error("bad escape (end of pattern)")
+        self.i += 1
+        if ch in CLASS_ESCAPES:
+            return ("char", CLASS_ESCAPES[ch])
+        if ch == "b" and in_class:
+            return ("char", "\b".__eq__)
+        if ch in ASSERT_ESCAPES and not in_class:
+            return ("assert", ASSERT_ESCAPES[ch])
+        if ch in CHAR_ESCAPES:
+            return ("char", CHAR_ESCAPES[ch].__eq__)
+        if ch.isdigit():
+            self.error("backreferences are not supported")
+        if ch.isascii() and ch.isalnum():
+            self.error(f"bad escape \\{ch}")
+        return ("char", ch.__eq__)
+
+    def char_class(self):
+        negate = self.peek() == "^"
+        if negate:
+            self.i += 1
+        chars, ranges, tests = set(), [], []
+        first = True
+        while True:
+            ch = self.peek()
+            if ch is None:
+                self.error("unterminated character set")
+            if ch == "]" and not first:
+                self.i += 1
+                break
+            first = False
+            lo = self.class_char(tests)
+            is_range = self.peek() == "-" and self.p[self.i + 1:self.i + 2] not in ("]", "")
+            if lo is None:
+                if is_range:
+                    self.error("bad character range")  # [\d-z]: re처럼 클래스는 범위 끝이 될 수 없음
+                continue
+            if is_range:
+                self.i += 1
+                hi = self.class_char(tests)
+                if hi is None or hi < lo:
+                    self.error("bad character range")
+                ranges.append((lo, hi))
+            else:
+                chars.add(lo)
+
+        def test(c):
+            return (c in chars or any(lo <= c <= hi for lo, hi in ranges)
+                    or any(t(c) for t in tests)) != negate
+        return test
+
+    def class_char(self, tests):
+        """[...] 안의 글자 하나 (\\d 같은 클래스면 tests에 추가하고 None)"""
+        ch = self.p[self.i]
+        self.i += 1
+        if ch != "\\":
+            return ch
+        _, value = self.escape(in_class=True)
+        if value in CLASS_ESCAPES.values():
+            tests.append(value)
+            return None
+        return value.__self__  # str.__eq__에 묶인 글자
+
+
+# --- 컴파일: 구문 트리 → 명령어 목록 -------------------------------------------
+
+class _Program:
+    def __init__(self, max_size: int):
+        self.ops, self.x, self.y, self.tests = [], [], [], []
+        self.max_size = max_size
+        self.assertions = 0  # 쓰인 ASSERT 비트
+
+    def emit(self, op, x=None, y=None, test=None) -> int:
+        if len(self.ops) >= self.max_size:
+            raise RegexBudgetError(f"Pattern too complex (over {self.max_size} instructions)")
+        self.ops.append(op)
+        self.x.append(x)
+        self.y.append(y)
+        self.tests.append(test)
+        return len(self.ops) - 1
+
+    def compile(self, node):
+        kind = node[0]
+        if kind == "char":
+            self.emit(CHAR, test=node[1])
+        elif kind == "assert":
+            self.assertions |= node[1]
+            self.emit(ASSERT, x=node[1])
+        elif kind == "cat":
+            for item in node[1]:
+                self.compile(item)
+        elif kind == "alt":
+            jumps = []
+            for branch in node[1][:-1]:
+                split = self.emit(SPLIT)
+                self.x[split] = len(self.ops)
+                self.compile(branch)
+                jumps.append(self.emit(JMP))
+                self.y[split] = len(self.ops)
+            self.compile(node[1][-1])
+            for j in jumps:
+                self.x[j] = len(self.ops)
+        else:
+            _, body, lo, hi = node
+            for _ in range(lo):
+                self.compile(body)
+            if hi is None:
+                loop = self.emit(SPLIT, x=len(self.ops) + 1)
+                self.compile(body)
+                self.emit(JMP, x=loop)
+                self.y[loop] = len(self.ops)
+            else:
+                splits = []
+                for _ in range(hi - lo):
+                    splits.append(self.emit(SPLIT, x=len(self.ops) + 1))
+                    self.compile(body)
+                for s in splits:
+                    self.y[s] = len(self.ops)
+
+
+# --- 실행: 상태 집합 진행 (지나간 전이는 캐시) --------------------------------
+
+class _StateCache:
+    """상태 집합(frozenset) ↔ 번호, 번호별 전이표와 매치 여부
+
+    여러 스레드가 같은 캐시에 동시에 상태를 추가하면 같은 집합이 두 번호를 받을 수
+    있지만, 두 번호 모두 같은 상태라 결과는 달라지지 않는다.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.sets = []
+        self.trans = []
+        self.accepting = []
+        self.starts = {}  # flags → 시작 상태
+
+
+class LinearRegex:
+    """선형 시간 search()만 제공하는 컴파일된 패턴 (검색 결과는 참/거짓)"""
+
+    engine = "linear"
+
+    def __init__(self, pattern: str, max_program: int = None):
+        program = _Program(max_program or MAX_PROGRAM_SIZE)
+        program.compile(_Parser(pattern).parse())
+        program.emit(MATCH)
+        self.pattern = pattern
+        self.program = program
+        self._cache = _StateCache()
+
+    def _closure(self, pcs, flags: int):
+        """ε 전이를 따라가 글자를 읽는 명령어 / MATCH만 남긴 집합과 방문 수"""
+        ops, x, y = self.program.ops, self.program.x, self.program.y
+        seen, stack, result = set(), list(pcs), []
+        while stack:
+            pc = stack.pop()
+            if pc in seen:
+                continue
+            seen.add(pc)
+            op = ops[pc]
+            if op == SPLIT:
+                stack.append(y[pc])
+                stack.append(x[pc])
+            elif op == JMP:
+                stack.append(x[pc])
+            elif op == ASSERT:
+                cond = x[pc]
+                ok = not flags & WORDB if cond == NOT_WORDB else flags & cond
+                if ok:
+                    stack.append(pc + 1)
+            else:
+                result.append(pc)
+        return frozenset(result), len(seen)
+
+    def _state(self, cache: _StateCache, pcs: frozenset) -> int:
+        sid = cache.ids.get(pcs)
+        if sid is None:
+            sid = len(cache.sets)
+            cache.sets.append(pcs)
+            cache.trans.append({})
+            cache.accepting.append(any(self.program.ops[pc] == MATCH for pc in pcs))
+            cache.ids[pcs] = sid
+        return sid
+
+    def _step(self, cache: _StateCache, sid: int, ch: str, flags: int):
+        """상태 sid에서 ch를 읽은 다음 상태 (검색이므로 시작 명령어도 항상 추가)"""
+        tests, ops = self.program.tests, self.program.ops
+        moved = [pc + 1 for pc in cache.sets[sid] if ops[pc] == CHAR and tests[pc](ch)]
+        moved.append(0)
+        pcs, cost = self._closure(moved, flags)
+        return self._state(cache, pcs), cost + len(cache.sets[sid])
+
+    def _flags(self, text: str, i: int) -> int:
+        n = len(text)
+        flags = BOL if i == 0 else 0
+        if i == n:
+            flags |= EOL | END
+        elif i == n - 1 and text[i] == "\n":
+            flags |= EOL
+        if self.program.assertions & (WORDB | NOT_WORDB):
+            before = i > 0 and _is_word(text[i - 1])
+            after = i < n and _is_word(text[i])
+            if before != after:
+                flags |= WORDB
+        return flags
+
+    def search(self, text: str, max_steps: int = None) -> bool:
+        """text 안 어딘가에서 매치되면 True (매치 한 번에 최대 max_steps 단계)"""
+        limit = max_steps or MAX_STEPS
+        cache = self._cache
+        if len(cache.sets) > MAX_DFA_STATES:
+            cache = self._cache = _StateCache()
+        positional = bool(self.program.assertions)
+
+        flags = self._flags(text, 0) if positional else 0
+        sid = cache.starts.get(flags)
+        steps = 0
+        if sid is None:
+            pcs, steps = self._closure([0], flags)
+            sid = cache.starts[flags] = self._state(cache, pcs)
+        if cache.accepting[sid]:
+            return True
+
+        trans, accepting = cache.trans, cache.accepting
+        for i, ch in enumerate(text, 1):
+            if positional:
+                flags = self._flags(text, i)
+                key = (ch, flags)
+            else:
+                key = ch
+            nxt = trans[sid].get(key)
+            if nxt is None:
+                nxt, cost = self._step(cache, sid, ch, flags)
+                trans[sid][key] = nxt
+                steps += cost
+            steps += 1
+            if steps > limit:
+                raise StepLimitExceeded(f"Match exceeded {limit} steps")
+            if accepting[nxt]:
+                return True
+            sid = nxt
+        return False
+
+
+class RE2Regex:
+    """예산 검사를 통과한 패턴을 re2로 매칭 (re2도 선형 시간 보장)"""
+
+    engine = "re2"
+
+    def __init__(self, pattern: str, max_program: int = None):
+        LinearRegex(pattern, max_program)  # 문법 / 복잡도 예산 검사
+        self.pattern = pattern
+        self._regex = re2.compile(pattern)
+
+    def search(self, text: str, max_steps: int = None) -> bool:
+        return self._regex.search(text) is not None
+
+
+@lru_cache(maxsize=256)
+def compile_pattern(pattern: str, engine: str = "auto", max_program: int = None):
+    """사용자 패턴 컴파일: engine은 auto(re2가 있으면 re2) / linear / re2"""
+    if len(pattern) > MAX_PATTERN_LENGTH:
+        raise RegexBudgetError(f"Pattern too long (max {MAX_PATTERN_LENGTH})")
+    if engine == "re2" or (engine == "auto" and re2 is not None):
+        if re2 is None:
+            raise RegexError("re2 is not installed")
+        return RE2Regex(pattern, max_program)
+    return LinearRegex(pattern, max_program)
@@ -0,0 +1,180 @@
+"""
+사용자 등록 입력 모델과 검증 헬퍼
+/register, /register/bulk, CSV 일괄 검증이 함께 사용
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Annotated, Optional
+
+from pydantic import (
+    BaseModel,
+    EmailStr,
+    HttpUrl,
+    PlainValidator,
+    TypeAdapter,
+    ValidationError,
+    field_validator,
+)
+from pydantic_core import PydanticCustomError
+
+# 정규식은 모듈 로드 시 한 번만 컴파일
+USERNAME_PATTERN = re.compile(r"^[a-zA-Z0-9_]+$")
+PHONE_PATTERN = re.compile(r"^\d{2,3}\-\d{3,4}\-\d{4}$")
+
+VALIDATION_CACHE_SIZE = int(os.environ.get("VALIDATION_CACHE_SIZE", "4096"))
+
+
+class ValidationCache:
+    """최근 검증 결과(정규화된 값 또는 오류 내용)를 기억하는 LRU
+
+    이메일(email-validator)과 URL 검증은 느리므로 같은 문자열이 다시 들어오면
+    미리 만들어 둔 TypeAdapter를 다시 돌리지 않고 이전 결과를 그대로 돌려준다.
+    실패는 예외 객체가 아니라 오류 내용(type/loc/msg/input)만 저장하고 호출마다
+    새 ValidationError를 만든다 (같은 예외를 다시 던지면 traceback이 계속 길어지고
+    프레임이 살아남으며, 여러 스레드가 한 객체를 공유하게 됨).
+    """
+
+    def __init__(self, adapter: TypeAdapter, maxsize: int):
+        self.adapter = adapter
+        self.maxsize = maxsize
+        self._outcomes = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, value):
+        if not isinstance(value, str) or self.maxsize <= 0:
+            return self.adapter.validate_python(value)
+        with self._lock:
+            outcome = self._outcomes.get(value)
+            if outcome is not None:
+                self._outcomes.move_to_end(value)
+                self.hits += 1
+        if outcome is None:
+            try:
+                outcome = (True, self.adapter.validate_python(value))
+            except ValidationError as e:
+                outcome = (False, self._error_data(e))
+            with self._lock:
+                self.misses += 1
+                self._outcomes[value] = outcome
+                if len(self._outcomes) > self.maxsize:
+                    self._outcomes.popitem(last=False)
+        ok, result = outcome
+        if not ok:
+            title, line_errors = result
+            raise ValidationError.from_exception_data(title, line_errors)
+        return result
+
+    @staticmethod
+    def _error_data(error: ValidationError) -> tuple:
+        """ValidationError → (title, line_errors) (메시지는 렌더링된 그대로, ctx는 버림)"""
+        return error.title, [
+            {"type": PydanticCustomError(e["type"], e["msg"]), "loc": e["loc"], "input": e["input"]}
+            for e in error.errors(include_url=False)
+        ]
+
+    def clear(self):
+        with self._lock:
+            self._outcomes.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._outcomes), "maxsize": self.maxsize,
+                    "hits": self.hits, "misses": self.misses}
+
+
+email_cache = ValidationCache(TypeAdapter(EmailStr), VALIDATION_CACHE_SIZE)
+url_cache = ValidationCache(TypeAdapter(HttpUrl), VALIDATION_CACHE_SIZE)
+
+# 스키마는 EmailStr/HttpUrl 그대로, 검증만 캐시를 거침
+CachedEmailStr = Annotated[EmailStr, PlainValidator(email_cache)]
+CachedHttpUrl = Annotated[HttpUrl, PlainValidator(url_cache)]
+
+
+class UserRegistration(BaseModel):
+    """Pydantic 모델로 입력 검증"""
+
+    username: str
+    email: CachedEmailStr
+    age: int
+    url: Optional[CachedHttpUrl] = None
+    gender: str
+    phone: str
+
+    @field_validator("username")
+    @classmethod
+    def validate_username(cls, v):
+        if not v or len(v) < 3 or len(v) > 20:
+            raise ValueError("Username must be 3-20 characters")
+        if not USERNAME_PATTERN.match(v):
+            raise ValueError("Username can only contain letters, numbers, underscore")
+        return v
+
+    @field_validator("age")
+    @classmethod
+    def validate_age(cls, v):
+        if v < 0 or v > 150:
+            raise ValueError("Age must be between 0 and 150")
+        return v
+
+    @field_validator("gender")
+    @classmethod
+    def validate_gender(cls, v):
+        if not v or len(v) < 3 or len(v) > 10:
+            raise ValueError("Gender must be 3-20 characters")
+        return v
+
+    @field_validator("phone")
+    @classmethod
+    def validate_phone(cls, v):
+        if not PHONE_PATTERN.match(v):
+            raise ValueError("Phone number can only contain numbers")
+        return v
+
+
+# 여러 행을 한 번에 검증 (일괄 등록, CSV 검증)
+USER_LIST_ADAPTER = TypeAdapter(list[UserRegistration])
+
+
+def registration_fields(get) -> dict:
+    """폼 / JSON 행에서 UserRegistration 입력값 구성 (없는 값은 기본값, 빈 url은 None)"""
+    return {
+        "username": get("username", ""),
+        "email": get("email", ""),
+        "age": get("age", 0),
+        "url": get("url") or None,
+        "gender": get("gender", ""),
+        "phone": get("phone", ""),
+    }
+
+
+def format_errors(errors, skip: int = 0) -> list:
+    """ValidationError.errors() → register() 응답 형식 ["필드: 메시지", ...]"""
+    return [f"{(err['loc'][skip:] or ('row',))[0]}: {err['msg']}" for err in errors]
+
+
+def validate_rows(rows: list) -> list:
+    """행 묶음을 list[UserRegistration] 한 번으로 검증하고 행별 응답 반환"""
+    try:
+        users = USER_LIST_ADAPTER.validate_python(rows)
+        return [{"status": "success", "data": u.model_dump(mode="json")} for u in users]
+    except ValidationError as e:
+        row_errors = {}
+        for err in e.errors():
+            row_errors.setdefault(err["loc"][0], []).append(err)
+
+    results = [None] * len(rows)
+    for i, errors in row_errors.items():
+        results[i] = {"errors": format_errors(errors, skip=1), "status": "error"}
+    # 에러가 없는 행만 다시 한 번에 검증 (이번에는 항상 성공)
+    good = [i for i in range(len(rows)) if i not in row_errors]
+    if good:
+        users = USER_LIST_ADAPTER.validate_python([rows[i] for i in good])
+        for i, user in zip(good, users):
+            results[i] = {"status": "success", "data": user.model_dump(mode="json")}
+    return results
@@ -2,6 +2,7 @@
 Chapter 02: Input Validation Tests
 Run: pytest test_app.py -v
 """
+import json
 import pytest
 import sys
 import os
@@ -119,11 +120,307 @@ class TestSecureApp:
         })
         assert resp.status_code == 400 or b'error' in resp.data.lower()
 
+    def test_register_with_url(self, client):
+        """URL이 있어도 JSON 응답으로 직렬화됨"""
+        resp = client.post('/register', data={
+            'username': 'valid_user',
+            'email': 'test@example.com',
+            'age': '25',
+            'url': 'https://example.com/me',
+            'gender': 'other',
+            'phone': '010-1234-5678',
+        })
+        assert resp.status_code == 200
+        assert resp.get_json()['data']['url'] == 'https://example.com/me'
+
+    def test_validation_cache_same_outcome(self, client):
+        """성능: 같은 이메일/URL은 캐시된 결과를 쓰되 응답은 동일"""
+        from secure.models import email_cache, url_cache
+        email_cache.clear()
+        url_cache.clear()
+        form = {'username': 'validuser', 'email': 'not-an-email', 'age': '25',
+                'url': 'not-a-url', 'gender': 'other', 'phone': '010-1234-5678'}
+        first = client.post('/register', data=form).get_json()
+        second = client.post('/register', data=form).get_json()
+        assert first == second
+        assert any(e.startswith('email: ') for e in second['errors'])
+        assert any(e.startswith('url: ') for e in second['errors'])
+        assert email_cache.stats()['hits'] == 1
+        assert url_cache.stats()['hits'] == 1
+
+    def test_validation_cache_fresh_error(self):
+        """캐시 적중에도 매번 새 ValidationError (같은 객체를 다시 던지지 않음)"""
+        from pydantic import EmailStr, TypeAdapter, ValidationError
+        from secure.models import ValidationCache
+        cache = ValidationCache(TypeAdapter(EmailStr), maxsize=2)
+        raised = []
+        for _ in range(3):
+            with pytest.raises(ValidationError) as info:
+                cache('not-an-email')
+            raised.append(info.value)
+        assert cache.stats()['hits'] == 2
+        assert raised[1] is not raised[2]
+        assert raised[1].errors() == raised[2].errors()
+        assert raised[2].errors()[0]['msg'].startswith('value is not a valid email address')
+
+    def test_validation_cache_bounded(self):
+        from pydantic import EmailStr, TypeAdapter
+        from secure.models import ValidationCache
+        cache = ValidationCache(TypeAdapter(EmailStr), maxsize=2)
+        for i in range(5):
+            cache(f'user{i}@example.com')
+        assert cache.stats()['size'] == 2
+
     def test_safe_regex_search(self, client):
         """보안: 안전한 정규식 검색"""
         resp = client.get('/search?q=test')
         assert resp.status_code == 200
 
 
+
+class TestBulkRegistration:
+    """JSON 배열 / NDJSON 일괄 등록 검증"""
+
+    ROWS = [
+        {'username': 'user_one', 'email': 'one@example.com', 'age': '30',
+         'gender': 'other', 'phone': '010-1234-5678'},
+        {'username': '<script>', 'email': 'not-an-email', 'age': '25',
+         'gender': 'other', 'phone': '010-1234-5678'},
+        {'username': 'user_two', 'email': 'two@example.com', 'age': '41',
+         'url': 'https://example.com/two', 'gender': 'female', 'phone': '02-123-4567'},
+    ]
+
+    @pytest.fixture
+    def client(self):
+        from secure.app import app
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            yield client
+
+    def lines(self, resp):
+        return [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+
+    def test_json_array_matches_register(self, client):
+        """행별 결과가 /register 응답과 같은 형식"""
+        results = self.lines(client.post('/register/bulk', json=self.ROWS))
+        assert results[-1] == {'status': 'done', 'total': 3, 'valid': 2, 'invalid': 1}
+        for row, result in zip(self.ROWS, results):
+            expected = client.post('/register', data=row).get_json()
+            assert {k: v for k, v in result.items() if k != 'row'} == expected
+
+    def test_ndjson(self, client):
+        body = '\n'.join(json.dumps(row) for row in self.ROWS) + '\n{broken\n'
+        results = self.lines(client.post('/register/bulk', data=body,
+                                         content_type='application/x-ndjson'))
+        assert [r.get('row') for r in results[:-1]] == [0, 1, 2, 3]
+        assert results[3]['errors'] == ['row: Invalid JSON']
+        assert results[-1]['total'] == 4
+
+    def test_chunks(self, client, monkeypatch):
+        """여러 묶음으로 나눠 검증해도 행 번호가 이어짐"""
+        from secure import app as app_module
+        monkeypatch.setattr(app_module, 'BULK_CHUNK_SIZE', 2)
+        results = self.lines(client.post('/register/bulk', json=self.ROWS * 3))
+        assert [r['row'] for r in results[:-1]] == list(range(9))
+        assert [r['status'] for r in results[:-1]] == ['success', 'error', 'success'] * 3
+
+    def test_row_limit(self, client, monkeypatch):
+        from secure import app as app_module
+        monkeypatch.setattr(app_module, 'BULK_MAX_ROWS', 2)
+        results = self.lines(client.post('/register/bulk', json=self.ROWS))
+        assert results[-2]['status'] == 'error'
+        assert results[-1]['total'] == 2
+
+    def test_malformed_array(self, client):
+        results = self.lines(client.post('/register/bulk', data='[{"username": "a"}, {"x":',
+                                         content_type='application/json'))
+        assert results[-2] == {'status': 'error', 'errors': ['Malformed JSON array item']}
+
+    def test_array_parser_across_reads(self):
+        """읽기 단위 경계에 항목/숫자가 걸려도 올바르게 해석"""
+        import io
+        from secure.jsonstream import iter_json_array
+        items = [{'n': i, 's': '가' * i} for i in range(50)] + [12345, 'x', None]
+        body = json.dumps(items).encode()
+        for read_size in (1, 3, 7, 64):
+            assert list(iter_json_array(io.BytesIO(body), read_size=read_size)) == items
+
+
+class TestCSVValidation:
+    """대용량 CSV 검증 (CLI / 작업 엔드포인트)"""
+
+    HEADER = 'username,email,age,url,gender,phone\n'
+    GOOD = 'user_{i},user{i}@example.com,30,,other,010-1234-5678\n'
+    BAD = 'bad {i},not-an-email,abc,,other,010-1234-5678\n'
+
+    def make_csv(self, rows):
+        """매 3번째 행이 거부되는 CSV"""
+        return self.HEADER + ''.join(
+            (self.BAD if i % 3 == 2 else self.GOOD).format(i=i) for i in range(rows))
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        from secure import app as app_module
+        monkeypatch.setattr(app_module, 'CSV_JOB_DIR', str(tmp_path))
+        app_module.app.config['TESTING'] = True
+        with app_module.app.test_client() as client:
+            yield client
+
+    def wait_job(self, client, job_id):
+        import time
+        for _ in range(500):
+            status = client.get(f'/validate/csv/{job_id}').get_json()
+            if status['status'] != 'running':
+                return status
+            time.sleep(0.01)
+        raise AssertionError('CSV job did not finish')
+
+    def test_rejects_and_progress(self):
+        """청크 경계와 상관없이 행 번호와 에러가 기록됨"""
+        import csv
+        import io
+        from secure.csv_validate import validate_csv
+        rejects = io.StringIO()
+        progress = validate_csv(io.StringIO(self.make_csv(10)), rejects, chunk_size=4)
+        snap = progress.snapshot()
+        assert (snap['status'], snap['rows'], snap['valid'], snap['rejected']) == ('done', 10, 7, 3)
+        assert snap['reject_rate'] == 0.3
+        rows = list(csv.DictReader(io.StringIO(rejects.getvalue())))
+        assert [r['row'] for r in rows] == ['3', '6', '9']
+        assert rows[0]['username'] == 'bad 2'
+        assert 'email:' in rows[0]['errors'] and 'age:' in rows[0]['errors']
+
+    def test_process_pool_matches_in_process(self):
+        import io
+        from secure.csv_validate import validate_csv
+        data = self.make_csv(50)
+        serial, pooled = io.StringIO(), io.StringIO()
+        validate_csv(io.StringIO(data), serial, chunk_size=7)
+        progress = validate_csv(io.StringIO(data), pooled, chunk_size=7, workers=2)
+        assert progress.snapshot()['rejected'] == 16
+        assert pooled.getvalue() == serial.getvalue()
+
+    def test_cli(self, tmp_path, capsys):
+        from secure.csv_validate import main
+        source, rejects = tmp_path / 'users.csv', tmp_path / 'rejects.csv'
+        source.write_text(self.make_csv(6), encoding='utf-8')
+        assert main([str(source), '--rejects', str(rejects), '--chunk-size', '2']) == 0
+        summary = json.loads(capsys.readouterr().out)
+        assert (summary['rows'], summary['rejected']) == (6, 2)
+        assert len(rejects.read_text(encoding='utf-8').splitlines()) == 3
+
+    def test_upload_job(self, client, tmp_path):
+        resp = client.post('/validate/csv', data=self.make_csv(9), content_type='text/csv')
+        assert resp.status_code == 202
+        job_id = resp.get_json()['job_id']
+        status = self.wait_job(client, job_id)
+        assert (status['status'], status['rows'], status['rejected']) == ('done', 9, 3)
+        rejects = client.get(f'/validate/csv/{job_id}/rejects').get_data(as_text=True)
+        assert len(rejects.splitlines()) == 4
+        # 업로드 원본은 검증이 끝나면 삭제
+        assert not (tmp_path / f'{job_id}.csv').exists()
+
+    def test_multipart_upload(self, client):
+        import io
+        resp = client.post('/validate/csv', content_type='multipart/form-data',
+                           data={'file': (io.BytesIO(self.make_csv(3).encode()), 'users.csv')})
+        status = self.wait_job(client, resp.get_json()['job_id'])
+        assert (status['rows'], status['rejected']) == (3, 1)
+
+    def test_finished_jobs_evicted(self, client, tmp_path, monkeypatch):
+        """TTL이 지나거나 최대 작업 수를 넘은 끝난 작업은 rejects 파일과 함께 삭제"""
+        from secure import app as app_module
+        monkeypatch.setattr(app_module, 'csv_jobs', {})
+        monkeypatch.setattr(app_module, 'CSV_MAX_JOBS', 2)
+        job_ids = []
+        for _ in range(3):
+            resp = client.post('/validate/csv', data=self.make_csv(3), content_type='text/csv')
+            job_ids.append(resp.get_json()['job_id'])
+            self.wait_job(client, job_ids[-1])
+        client.post('/validate/csv', data=self.make_csv(3), content_type='text/csv')
+        # 4번째 작업을 받으며 오래된 작업부터 지워 2개만 남김
+        for job_id in job_ids[:2]:
+            assert client.get(f'/validate/csv/{job_id}').status_code == 404
+        assert not (tmp_path / f'{job_ids[0]}.rejects.csv').exists()
+        assert (tmp_path / f'{job_ids[2]}.rejects.csv').exists()
+
+        monkeypatch.setattr(app_module, 'CSV_JOB_TTL', 0)
+        assert client.get(f'/validate/csv/{job_ids[2]}').status_code == 404
+        assert not (tmp_path / f'{job_ids[2]}.rejects.csv').exists()
+
+    def test_missing_file_and_unknown_job(self, client):
+        assert client.post('/validate/csv').status_code == 400
+        assert client.get('/validate/csv/nope').status_code == 404
+        assert client.get('/validate/csv/nope/rejects').status_code == 404
+
+
+class TestRegexSearch:
+    """사용자 정규식 검색: 선형 시간 엔진"""
+
+    PATTERNS = [r'a+b', r'^ab$', r'(a|b)*c', r'\d{2,3}-\d{4}', r'[a-c]+x?$', r'\bfoo\b',
+                r'\Bo', r'a{,2}b', r'[^a-z]', r'.\n', r'\Aa', r'b\Z', r'(?:ab|a)c',
+                r'(a*)*b', r'\w+@\w+\.com', r'a??b', r'[]a-]', r'a{1', r'', r'[\d-]', r'[-\w]+']
+    # re.compile이 거부하는 패턴: 선형 엔진도 다른 뜻으로 컴파일하지 않고 거부해야 함
+    REJECTED = [r'[\d-z]', r'[a-\d]', r'[\w-\s]', r'[\D-z]', r'[z-a]']
+    TEXTS = ['', 'a', 'ab', 'aab\n', 'foo bar', 'xfoox', '12-3456', 'b\n', 'aac', 'a{1',
+             'me@ex.com', '-', 'x\nab']
+
+    @pytest.fixture
+    def client(self):
+        from secure.app import app
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            yield client
+
+    def test_matches_like_re(self):
+        import re
+        from secure.linear_regex import LinearRegex
+        for pattern in self.PATTERNS:
+            regex = LinearRegex(pattern)
+            for text in self.TEXTS:
+                assert regex.search(text) == bool(re.search(pattern, text)), (pattern, text)
+
+    def test_rejects_like_re(self):
+        import re
+        from secure.linear_regex import LinearRegex, RegexError, compile_pattern
+        for pattern in self.REJECTED:
+            with pytest.raises(re.error):
+                re.compile(pattern)
+            with pytest.raises(RegexError):
+                LinearRegex(pattern)
+            with pytest.raises(RegexError):
+                compile_pattern(pattern, engine='linear')
+
+    def test_evil_pattern_is_linear(self):
+        """(a+)+$ 는 re에서 지수 시간, 여기서는 입력 길이에 비례"""
+        from secure.linear_regex import LinearRegex
+        regex = LinearRegex(r'(a+)+$')
+        assert regex.search('a' * 50000 + '!', max_steps=10**6) is False
+        assert regex.search('a' * 50000, max_steps=10**6) is True
+
+    def test_limits(self):
+        from secure.linear_regex import (LinearRegex, RegexBudgetError, RegexError,
+                                         StepLimitExceeded, compile_pattern)
+        with pytest.raises(StepLimitExceeded):
+            LinearRegex(r'(a|b)*x').search('ab' * 1000, max_steps=500)
+        with pytest.raises(RegexBudgetError):
+            LinearRegex(r'(a|b){200}')  # 명령어 수 예산 초과
+        with pytest.raises(RegexBudgetError):
+            compile_pattern('a' * 101)
+        for pattern in (r'(a)\1', r'(?=a)', r'a*+', r'(a', r'*a'):
+            with pytest.raises(RegexError):
+                LinearRegex(pattern)
+
+    def test_search_endpoint(self, client, monkeypatch):
+        from secure import app as app_module
+        monkeypatch.setattr(app_module, 'SEARCH_REGEX_ENGINE', 'linear')
+        resp = client.get('/search', query_string={'pattern': r'(a+)+$', 'text': 'a' * 30 + '!'})
+        assert resp.get_json() == {'status': 'success', 'matched': False, 'engine': 'linear'}
+        resp = client.get('/search', query_string={'pattern': r'(a)\1', 'text': 'aa'})
+        assert resp.status_code == 400
+        resp = client.get('/search', query_string={'pattern': r'(a|b)*x', 'text': 'ab' * 200000})
+        assert resp.status_code == 422
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -2,14 +2,49 @@
 Command Injection 방어 실습 - 안전한 코드
 subprocess를 shell=False로 사용하고 입력값 검증
 """
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 import subprocess
 import re
 import shlex
+import os
+import json
+import time
+import operator
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from itertools import compress
+
+try:
+    from .result_cache import TTLCache
+    from .resolvers import DNSServerError, ResolveError, get_resolver
+except ImportError:
+    from result_cache import TTLCache
+    from resolvers import DNSServerError, ResolveError, get_resolver
 
 app = Flask(__name__)
 app.json.ensure_ascii = False
 
+# 진단 결과 캐시: 같은 호스트를 반복 조회해도 프로세스를 다시 띄우지 않음
+CACHE_TTL = float(os.environ.get("DIAG_CACHE_TTL", "60"))
+CACHE_MAX_ENTRIES = int(os.environ.get("DIAG_CACHE_MAX_ENTRIES", "1024"))
+ping_cache = TTLCache(CACHE_TTL, CACHE_MAX_ENTRIES)
+dns_cache = TTLCache(CACHE_TTL, CACHE_MAX_ENTRIES)
+
+# /ping/batch 제한: 요청당 호스트 수, 요청당 동시 ping 수, 요청당 전체 시간(초)
+PING_BATCH_MAX_HOSTS = int(os.environ.get("PING_BATCH_MAX_HOSTS", "256"))
+PING_BATCH_FANOUT = int(os.environ.get("PING_BATCH_FANOUT", "8"))
+PING_BATCH_DEADLINE = float(os.environ.get("PING_BATCH_DEADLINE", "60"))
+# 모든 배치 요청이 함께 쓰는 ping 스레드 (프로세스 수의 전체 상한)
+ping_pool = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("PING_BATCH_WORKERS", "32")),
+    thread_name_prefix="ping",
+)
+
+INVALID_HOST_MESSAGE = "유효하지 않은 호스트 형식입니다. IP 주소 또는 도메인을 입력하세요."
+TIMEOUT_MESSAGE = "요청 시간이 초과되었습니다"
+
+# DNS 조회 백엔드: subprocess(nslookup) / getaddrinfo / udp (DNS_BACKEND 환경 변수)
+resolver = get_resolver()
+
 # 허용된 호스트 패턴 (화이트리스트)
 IP_PATTERN = re.compile(r"^(\d{1,3}\.){3}\d{1,3}$")
 HOSTNAME_PATTERN = re.compile(r"^[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?(\.[a-zA-Z]{2,})+$")
@@ -27,6 +62,36 @@ def validate_host(host: str) -> bool:
     return bool(HOSTNAME_PATTERN.match(host))
 
 
+# validate_hosts()용: 두 패턴 + 옥텟 범위(0~255, 앞자리 0 허용) + 길이 제한을 정규식 하나로 합침
+# - 끝의 \n? 은 기존 패턴의 $ 가 마지막 줄바꿈 앞에서도 매치되는 동작과 맞춘 것
+# - IP 부분은 원자 그룹(?>...)이라 "10.0.0.1; id" 같은 입력에서 옥텟을 다시 나눠 보지 않음
+_OCTET = r"(?:25[0-5]|2[0-4][0-9]|[01][0-9]{2}|[0-9]{1,2})"  # 긴 것부터 (원자 그룹이라 순서가 중요)
+HOST_BATCH_PATTERN = re.compile(
+    r"(?=(?s:.){1,255}\Z)"
+    rf"(?:(?>(?:{_OCTET}\.){{3}}{_OCTET})"
+    r"|[a-zA-Z0-9](?:[a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?(?:\.[a-zA-Z]{2,})+)\n?"
+)
+
+
+def validate_hosts(hosts) -> list:
+    """여러 호스트를 한 번에 검증하고 유효한 항목의 인덱스 목록 반환
+
+    결과는 [i for i, h in enumerate(hosts) if validate_host(h)]와 같음.
+    정규식 매칭과 인덱스 수집을 map()/compress()로 돌려 항목마다 파이썬 코드를
+    실행하지 않고, 유니코드 숫자 등 비 ASCII 입력만 validate_host()로 넘김.
+    """
+    if not isinstance(hosts, (list, tuple)):
+        hosts = list(hosts)
+    indices = range(len(hosts))
+    valid = list(compress(indices, map(HOST_BATCH_PATTERN.fullmatch, hosts)))
+    # 합친 패턴은 ASCII 전용이므로 비 ASCII 항목은 여기서 모두 빠져 있음
+    extra = [i for i in compress(indices, map(operator.not_, map(str.isascii, hosts)))
+             if validate_host(hosts[i])]
+    if extra:
+        valid = sorted(valid + extra)
+    return valid
+
+
 def validate_domain(domain: str) -> bool:
     """도메인 유효성 검사"""
     if not domain or len(domain) > 255:
@@ -34,6 +99,22 @@ def validate_domain(domain: str) -> bool:
     return bool(HOSTNAME_PATTERN.match(domain))
 
 
+def run_ping(host: str) -> dict:
+    """shell=False + 인자 리스트로 분리해 ping 실행 (안전)"""
+    result = subprocess.run(
+        ["ping", "-c", "3", host],  # 명령어와 인자를 리스트로 분리
+        shell=False,  # 쉘을 거치지 않음
+        capture_output=True,
+        text=True,
+        timeout=10
+    )
+    return {
+        "status": "success",
+        "stdout": result.stdout,
+        "stderr": result.stderr
+    }
+
+
 @app.route("/")
 def index():
     return """
@@ -47,6 +128,10 @@ def index():
         <input name="domain" placeholder="Enter domain" size="40"><br><br>
         <button type="submit">DNS Lookup</button>
     </form>
+    <form action="/ping/batch" method="POST">
+        <textarea name="hosts" placeholder="한 줄에 호스트 하나" rows="5" cols="40"></textarea><br><br>
+        <button type="submit">Batch Ping</button>
+    </form>
     <hr>
     <h3>적용된 보안 조치</h3>
     <ul>
@@ -54,6 +139,7 @@ def index():
         <li>명령어와 인자를 리스트로 분리</li>
         <li>입력값 화이트리스트 검증 (IP, 도메인 형식)</li>
         <li>실행 시간 제한 (timeout)</li>
+        <li>결과 캐시로 같은 호스트의 반복 실행 방지</li>
     </ul>
     """
 
@@ -65,31 +151,91 @@ def ping():
 
     # 1. 입력값 검증
     if not validate_host(host):
-        return jsonify({
-            "status": "error",
-            "message": "유효하지 않은 호스트 형식입니다. IP 주소 또는 도메인을 입력하세요."
-        })
+        return jsonify({"status": "error", "message": INVALID_HOST_MESSAGE})
+
+    # 2. 검증된 호스트로 ping
+    return jsonify(ping_host(host))
+
 
+def ping_host(host: str) -> dict:
+    """검증된 호스트로 캐시 조회 (없으면 ping 실행), 에러도 응답 dict로 반환"""
     try:
-        # 2. shell=False + 인자 리스트로 분리 (안전)
-        result = subprocess.run(
-            ["ping", "-c", "3", host],  # 명령어와 인자를 리스트로 분리
-            shell=False,  # 쉘을 거치지 않음
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-        return jsonify({
-            "status": "success",
-            "stdout": result.stdout,
-            "stderr": result.stderr
-        })
+        return ping_cache.get_or_compute(host.lower(), lambda: run_ping(host))
     except subprocess.TimeoutExpired:
-        return jsonify({"status": "error", "message": "요청 시간이 초과되었습니다"})
+        return {"status": "error", "message": TIMEOUT_MESSAGE}
     except FileNotFoundError:
-        return jsonify({"status": "error", "message": "ping 명령어를 찾을 수 없습니다"})
-    except Exception as e:
-        return jsonify({"status": "error", "message": "명령 실행 중 오류가 발생했습니다"})
+        return {"status": "error", "message": "ping 명령어를 찾을 수 없습니다"}
+    except Exception:
+        return {"status": "error", "message": "명령 실행 중 오류가 발생했습니다"}
+
+
+@app.route("/ping/batch", methods=["POST"])
+def ping_batch():
+    """여러 호스트 ping: 제한된 동시 실행 + 끝나는 순서대로 NDJSON 스트리밍
+
+    요청: {"hosts": [...]} 또는 JSON 배열, 폼이면 hosts 필드에 한 줄에 하나씩
+    응답: 한 줄에 하나씩 {"index": 요청 내 위치, "host": ..., "status": ...}
+    """
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get("hosts")
+    if data is None:
+        data = request.form.get("hosts", "").splitlines()
+    if not isinstance(data, list) or not all(isinstance(h, str) for h in data):
+        return jsonify({"status": "error", "message": "hosts는 문자열 목록이어야 합니다"}), 400
+    hosts = [h.strip() for h in data if h.strip()]
+    if not hosts:
+        return jsonify({"status": "error", "message": "호스트를 하나 이상 입력하세요"}), 400
+    if len(hosts) > PING_BATCH_MAX_HOSTS:
+        return jsonify({
+            "status": "error",
+            "message": f"한 번에 최대 {PING_BATCH_MAX_HOSTS}개까지 요청할 수 있습니다"
+        }), 413
+
+    return Response(_stream_batch(hosts, validate_hosts(hosts)),
+                    mimetype="application/x-ndjson")
+
+
+def _ndjson(index: int, host: str, result: dict) -> str:
+    return json.dumps({"index": index, "host": host, **result}, ensure_ascii=False) + "\n"
+
+
+def _stream_batch(hosts: list, valid: list):
+    """검증 실패 항목을 먼저 보내고, 나머지는 PING_BATCH_FANOUT개씩 실행하며 완료 순으로 전송"""
+    deadline = time.monotonic() + PING_BATCH_DEADLINE
+    valid_set = set(valid)
+    for i, host in enumerate(hosts):
+        if i not in valid_set:
+            yield _ndjson(i, host, {"status": "error", "message": INVALID_HOST_MESSAGE})
+
+    queue = iter(valid)
+    pending = {}
+    try:
+        while True:
+            # 요청당 동시 실행 수를 넘지 않게 채워 넣음
+            for i in queue:
+                pending[ping_pool.submit(ping_host, hosts[i])] = i
+                if len(pending) >= PING_BATCH_FANOUT:
+                    break
+            if not pending:
+                return
+            done, _ = wait(pending, timeout=max(0, deadline - time.monotonic()),
+                           return_when=FIRST_COMPLETED)
+            if not done:
+                # 요청 전체 시간 초과: 남은 항목은 실행하지 않고 타임아웃으로 응답
+                timeout = {"status": "error", "message": TIMEOUT_MESSAGE}
+                for i in sorted(pending.values()):
+                    yield _ndjson(i, hosts[i], timeout)
+                for i in queue:
+                    yield _ndjson(i, hosts[i], timeout)
+                return
+            for future in done:
+                i = pending.pop(future)
+                yield _ndjson(i, hosts[i], future.result())
+    finally:
+        # 클라이언트가 끊겼거나 시간 초과: 아직 시작 안 한 ping은 취소
+        for future in pending:
+            future.cancel()
 
 
 @app.route("/dns", methods=["POST"])
@@ -105,23 +251,23 @@ def dns_lookup():
         })
 
     try:
-        # 2. shell=False로 안전하게 실행
-        result = subprocess.run(
-            ["nslookup", domain],
-            shell=False,
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-        return jsonify({
-            "status": "success",
-            "output": result.stdout
-        })
-    except subprocess.TimeoutExpired:
+        # 2. 검증된 도메인으로 캐시 조회 (없으면 resolver 백엔드로 조회)
+        return jsonify(dns_cache.get_or_compute(domain.lower(), lambda: resolver.resolve(domain)))
+    except (subprocess.TimeoutExpired, TimeoutError):
         return jsonify({"status": "error", "message": "요청 시간이 초과되었습니다"})
+    except ResolveError:
+        return jsonify({"status": "error", "message": "도메인을 찾을 수 없습니다"})
+    except DNSServerError:
+        return jsonify({"status": "error", "message": "DNS 서버가 응답하지 못했습니다"})
     except Exception as e:
         return jsonify({"status": "error", "message": "명령 실행 중 오류가 발생했습니다"})
 
 
+@app.route("/cache/stats")
+def cache_stats():
+    """진단 결과 캐시 적중/미스 통계"""
+    return jsonify({"ping": ping_cache.stats(), "dns": dns_cache.stats()})
+
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
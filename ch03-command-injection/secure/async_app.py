@@ -0,0 +1,218 @@
+"""
+Command Injection 방어 실습 - 안전한 코드 (비동기 ASGI 버전)
+asyncio.create_subprocess_exec로 ping/nslookup을 실행해 요청이 워커 스레드를 붙잡지 않음
+- 입력 검증은 secure/app.py의 validate_host / validate_domain을 그대로 사용
+- 동시에 실행되는 프로세스 수를 전역 세마포어로 제한
+- 요청별 데드라인(슬롯 대기 + 실행 시간)을 넘기면 프로세스를 종료
+
+실행: uvicorn secure.async_app:app --host 0.0.0.0 --port 5000
+"""
+import asyncio
+import json
+import os
+import weakref
+from urllib.parse import parse_qs
+
+try:
+    from .app import validate_host, validate_domain
+except ImportError:
+    from app import validate_host, validate_domain
+
+# 동시에 떠 있을 수 있는 ping/nslookup 프로세스 수
+MAX_PROCESSES = int(os.environ.get("DIAG_MAX_PROCESSES", "64"))
+# 요청 하나가 쓸 수 있는 최대 시간(초): 슬롯 대기 + 실행
+REQUEST_DEADLINE = float(os.environ.get("DIAG_DEADLINE", "10"))
+MAX_BODY_SIZE = 64 * 1024
+
+INDEX_HTML = """
+    <h1>Command Injection 방어 실습</h1>
+    <h2>안전한 네트워크 진단 도구 (비동기)</h2>
+    <form action="/ping" method="POST">
+        <input name="host" placeholder="Enter hostname or IP" size="40"><br><br>
+        <button type="submit">Ping</button>
+    </form>
+    <form action="/dns" method="POST">
+        <input name="domain" placeholder="Enter domain" size="40"><br><br>
+        <button type="submit">DNS Lookup</button>
+    </form>
+    <hr>
+    <h3>적용된 보안 조치</h3>
+    <ul>
+        <li>asyncio.create_subprocess_exec() 사용 (쉘을 거치지 않음)</li>
+        <li>명령어와 인자를 리스트로 분리</li>
+        <li>입력값 화이트리스트 검증 (IP, 도메인 형식)</li>
+        <li>동시 실행 프로세스 수 제한 + 요청별 데드라인</li>
+    </ul>
+"""
+
+# asyncio.Semaphore는 처음 쓰인 이벤트 루프에 묶이므로 루프별로 하나씩 둔다
+_slots = weakref.WeakKeyDictionary()
+
+
+def _process_slots() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    slots = _slots.get(loop)
+    if slots is None:
+        slots = _slots[loop] = asyncio.Semaphore(MAX_PROCESSES)
+    return slots
+
+
+def ping_command(host: str) -> list:
+    return ["ping", "-c", "3", host]
+
+
+def dns_command(domain: str) -> list:
+    return ["nslookup", domain]
+
+
+async def run_command(args: list, deadline: float) -> tuple:
+    """프로세스 슬롯을 얻어 args를 실행하고 (stdout, stderr) 반환
+
+    deadline(loop.time() 기준)을 넘기면 asyncio.TimeoutError를 던지고,
+    이미 실행 중이던 프로세스는 종료시킨다.
+    슬롯은 async with로 잡으므로 대기 중 타임아웃/취소가 나도 새지 않음
+    (wait_for(acquire())는 획득과 타임아웃이 겹치면 슬롯을 잃을 수 있음)
+    """
+    slots = _process_slots()
+    proc = None
+    async with asyncio.timeout_at(deadline), slots:
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *args,  # 쉘을 거치지 않음
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            stdout, stderr = await proc.communicate()
+            return stdout.decode(errors="replace"), stderr.decode(errors="replace")
+        finally:
+            # 타임아웃이나 클라이언트 연결 끊김(취소)에도 프로세스를 남기지 않음
+            if proc is not None and proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+
+
+def _deadline() -> float:
+    return asyncio.get_running_loop().time() + REQUEST_DEADLINE
+
+
+async def ping(form: dict) -> dict:
+    """안전한 ping: create_subprocess_exec + 입력 검증"""
+    host = form.get("host", "").strip()
+
+    # 1. 입력값 검증
+    if not validate_host(host):
+        return {
+            "status": "error",
+            "message": "유효하지 않은 호스트 형식입니다. IP 주소 또는 도메인을 입력하세요."
+        }
+
+    try:
+        # 2. 인자 리스트로 실행 (세마포어 + 데드라인)
+        stdout, stderr = await run_command(ping_command(host), _deadline())
+        return {"status": "success", "stdout": stdout, "stderr": stderr}
+    except asyncio.TimeoutError:
+        return {"status": "error", "message": "요청 시간이 초과되었습니다"}
+    except FileNotFoundError:
+        return {"status": "error", "message": "ping 명령어를 찾을 수 없습니다"}
+    except Exception:
+        return {"status": "error", "message": "명령 실행 중 오류가 발생했습니다"}
+
+
+async def dns_lookup(form: dict) -> dict:
+    """안전한 DNS 조회: create_subprocess_exec + 입력 검증"""
+    domain = form.get("domain", "").strip()
+
+    # 1. 입력값 검증
+    if not validate_domain(domain):
+        return {"status": "error", "message": "유효하지 않은 도메인 형식입니다."}
+
+    try:
+        stdout, _ = await run_command(dns_command(domain), _deadline())
+        return {"status": "success", "output": stdout}
+    except asyncio.TimeoutError:
+        return {"status": "error", "message": "요청 시간이 초과되었습니다"}
+    except Exception:
+        return {"status": "error", "message": "명령 실행 중 오류가 발생했습니다"}
+
+
+ROUTES = {"/ping": ping, "/dns": dns_lookup}
+
+
+async def _read_body(receive):
+    """요청 본문 읽기 (MAX_BODY_SIZE 초과 시 None)"""
+    body = b""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        body += message.get("body", b"")
+        if len(body) > MAX_BODY_SIZE:
+            return None
+        if not message.get("more_body"):
+            return body
+
+
+async def _respond(send, status: int, body: bytes, content_type: str):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", content_type.encode()),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _respond_json(send, status: int, payload: dict):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    await _respond(send, status, body, "application/json")
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI 진입점"""
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    path, method = scope["path"], scope["method"]
+    if path == "/":
+        if method != "GET":
+            await _respond_json(send, 405, {"error": "Method not allowed"})
+            return
+        await _respond(send, 200, INDEX_HTML.encode("utf-8"), "text/html; charset=utf-8")
+        return
+
+    handler = ROUTES.get(path)
+    if handler is None:
+        await _respond_json(send, 404, {"error": "Not found"})
+        return
+    if method != "POST":
+        await _respond_json(send, 405, {"error": "Method not allowed"})
+        return
+
+    body = await _read_body(receive)
+    if body is None:
+        await _respond_json(send, 413, {"error": "Request body too large"})
+        return
+    form = {k: v[0] for k, v in parse_qs(body.decode("utf-8", "replace")).items()}
+    await _respond_json(send, 200, await handler(form))
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=5000)
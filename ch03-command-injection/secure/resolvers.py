@@ -0,0 +1,270 @@
+"""
+/dns 조회 백엔드
+- subprocess : nslookup 실행 (기존 방식, 출력 문자열 그대로)
+- getaddrinfo: socket.getaddrinfo를 스레드 풀에서 실행 (프로세스 생성 없음)
+- udp        : 표준 라이브러리만으로 만든 최소 DNS 클라이언트 (A/AAAA + TTL)
+
+DNS_BACKEND 환경 변수로 선택합니다. 구조화된 백엔드는
+{"status": "success", "domain": ..., "records": [{"type", "value", "ttl"}, ...]}
+형식으로 응답합니다.
+"""
+import os
+import secrets
+import socket
+import struct
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DNS_TIMEOUT = float(os.environ.get("DNS_TIMEOUT", "3"))
+
+TYPE_A, TYPE_CNAME, TYPE_AAAA = 1, 5, 28
+CLASS_IN = 1
+FLAG_QR, FLAG_TC = 0x8000, 0x0200
+RCODE_NOERROR, RCODE_NXDOMAIN = 0, 3
+
+
+class ResolveError(Exception):
+    """도메인을 찾을 수 없음 (NXDOMAIN)"""
+
+
+class DNSServerError(Exception):
+    """DNS 서버가 답하지 못함 (SERVFAIL, REFUSED 등 NXDOMAIN 외의 오류 응답)"""
+
+
+class SubprocessResolver:
+    """nslookup 프로세스 실행 (shell=False)"""
+
+    name = "subprocess"
+
+    def resolve(self, domain: str) -> dict:
+        result = subprocess.run(
+            ["nslookup", domain],
+            shell=False,
+            capture_output=True,
+            text=True,
+            timeout=10
+        )
+        return {
+            "status": "success",
+            "output": result.stdout
+        }
+
+
+# getaddrinfo 오류 중 "이름이 없음"에 해당하는 것 (EAI_AGAIN / EAI_FAIL은 서버 오류)
+NOT_FOUND_ERRNOS = frozenset(
+    getattr(socket, name) for name in ("EAI_NONAME", "EAI_NODATA") if hasattr(socket, name)
+)
+
+
+class GetaddrinfoResolver:
+    """시스템 resolver(getaddrinfo)를 스레드 풀에서 실행, 시간 제한 적용"""
+
+    name = "getaddrinfo"
+
+    def __init__(self, max_workers=None, timeout=None):
+        self.timeout = DNS_TIMEOUT if timeout is None else timeout
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers or int(os.environ.get("DNS_THREADS", "8")),
+            thread_name_prefix="dns",
+        )
+
+    def resolve(self, domain: str) -> dict:
+        future = self._pool.submit(socket.getaddrinfo, domain, None, 0, socket.SOCK_STREAM)
+        try:
+            infos = future.result(self.timeout)  # 초과 시 TimeoutError
+        except socket.gaierror as e:
+            if e.errno in NOT_FOUND_ERRNOS:
+                raise ResolveError(str(e)) from e
+            raise DNSServerError(str(e)) from e
+        records, seen = [], set()
+        for family, _, _, _, sockaddr in infos:
+            rtype = {socket.AF_INET: "A", socket.AF_INET6: "AAAA"}.get(family)
+            if rtype and sockaddr[0] not in seen:
+                seen.add(sockaddr[0])
+                records.append({"type": rtype, "value": sockaddr[0], "ttl": None})  # TTL 알 수 없음
+        return {"status": "success", "domain": domain, "records": records}
+
+
+def system_nameserver() -> tuple:
+    """DNS_SERVER(host[:port]) 또는 /etc/resolv.conf의 첫 nameserver"""
+    server = os.environ.get("DNS_SERVER")
+    if not server:
+        try:
+            with open("/etc/resolv.conf") as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) >= 2 and parts[0] == "nameserver":
+                        server = parts[1]
+                        break
+        except OSError:
+            pass
+    server = server or "8.8.8.8"
+    if server.startswith("["):  # [IPv6]:port
+        host, _, port = server[1:].partition("]")
+        return host, int(port.lstrip(":") or 53)
+    if server.count(":") == 1:  # IPv4/호스트:port
+        host, port = server.split(":")
+        return host, int(port)
+    return server, 53
+
+
+def build_query(query_id: int, domain: str, qtype: int) -> bytes:
+    """재귀 요청(RD) 질의 메시지"""
+    header = struct.pack("!HHHHHH", query_id, 0x0100, 1, 0, 0, 0)
+    qname = b"".join(
+        bytes([len(label)]) + label.encode("ascii") for label in domain.rstrip(".").split(".")
+    ) + b"\0"
+    return header + qname + struct.pack("!HH", qtype, CLASS_IN)
+
+
+def read_name(message: bytes, offset: int) -> tuple:
+    """압축 포인터를 따라 이름을 읽고 (이름, 다음 offset) 반환"""
+    labels = []
+    end = None
+    for _ in range(128):  # 포인터 순환 방지
+        length = message[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            offset = struct.unpack_from("!H", message, offset)[0] & 0x3FFF
+            continue
+        offset += 1
+        if length == 0:
+            return ".".join(labels), (end if end is not None else offset)
+        labels.append(message[offset:offset + length].decode("ascii", "replace"))
+        offset += length
+    raise ValueError("DNS name compression loop")
+
+
+def parse_response(message: bytes) -> tuple:
+    """응답 메시지 → (id, flags, 레코드 목록)"""
+    query_id, flags, qdcount, ancount, _, _ = struct.unpack_from("!HHHHHH", message, 0)
+    offset = 12
+    for _ in range(qdcount):
+        _, offset = read_name(message, offset)
+        offset += 4
+    records = []
+    for _ in range(ancount):
+        _, offset = read_name(message, offset)
+        rtype, rclass, ttl, rdlength = struct.unpack_from("!HHIH", message, offset)
+        offset += 10
+        rdata = message[offset:offset + rdlength]
+        if rclass == CLASS_IN and rtype == TYPE_A and rdlength == 4:
+            records.append({"type": "A", "value": socket.inet_ntop(socket.AF_INET, rdata), "ttl": ttl})
+        elif rclass == CLASS_IN and rtype == TYPE_AAAA and rdlength == 16:
+            records.append({"type": "AAAA", "value": socket.inet_ntop(socket.AF_INET6, rdata), "ttl": ttl})
+        elif rtype == TYPE_CNAME:
+            records.append({"type": "CNAME", "value": read_name(message, offset)[0], "ttl": ttl})
+        offset += rdlength
+    return query_id, flags, records
+
+
+class UDPResolver:
+    """A/AAAA 질의를 UDP로 직접 보내는 최소 DNS 클라이언트
+
+    잘린(TC) 응답은 같은 질의를 TCP로 다시 보낸다.
+    """
+
+    name = "udp"
+
+    def __init__(self, server=None, timeout=None):
+        self.server = server or system_nameserver()
+        self.timeout = DNS_TIMEOUT if timeout is None else timeout
+
+    def resolve(self, domain: str) -> dict:
+        family = socket.AF_INET6 if ":" in self.server[0] else socket.AF_INET
+        pending = {}
+        for qtype in (TYPE_A, TYPE_AAAA):
+            query_id = secrets.randbits(16)  # 예측 불가능한 ID (응답 위조 방지)
+            while query_id in pending:
+                query_id = secrets.randbits(16)
+            pending[query_id] = qtype
+
+        answers = {}
+        truncated = []
+        deadline = time.monotonic() + self.timeout
+        with socket.socket(family, socket.SOCK_DGRAM) as sock:
+            sock.connect(self.server)  # 다른 주소에서 온 응답은 커널이 걸러냄
+            for query_id, qtype in pending.items():
+                sock.send(build_query(query_id, domain, qtype))
+            while len(answers) + len(truncated) < len(pending):
+                sock.settimeout(self._remaining(domain, deadline))
+                message = sock.recv(4096)
+                try:
+                    query_id, flags, records = parse_response(message)
+                except (struct.error, IndexError, ValueError):
+                    continue  # 깨진 응답은 무시
+                if not flags & FLAG_QR:
+                    continue  # 응답이 아닌 패킷(질의)은 무시
+                if query_id not in pending or query_id in answers or query_id in truncated:
+                    continue
+                if flags & FLAG_TC:
+                    truncated.append(query_id)
+                else:
+                    answers[query_id] = (flags & 0x000F, records)
+
+        for query_id in truncated:
+            answers[query_id] = self._query_tcp(query_id, domain, pending[query_id], deadline)
+
+        rcodes = {rcode for rcode, _ in answers.values()}
+        if RCODE_NXDOMAIN in rcodes:
+            raise ResolveError(f"{domain}: NXDOMAIN")
+        if rcodes != {RCODE_NOERROR}:
+            rcode = max(rcodes - {RCODE_NOERROR})
+            raise DNSServerError(f"{domain}: DNS server error (rcode {rcode})")
+        records = []
+        for query_id in pending:  # A 먼저, 그다음 AAAA
+            rcode, found = answers[query_id]
+            records.extend(r for r in found if r not in records)
+        return {"status": "success", "domain": domain, "records": records}
+
+    def _query_tcp(self, query_id: int, domain: str, qtype: int, deadline: float) -> tuple:
+        """잘린 응답을 받은 질의를 TCP(2바이트 길이 + 메시지)로 다시 보내고 (rcode, 레코드 목록) 반환"""
+        query = build_query(query_id, domain, qtype)
+        with socket.create_connection(self.server, timeout=self._remaining(domain, deadline)) as sock:
+            sock.sendall(struct.pack("!H", len(query)) + query)
+            length = struct.unpack("!H", self._recv_exact(sock, 2, domain, deadline))[0]
+            message = self._recv_exact(sock, length, domain, deadline)
+        try:
+            response_id, flags, records = parse_response(message)
+        except (struct.error, IndexError, ValueError) as e:
+            raise DNSServerError(f"{domain}: malformed TCP response") from e
+        if response_id != query_id or not flags & FLAG_QR:
+            raise DNSServerError(f"{domain}: unexpected TCP response")
+        if flags & FLAG_TC:
+            raise DNSServerError(f"{domain}: truncated TCP response")
+        return flags & 0x000F, records
+
+    def _recv_exact(self, sock, size: int, domain: str, deadline: float) -> bytes:
+        data = b""
+        while len(data) < size:
+            sock.settimeout(self._remaining(domain, deadline))
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                raise DNSServerError(f"{domain}: TCP connection closed early")
+            data += chunk
+        return data
+
+    @staticmethod
+    def _remaining(domain: str, deadline: float) -> float:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"DNS query for {domain} timed out")
+        return remaining
+
+
+BACKENDS = {
+    SubprocessResolver.name: SubprocessResolver,
+    GetaddrinfoResolver.name: GetaddrinfoResolver,
+    UDPResolver.name: UDPResolver,
+}
+
+
+def get_resolver(name: str = None):
+    """이름(기본: DNS_BACKEND 환경 변수)으로 백엔드 생성"""
+    name = name or os.environ.get("DNS_BACKEND", "subprocess")
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown DNS_BACKEND {name!r}; choose from {', '.join(BACKENDS)}")
@@ -0,0 +1,106 @@
+"""
+진단 결과 캐시 (TTL + LRU)
+- 같은 호스트/도메인을 반복 조회할 때 프로세스를 다시 띄우지 않음
+- 동시에 들어온 같은 키의 요청은 하나로 합침 (50개 동시 요청 → 프로세스 1개)
+- 예외는 캐시하지 않음 (타임아웃 등은 다음 요청에서 다시 시도)
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+
+class _InFlight:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+def _fresh_error(error: BaseException) -> BaseException:
+    """같은 타입/인자의 새 예외 (traceback 없음)
+
+    기다리던 요청들이 먼저 온 요청의 예외 객체를 그대로 다시 던지면 traceback이
+    한 객체에 계속 쌓이고 그 프레임이 살아남으므로 요청마다 복사본을 던진다.
+    """
+    try:
+        return copy.copy(error)
+    except Exception:
+        return RuntimeError(f"{type(error).__name__}: {error}")
+
+
+class TTLCache:
+    """스레드 안전 TTL/LRU 캐시 + 진행 중 요청 합치기"""
+
+    def __init__(self, ttl: float, max_entries: int, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (만료 시각, 값), 오래된 것부터
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key, compute):
+        """캐시된 값을 반환하거나, compute()를 한 번만 실행해 결과를 저장"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _InFlight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            # 먼저 온 요청의 결과를 기다림
+            call.done.wait()
+            if call.error is not None:
+                raise _fresh_error(call.error)
+            return call.value
+
+        try:
+            call.value = compute()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if call.error is None and self.ttl > 0 and self.max_entries > 0:
+                    self._entries[key] = (self._clock() + self.ttl, call.value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                        self.evictions += 1
+                del self._inflight[key]
+            call.done.set()
+        return call.value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.coalesced = self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+            }
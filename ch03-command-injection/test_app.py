@@ -2,6 +2,12 @@
 Chapter 03: Command Injection Tests
 Run: pytest test_app.py -v
 """
+import asyncio
+import json
+import socket
+import struct
+import threading
+import time
 import pytest
 import sys
 import os
@@ -54,5 +60,475 @@ class TestSecureApp:
         assert resp.status_code == 400 or b'error' in resp.data.lower()
 
 
+class TestValidateHosts:
+    """validate_hosts()는 validate_host()를 하나씩 부른 결과와 같아야 함"""
+
+    EDGE_CASES = [
+        '127.0.0.1', '001.002.003.004', '255.255.255.255', '256.1.1.1', '1.2.3',
+        '1.2.3.4\n', '1.2.3.4\n\n', '1.2.3.4 ', '10.0.0.1; id', '', '\n',
+        'example.com', 'a.b.com', '-a.com', 'a-.com', 'x' * 63 + '.com', 'x' * 64 + '.com',
+        'a.' + 'b' * 253, 'a.' + 'b' * 252 + '\n', 'a.' + 'b' * 253 + '\n',
+        '١٢٧.0.0.1', 'exämple.com', '$(whoami).com', 'host|id',
+    ]
+
+    def expected(self, hosts):
+        from secure.app import validate_host
+        return [i for i, h in enumerate(hosts) if validate_host(h)]
+
+    def test_edge_cases(self):
+        from secure.app import validate_hosts
+        assert validate_hosts(self.EDGE_CASES) == self.expected(self.EDGE_CASES)
+
+    def test_random_inputs(self):
+        import random
+        from secure.app import validate_hosts
+        rng = random.Random(0)
+        alphabet = '0123456789.-abzAZ\n ;٣'
+        hosts = [''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 12)))
+                 for _ in range(20000)]
+        hosts += ['.'.join(str(rng.randint(0, 300)).zfill(rng.randint(1, 3)) for _ in range(4))
+                  for _ in range(5000)]
+        assert validate_hosts(iter(hosts)) == self.expected(hosts)
+
+
+class TestResultCache:
+    @pytest.fixture
+    def app_module(self, monkeypatch):
+        from secure import app as app_module
+        app_module.app.config['TESTING'] = True
+        app_module.ping_cache.clear()
+        app_module.dns_cache.clear()
+        calls = []
+
+        def fake_ping(host):
+            calls.append(host)
+            time.sleep(0.2)
+            return {'status': 'success', 'stdout': f'pong {host}', 'stderr': ''}
+
+        monkeypatch.setattr(app_module, 'run_ping', fake_ping)
+        app_module.calls = calls
+        yield app_module
+        app_module.ping_cache.clear()
+
+    def test_repeat_is_cached(self, app_module):
+        client = app_module.app.test_client()
+        for _ in range(3):
+            resp = client.post('/ping', data={'host': 'Example.com'})
+            assert resp.get_json()['stdout'] == 'pong Example.com'
+        assert len(app_module.calls) == 1
+        stats = client.get('/cache/stats').get_json()['ping']
+        assert stats['hits'] == 2 and stats['misses'] == 1
+
+    def test_concurrent_requests_coalesced(self, app_module):
+        """동시에 들어온 같은 호스트 요청 50개 → 프로세스 1번"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        def hit(_):
+            return app_module.app.test_client().post('/ping', data={'host': '10.0.0.1'}).get_json()
+
+        with ThreadPoolExecutor(max_workers=50) as pool:
+            results = list(pool.map(hit, range(50)))
+        assert all(r['status'] == 'success' for r in results)
+        assert app_module.calls == ['10.0.0.1']
+
+    def test_errors_not_cached(self, app_module, monkeypatch):
+        def timeout(host):
+            app_module.calls.append(host)
+            raise app_module.subprocess.TimeoutExpired('ping', 10)
+
+        monkeypatch.setattr(app_module, 'run_ping', timeout)
+        client = app_module.app.test_client()
+        for _ in range(2):
+            assert client.post('/ping', data={'host': '10.0.0.2'}).get_json()['status'] == 'error'
+        assert len(app_module.calls) == 2
+
+    def test_coalesced_errors_are_distinct(self):
+        """함께 기다린 요청들은 먼저 온 요청의 예외를 공유하지 않고 각자 새 예외를 받음"""
+        import subprocess
+        from concurrent.futures import ThreadPoolExecutor
+        from secure.result_cache import TTLCache
+        cache = TTLCache(ttl=10, max_entries=10)
+        started = threading.Event()
+
+        def slow_timeout():
+            started.set()
+            time.sleep(0.2)
+            raise subprocess.TimeoutExpired('ping', 10)
+
+        def call(_):
+            try:
+                cache.get_or_compute('k', slow_timeout)
+            except subprocess.TimeoutExpired as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            leader = pool.submit(call, 0)
+            started.wait()
+            waiters = [pool.submit(call, i) for i in range(2)]
+            errors = [leader.result()] + [w.result() for w in waiters]
+        assert cache.stats()['coalesced'] == 2
+        assert len({id(e) for e in errors}) == 3
+        assert all(e.cmd == 'ping' and e.timeout == 10 for e in errors)
+
+    def test_ttl_and_lru(self):
+        from secure.result_cache import TTLCache
+        now = [0.0]
+        cache = TTLCache(ttl=10, max_entries=2, clock=lambda: now[0])
+        cache.get_or_compute('a', lambda: 1)
+        cache.get_or_compute('b', lambda: 2)
+        cache.get_or_compute('a', lambda: 0)  # a를 최근 사용으로
+        cache.get_or_compute('c', lambda: 3)  # b 밀려남
+        assert cache.get_or_compute('b', lambda: 'new') == 'new'
+        assert cache.stats()['evictions'] == 2
+        now[0] = 11  # 만료
+        assert cache.get_or_compute('b', lambda: 'fresh') == 'fresh'
+
+
+class TestPingBatch:
+    @pytest.fixture
+    def app_module(self, monkeypatch):
+        from secure import app as app_module
+        app_module.app.config['TESTING'] = True
+        app_module.ping_cache.clear()
+        state = {'running': 0, 'peak': 0}
+        lock = threading.Lock()
+
+        def fake_ping(host):
+            # 호스트 끝자리 숫자 × 0.1초 동안 실행되는 척
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            time.sleep(int(host.rsplit('.', 1)[-1]) / 10)
+            with lock:
+                state['running'] -= 1
+            return {'status': 'success', 'stdout': f'pong {host}', 'stderr': ''}
+
+        monkeypatch.setattr(app_module, 'run_ping', fake_ping)
+        app_module.state = state
+        yield app_module
+        app_module.ping_cache.clear()
+
+    def lines(self, resp):
+        return [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+
+    def test_streams_in_completion_order(self, app_module):
+        client = app_module.app.test_client()
+        resp = client.post('/ping/batch', json={'hosts': ['10.0.0.3', '10.0.0.1', 'bad;id', '10.0.0.2']})
+        assert resp.mimetype == 'application/x-ndjson'
+        results = self.lines(resp)
+        assert [r['index'] for r in results] == [2, 1, 3, 0]  # 검증 실패가 먼저, 나머지는 끝난 순서
+        assert results[0]['status'] == 'error'
+        assert results[1] == {'index': 1, 'host': '10.0.0.1', 'status': 'success',
+                              'stdout': 'pong 10.0.0.1', 'stderr': ''}
+
+    def test_fanout_limit(self, app_module, monkeypatch):
+        monkeypatch.setattr(app_module, 'PING_BATCH_FANOUT', 2)
+        client = app_module.app.test_client()
+        hosts = [f'10.0.{i}.1' for i in range(6)]
+        results = self.lines(client.post('/ping/batch', json=hosts))
+        assert sorted(r['index'] for r in results) == list(range(6))
+        assert app_module.state['peak'] == 2
+
+    def test_form_input(self, app_module):
+        client = app_module.app.test_client()
+        results = self.lines(client.post('/ping/batch', data={'hosts': '10.0.0.1\n\n10.0.0.2\n'}))
+        assert [r['host'] for r in results] == ['10.0.0.1', '10.0.0.2']
+
+    def test_host_cap(self, app_module, monkeypatch):
+        monkeypatch.setattr(app_module, 'PING_BATCH_MAX_HOSTS', 3)
+        client = app_module.app.test_client()
+        resp = client.post('/ping/batch', json=['10.0.0.1'] * 4)
+        assert resp.status_code == 413
+
+    def test_bad_payload(self, app_module):
+        client = app_module.app.test_client()
+        assert client.post('/ping/batch', json={'hosts': [1, 2]}).status_code == 400
+        assert client.post('/ping/batch', json=[]).status_code == 400
+
+    def test_deadline(self, app_module, monkeypatch):
+        """요청 전체 시간을 넘기면 남은 호스트는 타임아웃으로 응답"""
+        monkeypatch.setattr(app_module, 'PING_BATCH_DEADLINE', 0.3)
+        monkeypatch.setattr(app_module, 'PING_BATCH_FANOUT', 1)
+        client = app_module.app.test_client()
+        results = self.lines(client.post('/ping/batch', json=['10.0.0.1', '10.0.0.9', '10.0.1.9']))
+        assert [r['status'] for r in results] == ['success', 'error', 'error']
+        assert results[2]['message'] == '요청 시간이 초과되었습니다'
+
+
+class StubDNSServer:
+    """127.0.0.1에서 정해진 레코드로만 답하는 테스트용 UDP/TCP DNS 서버
+
+    rcodes의 이름에는 그 rcode로, truncated의 이름에는 UDP로는 잘린(TC) 빈 응답으로 답한다.
+    echo_query이면 응답 전에 받은 질의(QR=0)를 그대로 돌려보낸다.
+    """
+
+    def __init__(self, zone, rcodes=None, truncated=(), echo_query=False):
+        self.zone = zone  # (이름, qtype) -> [(rdata bytes, ttl)]
+        self.rcodes = rcodes or {}
+        self.truncated = set(truncated)
+        self.echo_query = echo_query
+        self.tcp_queries = 0
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.address = self.sock.getsockname()
+        self.tcp = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.tcp.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.tcp.bind(self.address)
+        self.tcp.listen()
+        for target in (self.serve, self.serve_tcp):
+            threading.Thread(target=target, daemon=True).start()
+
+    def reply(self, query, udp):
+        query_id = struct.unpack_from('!H', query)[0]
+        labels, offset = [], 12
+        while query[offset]:
+            labels.append(query[offset + 1:offset + 1 + query[offset]].decode())
+            offset += 1 + query[offset]
+        question = query[12:offset + 5]
+        qtype = struct.unpack_from('!H', query, offset + 1)[0]
+        name = '.'.join(labels)
+        known = any(n == name for n, _ in self.zone)
+        answers = self.zone.get((name, qtype), [])
+        flags = 0x8180 if known else 0x8183  # NXDOMAIN
+        if name in self.rcodes:
+            flags, answers = 0x8180 | self.rcodes[name], []
+        if udp and name in self.truncated:
+            flags, answers = flags | 0x0200, []
+        reply = struct.pack('!HHHHHH', query_id, flags, 1, len(answers), 0, 0) + question
+        for rdata, ttl in answers:
+            # 이름은 질문 영역(offset 12)을 가리키는 압축 포인터
+            reply += struct.pack('!HHHIH', 0xC00C, qtype, 1, ttl, len(rdata)) + rdata
+        return reply
+
+    def serve(self):
+        while True:
+            try:
+                query, client = self.sock.recvfrom(512)
+            except OSError:
+                return
+            if self.echo_query:
+                self.sock.sendto(query, client)
+            self.sock.sendto(self.reply(query, udp=True), client)
+
+    def serve_tcp(self):
+        while True:
+            try:
+                conn, _ = self.tcp.accept()
+            except OSError:
+                return
+            with conn:
+                length = struct.unpack('!H', conn.recv(2))[0]
+                query = conn.recv(length)
+                self.tcp_queries += 1
+                reply = self.reply(query, udp=False)
+                conn.sendall(struct.pack('!H', len(reply)) + reply)
+
+    def close(self):
+        self.sock.close()
+        self.tcp.close()
+
+
+ZONE = {
+    ('lab.example.com', 1): [(socket.inet_aton('192.0.2.10'), 300),
+                             (socket.inet_aton('192.0.2.11'), 300)],
+    ('lab.example.com', 28): [(socket.inet_pton(socket.AF_INET6, '2001:db8::1'), 60)],
+}
+ZONE_RECORDS = [
+    {'type': 'A', 'value': '192.0.2.10', 'ttl': 300},
+    {'type': 'A', 'value': '192.0.2.11', 'ttl': 300},
+    {'type': 'AAAA', 'value': '2001:db8::1', 'ttl': 60},
+]
+
+
+class TestResolvers:
+    @pytest.fixture
+    def dns_server(self):
+        servers = []
+
+        def start(**options):
+            servers.append(StubDNSServer(ZONE, **options))
+            return servers[-1]
+        yield start
+        for server in servers:
+            server.close()
+
+    def test_udp_resolver_records(self, dns_server):
+        from secure.resolvers import UDPResolver
+        result = UDPResolver(server=dns_server().address, timeout=2).resolve('lab.example.com')
+        assert result['records'] == ZONE_RECORDS
+
+    def test_udp_resolver_nxdomain(self, dns_server):
+        from secure.resolvers import ResolveError, UDPResolver
+        with pytest.raises(ResolveError):
+            UDPResolver(server=dns_server().address, timeout=2).resolve('missing.example.com')
+
+    @pytest.mark.parametrize('rcode', [2, 5])  # SERVFAIL, REFUSED
+    def test_udp_resolver_server_error(self, dns_server, rcode):
+        """NXDOMAIN 외의 오류 응답은 '찾을 수 없음'이 아니라 서버 오류"""
+        from secure.resolvers import DNSServerError, UDPResolver
+        server = dns_server(rcodes={'lab.example.com': rcode})
+        with pytest.raises(DNSServerError, match=f'rcode {rcode}'):
+            UDPResolver(server=server.address, timeout=2).resolve('lab.example.com')
+
+    def test_udp_resolver_ignores_queries(self, dns_server):
+        """QR 비트가 없는 패킷(되돌아온 질의)은 응답으로 받지 않음"""
+        from secure.resolvers import UDPResolver
+        server = dns_server(echo_query=True)
+        result = UDPResolver(server=server.address, timeout=2).resolve('lab.example.com')
+        assert result['records'] == ZONE_RECORDS
+
+    def test_udp_resolver_truncated_falls_back_to_tcp(self, dns_server):
+        from secure.resolvers import UDPResolver
+        server = dns_server(truncated={'lab.example.com'})
+        result = UDPResolver(server=server.address, timeout=2).resolve('lab.example.com')
+        assert result['records'] == ZONE_RECORDS
+        assert server.tcp_queries == 2
+
+    def test_udp_resolver_timeout(self):
+        from secure.resolvers import UDPResolver
+        silent = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        silent.bind(('127.0.0.1', 0))
+        try:
+            with pytest.raises(TimeoutError):
+                UDPResolver(server=silent.getsockname(), timeout=0.3).resolve('lab.example.com')
+        finally:
+            silent.close()
+
+    def test_getaddrinfo_resolver(self):
+        from secure.resolvers import GetaddrinfoResolver
+        result = GetaddrinfoResolver(max_workers=1).resolve('localhost')
+        assert any(r['value'] in ('127.0.0.1', '::1') for r in result['records'])
+
+    def test_dns_endpoint_with_udp_backend(self, dns_server, monkeypatch):
+        from secure import app as app_module
+        from secure.resolvers import UDPResolver
+        server = dns_server(rcodes={'broken.example.com': 2})
+        monkeypatch.setattr(app_module, 'resolver', UDPResolver(server=server.address, timeout=2))
+        app_module.dns_cache.clear()
+        client = app_module.app.test_client()
+        data = client.post('/dns', data={'domain': 'lab.example.com'}).get_json()
+        assert data['status'] == 'success'
+        assert data['records'][0] == {'type': 'A', 'value': '192.0.2.10', 'ttl': 300}
+        missing = client.post('/dns', data={'domain': 'missing.example.com'}).get_json()
+        assert missing['message'] == '도메인을 찾을 수 없습니다'
+        broken = client.post('/dns', data={'domain': 'broken.example.com'}).get_json()
+        assert broken['message'] == 'DNS 서버가 응답하지 못했습니다'
+        app_module.dns_cache.clear()
+
+    def test_get_resolver_backends(self):
+        from secure.resolvers import get_resolver
+        assert get_resolver('getaddrinfo').name == 'getaddrinfo'
+        assert get_resolver('subprocess').name == 'subprocess'
+        with pytest.raises(ValueError):
+            get_resolver('bogus')
+
+
+def call_asgi(app, method, path, body=b''):
+    """ASGI 앱 호출 코루틴과 응답 메시지를 담을 리스트 반환"""
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': method, 'path': path, 'headers': []}
+    return app(scope, receive, send), sent
+
+
+def asgi_request(app, method, path, body=b''):
+    """요청 하나를 실행하고 (status, body) 반환"""
+    coro, sent = call_asgi(app, method, path, body)
+    asyncio.run(coro)
+    status = sent[0]['status']
+    return status, b''.join(m.get('body', b'') for m in sent[1:])
+
+
+class TestSecureAsyncApp:
+    @pytest.fixture
+    def async_app(self):
+        from secure import async_app
+        return async_app
+
+    @pytest.fixture
+    def sleep_command(self, async_app, monkeypatch):
+        """ping 대신 지정한 시간만큼 자는 파이썬 프로세스 실행"""
+        def use(seconds):
+            monkeypatch.setattr(async_app, 'ping_command', lambda host: [
+                sys.executable, '-c', f'import time; time.sleep({seconds}); print("pong")'
+            ])
+        return use
+
+    def test_index(self, async_app):
+        status, _ = asgi_request(async_app.app, 'GET', '/')
+        assert status == 200
+
+    def test_injection_blocked(self, async_app):
+        """보안: 동기 버전과 같은 화이트리스트 검증"""
+        status, body = asgi_request(async_app.app, 'POST', '/ping', b'host=127.0.0.1%3B+echo+test')
+        assert status == 200
+        assert json.loads(body)['status'] == 'error'
+
+    def test_dns_injection_blocked(self, async_app):
+        status, body = asgi_request(async_app.app, 'POST', '/dns', b'domain=example.com%26%26id')
+        assert json.loads(body)['status'] == 'error'
+
+    def test_ping_runs_process(self, async_app, sleep_command):
+        sleep_command(0)
+        status, body = asgi_request(async_app.app, 'POST', '/ping', b'host=127.0.0.1')
+        data = json.loads(body)
+        assert data['status'] == 'success'
+        assert 'pong' in data['stdout']
+
+    def test_deadline_kills_process(self, async_app, sleep_command, monkeypatch):
+        """데드라인을 넘기면 타임아웃 응답 (프로세스는 종료됨)"""
+        sleep_command(30)
+        monkeypatch.setattr(async_app, 'REQUEST_DEADLINE', 0.5)
+        started = time.monotonic()
+        status, body = asgi_request(async_app.app, 'POST', '/ping', b'host=127.0.0.1')
+        assert json.loads(body)['message'] == '요청 시간이 초과되었습니다'
+        assert time.monotonic() - started < 5
+
+    def test_semaphore_limits_processes(self, async_app, sleep_command, monkeypatch):
+        """동시 프로세스 수가 MAX_PROCESSES로 제한됨"""
+        sleep_command(0.5)
+        monkeypatch.setattr(async_app, 'MAX_PROCESSES', 2)
+
+        async def burst():
+            coros = []
+            for _ in range(4):
+                coro, _sent = call_asgi(async_app.app, 'POST', '/ping', b'host=127.0.0.1')
+                coros.append(coro)
+            started = time.monotonic()
+            await asyncio.gather(*coros)
+            return time.monotonic() - started
+
+        # 4개 요청을 2개씩 두 번에 나눠 실행 → 최소 1초
+        assert asyncio.run(burst()) >= 0.9
+
+    def test_timeouts_release_slots(self, async_app, sleep_command, monkeypatch):
+        """슬롯 대기/실행 중 타임아웃이 나도 세마포어 슬롯이 모두 돌아옴"""
+        sleep_command(30)
+        monkeypatch.setattr(async_app, 'MAX_PROCESSES', 1)
+
+        async def burst():
+            loop = asyncio.get_running_loop()
+            for timeout in (0, 0.001, 0.01, 0.2):
+                results = await asyncio.gather(*[
+                    async_app.run_command(async_app.ping_command('x'), loop.time() + timeout)
+                    for _ in range(3)
+                ], return_exceptions=True)
+                assert all(isinstance(r, TimeoutError) for r in results)
+            return async_app._process_slots().locked()
+
+        assert asyncio.run(burst()) is False
+
+    def test_body_too_large(self, async_app):
+        status, _ = asgi_request(async_app.app, 'POST', '/ping', b'host=' + b'a' * 70000)
+        assert status == 413
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -2,17 +2,39 @@
 SQL Injection 방어 실습 - 안전한 코드
 Parameterized Query와 ORM을 사용한 안전한 구현
 """
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import column, event, func, select, table, text
+from werkzeug.security import generate_password_hash
+import click
+import json
+import os
 import re
+import time
+
+try:
+    from .password_verifier import PasswordVerifier, VerifierOverloaded
+    from .seeding import PasswordHasher, generate_users
+except ImportError:
+    from password_verifier import PasswordVerifier, VerifierOverloaded
+    from seeding import PasswordHasher, generate_users
 
 app = Flask(__name__)
 app.json.ensure_ascii = False
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///users_secure.db"
+app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///users_secure.db")
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 db = SQLAlchemy(app)
 
+# 새로 저장하는 비밀번호의 해시 방식 (werkzeug 형식, 예: "pbkdf2:sha256:600000")
+# 기존 해시는 저장된 파라미터 그대로 검증되므로 배포마다 비용을 바꿔도 로그인은 유지됨
+PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+# 비밀번호 검증 전용 스레드 수 / 대기열 길이 / 결과 대기 시간(초)
+password_verifier = PasswordVerifier(
+    workers=int(os.environ.get("PASSWORD_VERIFY_WORKERS", str(os.cpu_count() or 4))),
+    max_queue=int(os.environ.get("PASSWORD_VERIFY_QUEUE", "16")),
+    timeout=float(os.environ.get("PASSWORD_VERIFY_TIMEOUT", "5")),
+)
+
 
 class User(db.Model):
     """SQLAlchemy ORM 모델"""
@@ -23,16 +45,65 @@ class User(db.Model):
     role = db.Column(db.String(20), default="user")
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(password, method=PASSWORD_HASH_METHOD)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        """검증 스레드 풀에서 해시 비교 (과부하면 VerifierOverloaded)"""
+        return password_verifier.verify(self.password_hash, password)
+
+
+# 사용자명 부분 문자열 검색용 FTS5 trigram 인덱스 (SQLite 전용)
+# user 테이블의 내용을 참조하는 external content 테이블이며, 트리거로 항상 동기화
+SEARCH_INDEX_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS user_search USING fts5(
+        username, content='user', content_rowid='id', tokenize='trigram')""",
+    """CREATE TRIGGER IF NOT EXISTS user_search_ai AFTER INSERT ON "user" BEGIN
+        INSERT INTO user_search(rowid, username) VALUES (new.id, new.username);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS user_search_ad AFTER DELETE ON "user" BEGIN
+        INSERT INTO user_search(user_search, rowid, username) VALUES ('delete', old.id, old.username);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS user_search_au AFTER UPDATE OF username ON "user" BEGIN
+        INSERT INTO user_search(user_search, rowid, username) VALUES ('delete', old.id, old.username);
+        INSERT INTO user_search(rowid, username) VALUES (new.id, new.username);
+    END""",
+]
+# FTS5 테이블을 Core 쿼리에서 쓰기 위한 최소 정의 (rowid = user.id)
+user_search = table("user_search", column("rowid"))
+SEARCH_DEFAULT_LIMIT = 50
+SEARCH_MAX_LIMIT = 1000
+SEARCH_FETCH_SIZE = 100  # 응답을 스트리밍하며 DB에서 한 번에 가져올 행 수
+
+
+@event.listens_for(User.__table__, "after_create")
+def create_search_index(target, connection, **kw):
+    """user 테이블이 생길 때 검색 인덱스와 동기화 트리거도 생성"""
+    if connection.dialect.name != "sqlite":
+        return
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'user_search'"
+    ).first()
+    for ddl in SEARCH_INDEX_DDL:
+        connection.exec_driver_sql(ddl)
+    if not exists:
+        # 인덱스보다 먼저 있던 사용자도 색인
+        connection.exec_driver_sql("INSERT INTO user_search(user_search) VALUES ('rebuild')")
+
+
+@event.listens_for(User.__table__, "after_drop")
+def drop_search_index(target, connection, **kw):
+    """user 테이블을 지우면 검색 인덱스도 삭제 (트리거는 테이블과 함께 삭제됨)"""
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("DROP TABLE IF EXISTS user_search")
 
 
 def init_db():
     """데이터베이스 초기화"""
     with app.app_context():
         db.create_all()
+        # create_all()은 이미 있는 테이블을 건너뛰므로, 인덱스 도입 전의 DB에도 만들어 줌
+        with db.engine.begin() as conn:
+            create_search_index(User.__table__, conn)
         if not User.query.filter_by(username="admin").first():
             admin = User(username="admin", email="admin@example.com", role="admin")
             admin.set_password("admin123")
@@ -49,6 +120,87 @@ def init_db():
             db.session.commit()
 
 
+def seed_users(count: int, seed: int = 0, password: str = "password123",
+               unique_passwords: bool = False, workers: int = 0, batch_size: int = 10000,
+               hash_method: str = None, progress=None) -> dict:
+    """부하 테스트용 사용자 count명을 한 트랜잭션에 executemany로 추가 (실패하면 모두 롤백)
+
+    기본은 모든 계정이 password의 해시 하나를 같이 쓰고(해시 1번 계산),
+    unique_passwords면 계정마다 generate_users()의 비밀번호를 프로세스 풀(workers)에서 해시.
+    """
+    method = hash_method or PASSWORD_HASH_METHOD
+    users = User.__table__
+    start = db.session.execute(select(func.max(users.c.id))).scalar() or 0
+    shared_hash = None if unique_passwords else generate_password_hash(password, method=method)
+    hash_seconds = 0.0
+    inserted = 0
+    started = time.monotonic()
+    rows = generate_users(count, seed, start)
+    conn = db.session.connection()
+    sqlite = conn.dialect.name == "sqlite"
+    try:
+        if sqlite:
+            # 행마다 트리거로 색인하지 않고, 다 넣은 뒤 새 행만 한 번에 색인 (같은 트랜잭션)
+            # pysqlite는 DDL 앞에 BEGIN을 넣지 않아 DROP TRIGGER가 바로 커밋되므로
+            # SAVEPOINT로 트랜잭션을 먼저 열어 둠 (commit/rollback이 함께 끝냄)
+            conn.exec_driver_sql("SAVEPOINT seed_users")
+            conn.exec_driver_sql("DROP TRIGGER IF EXISTS user_search_ai")
+        with PasswordHasher(method, workers if unique_passwords else 0) as hasher:
+            while inserted < count:
+                batch = [next(rows) for _ in range(min(batch_size, count - inserted))]
+                t = time.monotonic()
+                hashes = hasher.hash_all([r.pop("password") for r in batch]) if unique_passwords \
+                    else [shared_hash] * len(batch)
+                hash_seconds += time.monotonic() - t
+                for row, pwhash in zip(batch, hashes):
+                    row["password_hash"] = pwhash
+                # Core insert + 파라미터 목록 → executemany (ORM 객체를 만들지 않음)
+                conn.execute(users.insert(), batch)
+                inserted += len(batch)
+                if progress:
+                    progress(inserted, time.monotonic() - started)
+        if sqlite:
+            conn.exec_driver_sql(
+                "INSERT INTO user_search(rowid, username) SELECT id, username FROM \"user\" WHERE id > ?",
+                (start,))
+            for ddl in SEARCH_INDEX_DDL:
+                conn.exec_driver_sql(ddl)
+        db.session.commit()
+    except BaseException:
+        db.session.rollback()
+        raise
+    elapsed = time.monotonic() - started
+    return {
+        "inserted": inserted,
+        "seconds": round(elapsed, 3),
+        "hash_seconds": round(hash_seconds, 3),
+        "rows_per_sec": round(inserted / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+@app.cli.command("seed-users")
+@click.option("--count", default=1000, show_default=True, help="Number of users to add.")
+@click.option("--seed", default=0, show_default=True, help="Random seed for reproducible data.")
+@click.option("--password", default="password123", show_default=True,
+              help="Shared password of the synthetic accounts (hashed once).")
+@click.option("--unique-passwords", is_flag=True,
+              help="Give every user its own seeded password, hashed in a process pool.")
+@click.option("--workers", default=os.cpu_count() or 1, show_default=True,
+              help="Hashing processes for --unique-passwords.")
+@click.option("--batch-size", default=10000, show_default=True, help="Rows per executemany.")
+@click.option("--hash-method", default=None, help="werkzeug hash method (default: PASSWORD_HASH_METHOD).")
+def seed_users_command(count, seed, password, unique_passwords, workers, batch_size, hash_method):
+    """Bulk-insert synthetic users for load tests."""
+    init_db()
+
+    def progress(done, elapsed):
+        click.echo(f"{done}/{count} users, {done / elapsed:.0f} rows/s", err=True)
+
+    result = seed_users(count, seed, password, unique_passwords, workers, batch_size,
+                        hash_method, progress)
+    click.echo(json.dumps(result))
+
+
 def validate_username(username: str) -> bool:
     """사용자명 유효성 검사 (화이트리스트)"""
     if not username or len(username) > 50:
@@ -79,6 +231,7 @@ def index():
         <li>입력값 화이트리스트 검증</li>
         <li>비밀번호 해시 저장 (werkzeug)</li>
         <li>에러 메시지에서 쿼리 정보 제거</li>
+        <li>검색은 trigram 인덱스 + 결과 수 제한 (전체 테이블 스캔 방지)</li>
     </ul>
     """
 
@@ -99,8 +252,16 @@ def login():
     # 2. ORM을 사용한 안전한 쿼리 (Parameterized Query 자동 적용)
     user = User.query.filter_by(username=username).first()
 
-    # 3. 비밀번호 해시 검증
-    if user and user.check_password(password):
+    # 3. 비밀번호 해시 검증 (전용 스레드 풀, 가득 차면 바로 503)
+    try:
+        verified = bool(user) and user.check_password(password)
+    except VerifierOverloaded:
+        return jsonify({
+            "status": "error",
+            "message": "로그인 요청이 많습니다. 잠시 후 다시 시도하세요"
+        }), 503, {"Retry-After": "1"}
+
+    if verified:
         return jsonify({
             "status": "success",
             "message": f"로그인 성공! 환영합니다, {user.username}님",
@@ -111,26 +272,84 @@ def login():
         return jsonify({"status": "error", "message": "사용자명 또는 비밀번호가 올바르지 않습니다"})
 
 
+@app.route("/login/stats")
+def login_stats():
+    """비밀번호 검증 풀 상태: 대기열 길이, 검증 / 대기 시간, 거부 수"""
+    return jsonify(password_verifier.stats())
+
+
 @app.route("/search")
 def search():
-    """안전한 검색: ORM + 입력값 검증"""
+    """안전한 검색: 입력값 검증 + trigram 인덱스 + keyset 페이지네이션
+
+    ?q=검색어&limit=개수&after_id=이전 응답의 next_cursor (cursor도 허용)
+    필요한 열만 Core select로 읽어 JSON을 행 단위로 스트리밍한다.
+    """
     query_param = request.args.get("q", "")
 
     # 1. 입력값 검증 (길이 제한)
     if len(query_param) > 50:
         return jsonify({"status": "error", "message": "검색어가 너무 깁니다"})
+    try:
+        limit = int(request.args.get("limit", SEARCH_DEFAULT_LIMIT))
+        after_id = int(request.args.get("after_id", request.args.get("cursor", 0)))
+    except ValueError:
+        return jsonify({"status": "error", "message": "limit과 after_id는 숫자여야 합니다"}), 400
+    limit = max(1, min(limit, SEARCH_MAX_LIMIT))
 
     # 2. 특수문자 제거 (또는 이스케이프)
     # ORM이 자동으로 이스케이프하지만, 추가 검증
     safe_query = re.sub(r"[^\w\s]", "", query_param)
 
-    # 3. ORM을 사용한 안전한 LIKE 쿼리
-    users = User.query.filter(User.username.ilike(f"%{safe_query}%")).all()
+    # 3. 인덱스 검색 (바인딩 파라미터만 사용)
+    rows = db.session.execute(search_statement(safe_query, limit, after_id),
+                              execution_options={"yield_per": SEARCH_FETCH_SIZE})
+    return Response(stream_with_context(_search_json(rows, limit)), mimetype="application/json")
+
+
+def _search_json(rows, limit: int):
+    """{"status", "results": [...], "next_cursor"}를 행마다 조금씩 생성"""
+    yield '{"status": "success", "results": ['
+    count, last_id = 0, None
+    for row in rows:
+        yield ("," if count else "") + json.dumps(
+            {"id": row.id, "username": row.username, "email": row.email}, ensure_ascii=False)
+        count, last_id = count + 1, row.id
+    yield '], "next_cursor": %s}' % json.dumps(last_id if count == limit else None)
+
+
+def search_statement(safe_query: str, limit: int, after_id: int = 0):
+    """username에 safe_query가 들어 있는 사용자 (id, username, email)를 id 순으로
+    after_id 다음부터 limit명 고르는 Core select
+
+    3글자 이상이면 trigram 인덱스로 후보 id만 찾고, 더 짧으면 trigram을 만들 수 없으므로
+    기존 ILIKE 조건으로 id 순서대로 훑다가 limit명을 채우면 멈춘다. ILIKE에서도 FTS5처럼
+    문자열 그대로 찾도록 와일드카드(%, _)는 이스케이프한다.
+    """
+    users = User.__table__
+    stmt = select(users.c.id, users.c.username, users.c.email)
+    if len(safe_query) >= 3 and db.engine.dialect.name == "sqlite":
+        matches = (
+            select(user_search.c.rowid)
+            # 큰따옴표로 감싸 FTS5 문법이 아닌 문자열 그대로 검색
+            .where(text("user_search MATCH :match").bindparams(
+                match='"' + safe_query.replace('"', '""') + '"'))
+            .where(user_search.c.rowid > after_id)
+            .order_by(user_search.c.rowid)
+            .limit(limit)
+        )
+        return stmt.where(users.c.id.in_(matches)).order_by(users.c.id)
+    escaped = re.sub(r"([\\%_])", r"\\\1", safe_query)
+    return (
+        stmt.where(users.c.username.ilike(f"%{escaped}%", escape="\\"), users.c.id > after_id)
+        .order_by(users.c.id)
+        .limit(limit)
+    )
+
 
-    return jsonify({
-        "status": "success",
-        "results": [{"id": u.id, "username": u.username, "email": u.email} for u in users]
-    })
+def search_users(safe_query: str, limit: int, after_id: int = 0) -> list:
+    """search_statement() 결과 행 목록 (id, username, email)"""
+    return db.session.execute(search_statement(safe_query, limit, after_id)).all()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,112 @@
+"""
+비밀번호 해시 검증 전용 스레드 풀
+- scrypt/pbkdf2 검증은 CPU를 오래 쓰므로 요청 스레드 대신 정해진 수의 작업 스레드에서 실행
+- 실행 중 + 대기 중인 검증이 workers + max_queue개를 넘으면 바로 VerifierOverloaded
+  (로그인이 몰려도 요청이 줄줄이 타임아웃되지 않고 빠르게 503으로 응답)
+- 대기열 길이, 검증 시간, 대기 시간 통계는 stats()로 조회
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash
+
+LATENCY_SAMPLES = 1024  # 통계에 쓰는 최근 검증 수
+
+
+class VerifierOverloaded(Exception):
+    """대기열이 가득 찼거나 결과를 기다리다 시간이 초과됨"""
+
+
+def _summary(samples) -> dict:
+    """초 단위 표본 → 밀리초 avg / p50 / p95 / max"""
+    values = sorted(samples)
+    if not values:
+        return {"avg": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+
+    def ms(seconds):
+        return round(seconds * 1e3, 3)
+
+    return {
+        "avg": ms(sum(values) / len(values)),
+        "p50": ms(values[(len(values) - 1) // 2]),
+        "p95": ms(values[min(len(values) - 1, int(len(values) * 0.95))]),
+        "max": ms(values[-1]),
+    }
+
+
+class PasswordVerifier:
+    """check_password_hash()를 제한된 스레드 풀에서 실행"""
+
+    def __init__(self, workers: int, max_queue: int, timeout: float, check=check_password_hash):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._check = check
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwverify")
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._running = 0
+        self._verified = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._latency = deque(maxlen=LATENCY_SAMPLES)
+        self._queue_wait = deque(maxlen=LATENCY_SAMPLES)
+
+    def verify(self, pwhash: str, password: str) -> bool:
+        """해시 검증 결과, 과부하 / 시간 초과면 VerifierOverloaded"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise VerifierOverloaded("Password verification queue is full")
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = self._pool.submit(self._run, pwhash, password, time.monotonic())
+        except BaseException:
+            self._release()
+            raise
+        # 취소되어 실행되지 않은 작업도 자리를 반납하도록 완료 콜백에서 해제
+        future.add_done_callback(lambda _: self._release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            with self._lock:
+                self._timeouts += 1
+            raise VerifierOverloaded("Password verification timed out") from None
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def _run(self, pwhash: str, password: str, submitted: float) -> bool:
+        started = time.monotonic()
+        with self._lock:
+            self._running += 1
+        try:
+            return self._check(pwhash, password)
+        finally:
+            finished = time.monotonic()
+            with self._lock:
+                self._running -= 1
+                self._verified += 1
+                self._queue_wait.append(started - submitted)
+                self._latency.append(finished - started)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": self._in_flight - self._running,
+                "verified": self._verified,
+                "rejected": self._rejected,
+                "timeouts": self._timeouts,
+                "verify_ms": _summary(self._latency),
+                "queue_wait_ms": _summary(self._queue_wait),
+            }
@@ -0,0 +1,56 @@
+"""
+부하 테스트용 사용자 데이터 생성
+- 같은 seed면 항상 같은 사용자명 / 이메일 / 역할 / 비밀번호 (재현 가능)
+- 비밀번호 해시는 프로세스 풀에서 병렬로 계산 (해시 계산은 CPU를 오래 씀)
+"""
+import random
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from werkzeug.security import generate_password_hash
+
+FIRST_NAMES = ["min", "seo", "ji", "hyun", "jun", "yuna", "alex", "sam", "kim", "lee",
+               "park", "choi", "jung", "kang", "yoon", "lim", "han", "oh", "shin", "song"]
+WORDS = ["dev", "sky", "blue", "cat", "moon", "star", "code", "rain", "tree", "wolf",
+         "fox", "kite", "leaf", "nova", "echo", "byte", "pixel", "river", "stone", "cloud"]
+DOMAINS = ["example.com", "example.org", "mail.example.net", "corp.example.kr"]
+ADMIN_RATIO = 0.001
+
+
+def generate_users(count: int, seed: int = 0, start: int = 0):
+    """사용자 행(dict)을 하나씩 생성: username, email, role, password(평문)
+
+    start는 사용자명 번호의 시작값 (이미 있는 사용자와 겹치지 않게)
+    """
+    rng = random.Random(seed)
+    for n in range(start, start + count):
+        name = f"{rng.choice(FIRST_NAMES)}_{rng.choice(WORDS)}{n}"
+        yield {
+            "username": name,
+            "email": f"{name}@{rng.choice(DOMAINS)}",
+            "role": "admin" if rng.random() < ADMIN_RATIO else "user",
+            "password": "".join(rng.choices("abcdefghijkmnpqrstuvwxyz23456789", k=12)),
+        }
+
+
+class PasswordHasher:
+    """비밀번호 목록 → 해시 목록 (workers가 1 이상이면 프로세스 풀 사용)"""
+
+    def __init__(self, method: str, workers: int = 0):
+        self._hash = partial(generate_password_hash, method=method)
+        self._pool = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+        self.workers = workers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self._pool:
+            self._pool.shutdown()
+        return False
+
+    def hash_all(self, passwords: list) -> list:
+        if self._pool is None:
+            return [self._hash(p) for p in passwords]
+        chunksize = max(1, len(passwords) // (self.workers * 4))
+        return list(self._pool.map(self._hash, passwords, chunksize=chunksize))
@@ -33,6 +33,239 @@ class TestVulnerableApp:
         assert resp.status_code == 200
 
 
+class TestPasswordVerifier:
+    """비밀번호 검증 전용 스레드 풀: 과부하 시 503, 통계, 해시 방식 설정"""
+
+    def blocking_verifier(self, workers=1, max_queue=0, timeout=5):
+        import threading
+        from secure.password_verifier import PasswordVerifier
+        release = threading.Event()
+        verifier = PasswordVerifier(workers, max_queue, timeout,
+                                    check=lambda h, p: release.wait(5) and p == 'ok')
+        return verifier, release
+
+    def test_overload_rejected_fast(self):
+        import threading
+        import time
+        from secure.password_verifier import VerifierOverloaded
+        verifier, release = self.blocking_verifier(workers=1, max_queue=1)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(verifier.verify('h', 'ok')))
+                   for _ in range(2)]
+        for t in threads:
+            t.start()
+        # 하나는 실행 중, 하나는 대기 중이 될 때까지 (제출 직후에는 둘 다 대기 중일 수 있음)
+        while (verifier.stats()['running'], verifier.stats()['queued']) != (1, 1):
+            time.sleep(0.001)
+        start = time.monotonic()
+        with pytest.raises(VerifierOverloaded):
+            verifier.verify('h', 'ok')
+        assert time.monotonic() - start < 0.5
+        stats = verifier.stats()
+        assert (stats['running'], stats['queued'], stats['rejected']) == (1, 1, 1)
+        release.set()
+        for t in threads:
+            t.join()
+        assert results == [True, True]
+        assert verifier.stats()['verified'] == 2
+        assert verifier.verify('h', 'wrong') is False
+
+    def test_timeout_frees_slot(self):
+        import time
+        from secure.password_verifier import VerifierOverloaded
+        verifier, release = self.blocking_verifier(timeout=0.05)
+        with pytest.raises(VerifierOverloaded):
+            verifier.verify('h', 'ok')
+        assert verifier.stats()['timeouts'] == 1
+        release.set()
+        # 시간 초과된 검증이 끝나면 자리가 반납됨
+        while verifier.stats()['running'] or verifier.stats()['queued']:
+            time.sleep(0.001)
+        verifier.timeout = 5
+        assert verifier.verify('h', 'ok') is True
+
+    def test_login_returns_503_when_full(self, monkeypatch):
+        from secure import app as app_module
+        verifier, release = self.blocking_verifier(timeout=0.05)
+        monkeypatch.setattr(app_module, 'password_verifier', verifier)
+        app_module.init_db()
+        resp = app_module.app.test_client().post(
+            '/login', data={'username': 'admin', 'password': 'admin123'})
+        release.set()
+        assert resp.status_code == 503
+        assert resp.headers['Retry-After'] == '1'
+        stats = app_module.app.test_client().get('/login/stats').get_json()
+        assert stats['timeouts'] == 1
+
+    def test_hash_method_configurable(self, monkeypatch):
+        from secure import app as app_module
+        monkeypatch.setattr(app_module, 'PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+        user = app_module.User(username='cost_test', email='c@example.com')
+        user.set_password('s3cret')
+        assert user.password_hash.startswith('pbkdf2:sha256:1000$')
+        assert user.check_password('s3cret') and not user.check_password('nope')
+
+
+@pytest.fixture
+def app_ctx():
+    from secure.app import app, db, init_db
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.drop_all()
+        init_db()
+        yield app, db
+
+
+class TestSeedUsers:
+    """부하 테스트용 대량 사용자 추가"""
+
+    def test_reproducible_and_shared_hash(self, app_ctx):
+        from secure.app import User, init_db, seed_users
+        app, db = app_ctx
+        result = seed_users(50, seed=7, password='load-test', batch_size=20)
+        assert result['inserted'] == 50
+        users = User.query.filter(User.id > 3).order_by(User.id).all()
+        assert len(users) == 50 and len({u.password_hash for u in users}) == 1
+        assert users[0].check_password('load-test')
+        names = [u.username for u in users]
+
+        db.drop_all()
+        init_db()
+        seed_users(50, seed=7, batch_size=50)
+        assert [u.username for u in User.query.filter(User.id > 3).order_by(User.id)] == names
+
+    def test_unique_passwords_in_process_pool(self, app_ctx):
+        from secure.app import User, seed_users
+        from secure.seeding import generate_users
+        seed_users(6, seed=1, unique_passwords=True, workers=2, hash_method='pbkdf2:sha256:1000')
+        expected = list(generate_users(6, seed=1, start=3))
+        for row in expected:
+            user = User.query.filter_by(username=row['username']).one()
+            assert user.password_hash.startswith('pbkdf2:sha256:1000$')
+            assert user.check_password(row['password'])
+
+    def test_seeded_users_are_searchable(self, app_ctx):
+        """트리거 대신 한 번에 색인한 행도 검색되고, 이후 추가분은 다시 트리거로 색인"""
+        from secure.app import User, search_users, seed_users
+        app, db = app_ctx
+        seed_users(30, seed=3)
+        seeded = User.query.filter(User.id > 3).first()
+        assert [r.id for r in search_users(seeded.username, 10)] == [seeded.id]
+        db.session.add(User(username='after_seed', email='a@example.com', password_hash='x'))
+        db.session.commit()
+        assert [r.username for r in search_users('after_se', 10)] == ['after_seed']
+
+    def test_failed_seed_rolls_back(self, app_ctx):
+        """중간에 실패하면 추가한 행과 트리거 삭제가 모두 롤백되어 이후 추가분도 색인됨"""
+        from sqlalchemy.exc import IntegrityError
+        from secure.app import User, search_users, seed_users
+        from secure.seeding import generate_users
+        app, db = app_ctx
+        # 두 번째 묶음(행 4~7)에 들어갈 사용자명을 미리 차지
+        taken = list(generate_users(10, seed=5, start=4))[5]['username']
+        db.session.add(User(username=taken, email='taken@example.com', password_hash='x'))
+        db.session.commit()
+        with pytest.raises(IntegrityError):
+            seed_users(10, seed=5, batch_size=4)
+        assert User.query.count() == 4
+        db.session.add(User(username='zed', email='zed@example.com', password_hash='x'))
+        db.session.commit()
+        assert [r.username for r in search_users('zed', 10)] == ['zed']
+
+    def test_cli(self, app_ctx):
+        app, db = app_ctx
+        result = app.test_cli_runner().invoke(args=['seed-users', '--count', '25', '--seed', '2'])
+        assert result.exit_code == 0, result.output
+        assert '"inserted": 25' in result.output
+
+
+class TestUserSearch:
+    """trigram 인덱스 검색: ILIKE와 같은 결과, 트리거 동기화, 커서 페이지네이션"""
+
+    def add_users(self, db, names):
+        from secure.app import User
+        for name in names:
+            db.session.add(User(username=name, email=f'{name}@example.com', password_hash='x'))
+        db.session.commit()
+
+    def ids(self, resp):
+        return [r['username'] for r in resp.get_json()['results']]
+
+    def test_matches_ilike(self, app_ctx):
+        """검색어 길이(FTS5 / ILIKE 경로)와 관계없이 대소문자 무시 부분 문자열 검색"""
+        from secure.app import User, search_users
+        app, db = app_ctx
+        self.add_users(db, ['Alice_B', 'malice', 'bob_smith', 'Charlie Brown', 'ALICE2'])
+        for q in ['ali', 'LIC', 'b_s', 'rlie B', 'al', 'xyz', '', 'e_', 'a_', '_', 'b_']:
+            expected = [u for u in User.query.order_by(User.id) if q.lower() in u.username.lower()]
+            assert [u.id for u in search_users(q, 200)] == [u.id for u in expected], q
+
+    def test_short_query_underscore_is_literal(self, app_ctx):
+        """ILIKE 경로에서도 _는 와일드카드가 아니라 글자 그대로 (FTS5 경로와 같은 결과)"""
+        from secure.app import search_users
+        app, db = app_ctx
+        self.add_users(db, ['ab', 'a_b', 'a%b'])
+        assert [r.username for r in search_users('a_', 10)] == ['a_b']
+        assert [r.username for r in search_users('a_b', 10)] == ['a_b']
+        assert [r.username for r in search_users('%', 10)] == ['a%b']
+
+    def test_index_follows_updates(self, app_ctx):
+        from secure.app import User
+        app, db = app_ctx
+        self.add_users(db, ['trigram_one'])
+        client = app.test_client()
+        assert self.ids(client.get('/search?q=gram_o')) == ['trigram_one']
+        user = User.query.filter_by(username='trigram_one').one()
+        user.username = 'renamed_one'
+        db.session.commit()
+        assert self.ids(client.get('/search?q=gram_o')) == []
+        assert self.ids(client.get('/search?q=named')) == ['renamed_one']
+        db.session.delete(user)
+        db.session.commit()
+        assert self.ids(client.get('/search?q=named')) == []
+
+    def test_cursor_pagination(self, app_ctx):
+        app, db = app_ctx
+        names = [f'page_user_{i}' for i in range(7)]
+        self.add_users(db, names)
+        client = app.test_client()
+        seen, cursor = [], None
+        while True:
+            url = '/search?q=page_user&limit=3' + (f'&after_id={cursor}' if cursor else '')
+            data = client.get(url).get_json()
+            seen += [r['username'] for r in data['results']]
+            cursor = data['next_cursor']
+            if cursor is None:
+                break
+        assert seen == names
+        assert client.get('/search?q=page&limit=abc').status_code == 400
+
+    def test_streamed_projection(self, app_ctx):
+        """짧은 검색어(ILIKE 경로)도 같은 형식, ORM 객체 없이 필요한 열만 읽음"""
+        from secure.app import search_statement
+        app, db = app_ctx
+        self.add_users(db, ['zq_one', 'zq_two'])
+        resp = app.test_client().get('/search?q=zq&limit=1')
+        assert resp.is_streamed
+        data = resp.get_json()
+        assert [r['username'] for r in data['results']] == ['zq_one']
+        assert set(data['results'][0]) == {'id', 'username', 'email'}
+        after = app.test_client().get(f"/search?q=zq&after_id={data['next_cursor']}").get_json()
+        assert [r['username'] for r in after['results']] == ['zq_two']
+        assert after['next_cursor'] is None
+        columns = [c.name for c in search_statement('zq', 10).selected_columns]
+        assert columns == ['id', 'username', 'email']
+
+    def test_special_characters_removed(self, app_ctx):
+        """FTS5 문법 문자(따옴표, *, 괄호)는 safe_query 단계에서 제거"""
+        app, db = app_ctx
+        self.add_users(db, ['quote_test'])
+        resp = app.test_client().get('/search', query_string={'q': '"quote*(test'})
+        assert resp.get_json()['results'] == []
+        resp = app.test_client().get('/search', query_string={'q': '"quote_*'})
+        assert self.ids(resp) == ['quote_test']
+
+
 class TestSecureApp:
     @pytest.fixture
     def client(self):
@@ -2,33 +2,102 @@
 XSS 방어 실습 - 안전한 코드
 Jinja2 자동 이스케이프 + CSP 헤더
 """
-from flask import Flask, request, render_template_string, make_response
-from markupsafe import escape
-import sqlite3
-import bleach
+from flask import Flask, request, render_template, make_response, jsonify
+from jinja2 import ChoiceLoader, DictLoader, FileSystemBytecodeCache
+from markupsafe import Markup, escape
+import hashlib
+import re
+import threading
+import time
+import os
+
+from labcommon.security_headers import SecurityHeadersMiddleware
+from labcommon.sqlite_pool import SQLitePool
+
+try:
+    from .sanitizer import make_sanitizer
+except ImportError:
+    from sanitizer import make_sanitizer
 
 app = Flask(__name__)
 app.json.ensure_ascii = False
 DB_PATH = "guestbook_secure.db"
+db_pool = SQLitePool(DB_PATH)  # 요청마다 connect/close 하지 않고 재사용
 
-# 허용된 HTML 태그 (Bleach)
+# 허용된 HTML 태그 (속성은 모두 제거)
 ALLOWED_TAGS = ['b', 'i', 'u', 'em', 'strong', 'p', 'br']
-ALLOWED_ATTRS = {}
+# 정화 백엔드: auto(nh3가 있으면 nh3, 없으면 stream) / nh3 / stream / bleach
+# 어느 것을 골라도 결과는 bleach와 같음 (sanitizer.py 참고)
+SANITIZER_BACKEND = os.environ.get("SANITIZER_BACKEND", "auto")
+name_sanitizer = make_sanitizer([], SANITIZER_BACKEND)
+message_sanitizer = make_sanitizer(ALLOWED_TAGS, SANITIZER_BACKEND)
+
+# 렌더링된 방명록 첫 페이지를 재사용하는 시간(초), 0이면 캐시하지 않음
+# /post가 오면 바로 비우며, 다른 프로세스에서 쓴 글은 최대 이 시간만큼 늦게 보임
+PAGE_CACHE_TTL = float(os.environ.get("PAGE_CACHE_TTL", "5"))
+
+# 글 목록: 최신 글부터 (같은 초에 쓴 글은 id 역순)
+# idx_messages_created_at을 거꾸로 훑다가 limit개에서 멈추므로 글이 많아도 정렬하지 않음
+MESSAGES_INDEX_DDL = "CREATE INDEX IF NOT EXISTS idx_messages_created_at ON messages (created_at)"
+LATEST_MESSAGES_SQL = (
+    "SELECT id, name, message, created_at FROM messages "
+    "ORDER BY created_at DESC, id DESC LIMIT ?"
+)
+# keyset 페이지: (created_at, id)가 기준 글보다 작은 글부터 (OFFSET처럼 앞 페이지를 다시 읽지 않음)
+OLDER_MESSAGES_SQL = (
+    "SELECT id, name, message, created_at FROM messages "
+    "WHERE (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT ?"
+)
+MESSAGES_PAGE_SIZE = 20
+MESSAGES_MAX_LIMIT = 100
+
+# 메시지 본문 전문 검색 인덱스 (FTS5 trigram: LIKE '%q%'처럼 부분 문자열로 찾되 3글자 이상)
+# 외부 콘텐츠 테이블이므로 본문은 messages에만 저장되고, 트리거가 인덱스를 동기화
+SEARCH_INDEX_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS message_search USING fts5(
+        message, content='messages', content_rowid='id', tokenize='trigram')""",
+    """CREATE TRIGGER IF NOT EXISTS message_search_ai AFTER INSERT ON messages BEGIN
+        INSERT INTO message_search(rowid, message) VALUES (new.id, new.message);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS message_search_ad AFTER DELETE ON messages BEGIN
+        INSERT INTO message_search(message_search, rowid, message) VALUES ('delete', old.id, old.message);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS message_search_au AFTER UPDATE OF message ON messages BEGIN
+        INSERT INTO message_search(message_search, rowid, message) VALUES ('delete', old.id, old.message);
+        INSERT INTO message_search(rowid, message) VALUES (new.id, new.message);
+    END""",
+]
+SEARCH_PAGE_SIZE = int(os.environ.get("SEARCH_PAGE_SIZE", "20"))
+SEARCH_MAX_PAGE = 50  # OFFSET이 커질수록 느려지므로 페이지 번호 상한
+# snippet()이 일치 부분 앞뒤에 넣는 표시: 저장된 글에는 없는 제어 문자 (정화 시 '?'로 바뀜)
+# 조각을 이스케이프한 뒤 이 표시만 <mark>로 바꿈
+HIGHLIGHT_START, HIGHLIGHT_END = "\x02", "\x03"
+_HIGHLIGHT = re.compile("\x02([^\x02\x03]*)\x03")
 
 
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS messages (
-            id INTEGER PRIMARY KEY,
-            name TEXT,
-            message TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    conn.commit()
-    conn.close()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY,
+                name TEXT,
+                message TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        # 인덱스가 생기기 전의 DB에도 만들어 줌
+        cursor.execute(MESSAGES_INDEX_DDL)
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'message_search'"
+        ).fetchone()
+        for ddl in SEARCH_INDEX_DDL:
+            cursor.execute(ddl)
+        if not exists:
+            # 인덱스보다 먼저 있던 글도 색인
+            cursor.execute("INSERT INTO message_search(message_search) VALUES ('rebuild')")
+        conn.commit()
+    page_cache.clear()
 
 
 # 안전한 템플릿: Jinja2 자동 이스케이프 (기본값)
@@ -51,6 +120,9 @@ TEMPLATE = """
         <p>{{ msg[2] }}</p>  <!-- 자동 이스케이프 -->
         <small>{{ msg[3] }}</small>
     </div>
+    {% if snippets and snippets[msg[0]] %}
+    <p class="snippet">{{ snippets[msg[0]] }}</p>  <!-- 이스케이프 후 일치 부분만 강조한 Markup -->
+    {% endif %}
     {% endfor %}
     <hr>
     <h3>검색</h3>
@@ -59,6 +131,9 @@ TEMPLATE = """
     </form>
     {% if search_query %}
     <p>검색어: {{ search_query }}</p>  <!-- 자동 이스케이프 -->
+    {% if next_page %}
+    <a href="/search?q={{ search_query | urlencode }}&amp;page={{ next_page }}">다음 페이지</a>
+    {% endif %}
     {% endif %}
     <hr>
     <h3>적용된 보안 조치</h3>
@@ -73,25 +148,155 @@ TEMPLATE = """
 """
 
 
-@app.after_request
-def add_security_headers(response):
-    """보안 헤더 추가"""
-    # CSP: 인라인 스크립트 차단
-    response.headers['Content-Security-Policy'] = "default-src 'self'; script-src 'self'"
-    response.headers['X-Content-Type-Options'] = 'nosniff'
-    response.headers['X-Frame-Options'] = 'DENY'
-    response.headers['X-XSS-Protection'] = '1; mode=block'
-    return response
+# 템플릿은 시작할 때 한 번만 컴파일해 두고 요청마다 재사용
+# (render_template_string은 호출할 때마다 소스를 다시 파싱/컴파일함)
+# 이름이 .html이므로 Flask 기본 설정대로 자동 이스케이프가 켜짐
+app.jinja_env.loader = ChoiceLoader([DictLoader({"guestbook.html": TEMPLATE}), app.jinja_env.loader])
+# TEMPLATE_BYTECODE_CACHE=디렉터리: 컴파일된 바이트코드를 저장해 다음 프로세스는 컴파일을 건너뜀
+if os.environ.get("TEMPLATE_BYTECODE_CACHE"):
+    os.makedirs(os.environ["TEMPLATE_BYTECODE_CACHE"], exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(os.environ["TEMPLATE_BYTECODE_CACHE"])
+GUESTBOOK_TEMPLATE = app.jinja_env.get_template("guestbook.html")
+
+
+class PageCache:
+    """렌더링된 페이지 하나 + ETag 보관 (TTL, /post 시 clear)
+
+    clear() 이전에 시작한 렌더링 결과는 저장하지 않아, 글을 쓴 직후 옛 페이지가
+    다시 캐시되는 일이 없음
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entry = None  # (body, etag, 만료 시각)
+        self._generation = 0
+
+    def get(self):
+        entry = self._entry
+        if entry and entry[2] > time.monotonic():
+            return entry[0], entry[1]
+        return None
+
+    def generation(self) -> int:
+        return self._generation
+
+    def put(self, generation: int, body: str, etag: str):
+        with self._lock:
+            if self.ttl > 0 and generation == self._generation:
+                self._entry = (body, etag, time.monotonic() + self.ttl)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entry = None
+
+
+page_cache = PageCache(PAGE_CACHE_TTL)
+
+# 보안 헤더: 응답마다 after_request에서 하나씩 대입하지 않고 WSGI 미들웨어가 미리 만든 목록을 한 번에 추가
+SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "X-XSS-Protection": "1; mode=block",
+}
+# CSP: 인라인 스크립트 차단
+# (첫 페이지는 캐시해 재사용하므로 요청마다 바뀌는 nonce는 쓰지 않음)
+CONTENT_SECURITY_POLICY = "default-src 'self'; script-src 'self'"
+# JSON API는 문서로 렌더링될 일이 없으므로 아무것도 허용하지 않음
+CSP_ROUTES = {"/messages": "default-src 'none'; frame-ancestors 'none'"}
+app.wsgi_app = SecurityHeadersMiddleware(app.wsgi_app, SECURITY_HEADERS,
+                                         csp=CONTENT_SECURITY_POLICY, csp_routes=CSP_ROUTES)
+
+
+def fetch_messages(sql: str, params=()) -> list:
+    """(id, name, message, created_at, ...) 목록"""
+    with db_pool.connection() as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+def list_messages(limit: int, before: int = None) -> list:
+    """최신 글부터 limit개, before가 있으면 그 글보다 오래된 글부터 (before 글이 없으면 KeyError)"""
+    if before is None:
+        return fetch_messages(LATEST_MESSAGES_SQL, (limit,))
+    with db_pool.connection() as conn:
+        anchor = conn.execute("SELECT created_at, id FROM messages WHERE id = ?", (before,)).fetchone()
+    if anchor is None:
+        raise KeyError(before)
+    return fetch_messages(OLDER_MESSAGES_SQL, (*anchor, limit))
+
+
+def highlight(snippet: str) -> Markup:
+    """snippet() 결과를 이스케이프하고 일치 표시만 <mark>로 바꿈 (글 내용은 HTML로 해석하지 않음)"""
+    marked = _HIGHLIGHT.sub(r"<mark>\1</mark>", str(escape(snippet)))
+    return Markup(marked.replace(HIGHLIGHT_START, "").replace(HIGHLIGHT_END, ""))
+
+
+def search_messages(query: str, page: int = 1, page_size: int = None) -> tuple:
+    """query가 들어 있는 글 한 페이지 → (글 목록, {id: 하이라이트 조각}, 다음 페이지가 있는지)
+
+    3글자 이상이면 FTS5 MATCH + bm25 순위 + snippet(), 더 짧으면 트라이그램으로
+    찾을 수 없으므로 LIKE로 최신 글부터 (조각 없음)
+    """
+    page_size = page_size or SEARCH_PAGE_SIZE
+    offset = (page - 1) * page_size
+    if len(query) >= 3:
+        rows = fetch_messages(
+            "SELECT m.id, m.name, m.message, m.created_at, "
+            "snippet(message_search, 0, ?, ?, '…', 64) "
+            "FROM message_search JOIN messages m ON m.id = message_search.rowid "
+            "WHERE message_search MATCH ? ORDER BY rank LIMIT ? OFFSET ?",
+            # 큰따옴표로 감싼 구문 하나로 검색 (FTS5 연산자 / 열 필터로 해석되지 않음)
+            (HIGHLIGHT_START, HIGHLIGHT_END, '"' + query.replace('"', '""') + '"',
+             page_size + 1, offset),
+        )
+    else:
+        rows = fetch_messages(
+            "SELECT id, name, message, created_at, NULL FROM messages "
+            "WHERE message LIKE ? ORDER BY id DESC LIMIT ? OFFSET ?",
+            (f"%{query}%", page_size + 1, offset),
+        )
+    snippets = {row[0]: highlight(row[4]) for row in rows[:page_size] if row[4]}
+    return [row[:4] for row in rows[:page_size]], snippets, len(rows) > page_size
 
 
 @app.route("/")
 def index():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM messages ORDER BY created_at DESC LIMIT 20")
-    messages = cursor.fetchall()
-    conn.close()
-    return render_template_string(TEMPLATE, messages=messages, search_query=None)
+    """첫 페이지: 캐시가 있으면 SQLite / Jinja 없이 응답, If-None-Match가 맞으면 304"""
+    cached = page_cache.get()
+    if cached is None:
+        generation = page_cache.generation()
+        messages = list_messages(MESSAGES_PAGE_SIZE)
+        body = render_template(GUESTBOOK_TEMPLATE, messages=messages, search_query=None)
+        etag = hashlib.blake2b(body.encode(), digest_size=16).hexdigest()
+        page_cache.put(generation, body, etag)
+    else:
+        body, etag = cached
+    response = make_response(body)
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+
+@app.route("/messages")
+def messages_api():
+    """최신 글부터 JSON 목록, 다음 페이지는 ?before=<next_before>"""
+    try:
+        limit = int(request.args.get("limit", MESSAGES_PAGE_SIZE))
+        before = int(request.args["before"]) if "before" in request.args else None
+    except ValueError:
+        return jsonify({"status": "error", "message": "limit과 before는 숫자여야 합니다"}), 400
+    limit = max(1, min(limit, MESSAGES_MAX_LIMIT))
+    try:
+        rows = list_messages(limit + 1, before)  # 하나 더 읽어 다음 페이지가 있는지 확인
+    except KeyError:
+        return jsonify({"status": "error", "message": "없는 글입니다"}), 404
+    page = rows[:limit]
+    return jsonify({
+        "status": "success",
+        # message는 정화된 HTML 문자열이므로 화면에 넣을 때는 이스케이프해야 함
+        "messages": [{"id": r[0], "name": r[1], "message": r[2], "created_at": r[3]} for r in page],
+        "next_before": page[-1][0] if len(rows) > limit else None,
+    })
 
 
 @app.route("/post", methods=["POST"])
@@ -99,16 +304,16 @@ def post():
     name = request.form.get("name", "Anonymous")[:50]  # 길이 제한
     message = request.form.get("message", "")[:500]
 
-    # Bleach로 위험한 HTML 제거
-    clean_name = bleach.clean(name, tags=[], strip=True)
-    clean_message = bleach.clean(message, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRS, strip=True)
+    # 위험한 HTML 제거 (이름은 태그 전부, 메시지는 허용 태그 외 전부)
+    clean_name = name_sanitizer.clean(name)
+    clean_message = message_sanitizer.clean(message)
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO messages (name, message) VALUES (?, ?)",
-                   (clean_name, clean_message))
-    conn.commit()
-    conn.close()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO messages (name, message) VALUES (?, ?)",
+                       (clean_name, clean_message))
+        conn.commit()
+    page_cache.clear()
 
     # 안전한 리다이렉트
     return '<meta http-equiv="refresh" content="0;url=/">'
@@ -117,14 +322,13 @@ def post():
 @app.route("/search")
 def search():
     query = request.args.get("q", "")[:100]  # 길이 제한
+    page = request.args.get("page", 1, type=int)
+    page = min(max(page, 1), SEARCH_MAX_PAGE)
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM messages WHERE message LIKE ?", (f"%{query}%",))
-    messages = cursor.fetchall()
-    conn.close()
-
-    return render_template_string(TEMPLATE, messages=messages, search_query=query)
+    messages, snippets, has_next = search_messages(query, page)
+    next_page = page + 1 if has_next and page < SEARCH_MAX_PAGE else None
+    return render_template(GUESTBOOK_TEMPLATE, messages=messages, search_query=query,
+                           snippets=snippets, next_page=next_page)
 
 
 if __name__ == "__main__":
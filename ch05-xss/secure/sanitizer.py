@@ -0,0 +1,173 @@
+"""
+허용 태그 목록으로 HTML 정화 (bleach clean(strip=True)와 같은 결과)
+- bleach: html5lib 토크나이저 + 트리 빌더로 정화 (기준 구현, 느림)
+- nh3: Rust(ammonia) 확장 모듈 (설치되어 있으면)
+- stream: 입력을 한 번 훑으며 태그를 처리하는 순수 파이썬 토크나이저
+- nh3 / stream은 bleach와 결과가 같다고 확인된 입력(흔한 글)만 직접 처리하고,
+  주석 / 엔티티 / 제어 문자 / 짝이 맞지 않는 태그처럼 bleach 고유 동작이 있는 입력은 bleach에 맡김
+  (differential 테스트가 두 결과가 같은지 확인)
+
+허용 태그의 속성은 모두 제거한다 (ALLOWED_ATTRS = {}).
+"""
+import re
+import threading
+from html import escape
+
+from bleach.sanitizer import Cleaner
+
+try:
+    import nh3
+except ImportError:
+    nh3 = None
+
+# bleach가 지울 때 앞에 줄바꿈을 넣는 블록 태그 (bleach.html5lib_shim.HTML_TAGS_BLOCK_LEVEL)
+BLOCK_LEVEL_TAGS = frozenset((
+    "address", "article", "aside", "blockquote", "details", "dialog", "dd", "div", "dl", "dt",
+    "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6",
+    "header", "hgroup", "hr", "li", "main", "nav", "ol", "p", "pre", "section", "table", "ul",
+))
+VOID_TAGS = frozenset(("br",))
+
+# 빠른 경로로 처리하지 않는 입력
+# - html5lib가 바꾸거나 bleach가 '?'로 바꾸는 제어 문자 / 비문자 (\t \n은 허용)
+# - 엔티티일 수 있는 & (bleach는 올바른 엔티티만 그대로 둠)
+# - 주석, <!DOCTYPE>, <?...>
+_NONCHARACTERS = "".join(chr(plane * 0x10000 + low) for plane in range(1, 17) for low in (0xFFFE, 0xFFFF))
+_UNSUPPORTED = (
+    "[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f\ud800-\udfff\ufdd0-\ufdef\ufffe\uffff"
+    + _NONCHARACTERS + "]|&[#A-Za-z0-9]|<[!?]"
+)
+_WS = "[ \t\n]"
+# 속성 값에 < 가 없고 끝까지 닫힌, 모양이 올바른 태그만 (나머지는 bleach에 맡김)
+_ATTRS = (rf"(?:{_WS}+[^ \t\n\"'<>/=]+(?:{_WS}*={_WS}*"
+          rf"(?:\"[^\"<]*\"|'[^'<]*'|[^ \t\n\"'=<>`]+))?)*")
+_TAG = re.compile(rf"<(/?)([A-Za-z][A-Za-z0-9]*)({_ATTRS}){_WS}*(/?)>")
+_UNSUPPORTED_RE = re.compile(_UNSUPPORTED)
+_LT = re.compile(r"<(?=[A-Za-z/])")
+
+
+def _normalize_newlines(text: str) -> str:
+    """html5lib처럼 \\r\\n, \\r → \\n"""
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+class BleachSanitizer:
+    """bleach Cleaner (스레드 간에 공유할 수 없으므로 스레드마다 하나씩 만들어 재사용)"""
+
+    backend = "bleach"
+
+    def __init__(self, tags):
+        self.tags = list(tags)
+        self._local = threading.local()
+
+    def clean(self, text: str) -> str:
+        cleaner = getattr(self._local, "cleaner", None)
+        if cleaner is None:
+            cleaner = self._local.cleaner = Cleaner(tags=self.tags, attributes={}, strip=True)
+        return cleaner.clean(text)
+
+
+class StreamSanitizer:
+    """한 번 훑기 순수 파이썬 정화기, 처리할 수 없는 입력은 bleach로"""
+
+    backend = "stream"
+
+    def __init__(self, tags, fallback: BleachSanitizer = None):
+        self.tags = frozenset(tag.lower() for tag in tags)
+        self.fallback = fallback or BleachSanitizer(tags)
+
+    def clean(self, text: str) -> str:
+        result = self.try_clean(text)
+        return self.fallback.clean(text) if result is None else result
+
+    def try_clean(self, text: str):
+        """빠른 경로로 처리할 수 있으면 정화 결과, 아니면 None
+
+        bleach는 허용하지 않는 태그를 토크나이저 단계에서 지우고 허용 태그만
+        트리 빌더에 넘긴다. 여기서는 허용 태그가 올바르게 중첩된 경우만 처리하므로
+        트리 빌더가 고칠 것이 없고, 끝까지 열려 있는 태그만 순서대로 닫으면 된다.
+        """
+        text = _normalize_newlines(text)
+        if _UNSUPPORTED_RE.search(text):
+            return None
+        out = []
+        stack = []
+        pos = 0
+        for lt in _LT.finditer(text):
+            start = lt.start()
+            tag = _TAG.match(text, start)
+            if tag is None:
+                return None
+            if start > pos:
+                out.append(escape(text[pos:start], quote=False))
+            pos = tag.end()
+            closing, name = tag.group(1), tag.group(2).lower()
+            if name not in self.tags:
+                if not closing and name in BLOCK_LEVEL_TAGS:
+                    return None  # bleach는 앞에 태그가 있었는지에 따라 줄바꿈을 넣음
+                continue
+            if name in VOID_TAGS:
+                if closing:
+                    return None  # </br>은 <br>로 취급됨
+                out.append(f"<{name}>")
+            elif closing:
+                if not stack or stack[-1] != name:
+                    return None  # 짝이 맞지 않는 닫는 태그: 트리 빌더가 고침
+                stack.pop()
+                out.append(f"</{name}>")
+            else:
+                if name == "p" and "p" in stack:
+                    return None  # <p> 안의 <p>는 앞 문단을 닫음
+                stack.append(name)
+                out.append(f"<{name}>")
+        if pos < len(text):
+            out.append(escape(text[pos:], quote=False))
+        out.extend(f"</{name}>" for name in reversed(stack))
+        return "".join(out)
+
+
+class NH3Sanitizer:
+    """nh3(ammonia)로 정화, 허용 태그 외의 태그가 있는 입력 등은 StreamSanitizer로
+
+    ammonia는 허용하지 않는 태그도 트리에 넣었다가 지우므로 (bleach는 토크나이저에서 지움)
+    허용 태그만 있고 모양이 올바른 입력만 넘긴다. 짝이 맞지 않는 허용 태그는 두 구현 모두
+    HTML5 트리 생성 규칙대로 고치므로 결과가 같다.
+    """
+
+    backend = "nh3"
+
+    def __init__(self, tags, fallback=None):
+        if nh3 is None:
+            raise ValueError("nh3 is not installed")
+        self.tags = frozenset(tag.lower() for tag in tags)
+        self.fallback = fallback or StreamSanitizer(tags)
+        # 허용 태그가 아닌 <태그 / </...가 하나라도 있으면 빠른 경로에서 제외
+        allowed = "|".join(sorted(self.tags))
+        tag = rf"(?!/?(?:{allowed})(?![A-Za-z0-9]){_ATTRS}{_WS}*/?>)" if allowed else ""
+        self._unsupported = re.compile(rf"{_UNSUPPORTED}|<{tag}[A-Za-z/]", re.IGNORECASE)
+
+    def clean(self, text: str) -> str:
+        result = self.try_clean(text)
+        return self.fallback.clean(text) if result is None else result
+
+    def try_clean(self, text: str):
+        """빠른 경로로 처리할 수 있으면 정화 결과, 아니면 None"""
+        text = _normalize_newlines(text)
+        if self._unsupported.search(text):
+            return None
+        # attributes={}는 기본값(title, lang 허용)으로 취급되므로 "*"로 모든 속성을 막음
+        return nh3.clean(text, tags=set(self.tags), attributes={"*": set()},
+                         strip_comments=True, link_rel=None)
+
+
+def make_sanitizer(tags, backend: str = "auto"):
+    """backend: auto(nh3가 있으면 nh3, 없으면 stream) / nh3 / stream / bleach"""
+    if backend == "bleach":
+        return BleachSanitizer(tags)
+    if backend == "nh3" or (backend == "auto" and nh3 is not None):
+        return NH3Sanitizer(tags)
+    if backend in ("auto", "stream"):
+        return StreamSanitizer(tags)
+    raise ValueError(f"Unknown sanitizer backend: {backend}")
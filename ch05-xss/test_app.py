@@ -34,17 +34,19 @@ class TestVulnerableApp:
         assert resp.status_code == 200
 
 
-class TestSecureApp:
-    @pytest.fixture
-    def client(self):
-        from secure.app import app, init_db
-        app.config['TESTING'] = True
-        if os.path.exists('guestbook_secure.db'):
-            os.remove('guestbook_secure.db')
-        init_db()
-        with app.test_client() as client:
-            yield client
+@pytest.fixture
+def client():
+    """안전한 앱 + 빈 DB (TestVulnerableApp은 자기 client를 씀)"""
+    from secure.app import app, init_db
+    app.config['TESTING'] = True
+    if os.path.exists('guestbook_secure.db'):
+        os.remove('guestbook_secure.db')
+    init_db()
+    with app.test_client() as client:
+        yield client
 
+
+class TestSecureApp:
     def test_index(self, client):
         resp = client.get('/')
         assert resp.status_code == 200
@@ -54,6 +56,298 @@ class TestSecureApp:
         resp = client.get('/')
         assert 'Content-Security-Policy' in resp.headers
 
+    def test_uses_db_pool(self, client):
+        """성능: DB 접근은 labcommon 커넥션 풀을 거침 (풀 자체는 labcommon/test_tools.py)"""
+        from secure.app import db_pool
+        client.post('/post', data={'name': 'u', 'message': 'hi'})
+        assert db_pool.stats()['open'] == 1
+
+    def test_db_file_replaced(self, client):
+        """DB 파일이 지워지고 다시 만들어지면 새 파일을 사용"""
+        from secure.app import init_db
+        client.post('/post', data={'name': 'old', 'message': 'before reset'})
+        os.remove('guestbook_secure.db')
+        init_db()
+        resp = client.get('/')
+        assert b'before reset' not in resp.data
+
+    def test_precompiled_template_escapes_like_before(self, client):
+        """미리 컴파일한 템플릿도 render_template_string과 같은 HTML (자동 이스케이프 유지)"""
+        from flask import render_template, render_template_string
+        from secure.app import GUESTBOOK_TEMPLATE, TEMPLATE, app
+        client.post('/post', data={'name': '<i>n</i>', 'message': '<b>ok</b> & <script>x</script>'})
+        resp = client.get('/search', query_string={'q': '<script>alert(1)</script>'})
+        assert b'&lt;script&gt;alert(1)&lt;/script&gt;' in resp.data
+        assert b'<script>alert(1)' not in resp.data
+        messages = [(1, '<i>n</i>', '<b>ok</b> & "q"', '2024-01-01')]
+        with app.test_request_context():
+            expected = render_template_string(TEMPLATE, messages=messages, search_query='<x>')
+            assert render_template(GUESTBOOK_TEMPLATE, messages=messages,
+                                   search_query='<x>') == expected
+
+    def test_bytecode_cache(self, tmp_path):
+        """TEMPLATE_BYTECODE_CACHE를 지정하면 컴파일 결과를 파일로 저장"""
+        import subprocess
+        import labcommon
+        chapter = os.path.dirname(os.path.abspath(__file__))
+        shared = os.path.dirname(os.path.dirname(os.path.abspath(labcommon.__file__)))
+        env = dict(os.environ, TEMPLATE_BYTECODE_CACHE=str(tmp_path / 'bytecode'),
+                   PYTHONPATH=os.pathsep.join([chapter, shared]))
+        subprocess.run([sys.executable, '-c', 'import secure.app'], cwd=tmp_path, env=env, check=True)
+        assert list((tmp_path / 'bytecode').glob('__jinja2_*.cache'))
+
+
+class TestGuestbookCache:
+    """첫 페이지 캐시 / ETag"""
+
+    def test_page_served_from_cache(self, client, monkeypatch):
+        from secure import app as app_module
+        client.post('/post', data={'name': 'a', 'message': 'first'})
+        first = client.get('/')
+
+        def no_db(*args, **kwargs):
+            raise AssertionError('cached page should not query SQLite')
+        monkeypatch.setattr(app_module, 'fetch_messages', no_db)
+        again = client.get('/')
+        assert again.data == first.data and again.headers['ETag'] == first.headers['ETag']
+        assert 'Content-Security-Policy' in again.headers
+
+    def test_etag_and_invalidation(self, client):
+        client.post('/post', data={'name': 'a', 'message': 'first'})
+        etag = client.get('/').headers['ETag']
+        resp = client.get('/', headers={'If-None-Match': etag})
+        assert resp.status_code == 304 and resp.data == b''
+        client.post('/post', data={'name': 'b', 'message': 'second'})
+        resp = client.get('/', headers={'If-None-Match': etag})
+        assert resp.status_code == 200 and b'second' in resp.data
+        assert resp.headers['ETag'] != etag
+
+
+class TestMessageSearch:
+    """FTS5 인덱스 검색: 트리거 동기화, bm25 순위, 하이라이트 조각, 페이지"""
+
+    def test_ranked_and_highlighted(self, client):
+        from secure.app import search_messages
+        client.post('/post', data={'name': 'a', 'message': 'one needle here'})
+        client.post('/post', data={'name': 'b', 'message': 'needle needle <b>needle</b>'})
+        client.post('/post', data={'name': 'c', 'message': 'nothing to see'})
+        messages, snippets, has_next = search_messages('NEEDLE')
+        assert [m[1] for m in messages] == ['b', 'a'] and not has_next
+        # 글 내용은 이스케이프되고 일치 부분만 <mark>
+        assert str(snippets[messages[0][0]]).endswith('&lt;b&gt;<mark>needle</mark>&lt;/b&gt;')
+        resp = client.get('/search', query_string={'q': 'needle'})
+        assert b'<mark>needle</mark>' in resp.data and b'nothing to see' not in resp.data
+
+    def test_query_is_a_phrase(self, client):
+        """FTS5 연산자 / 따옴표 / 열 필터가 있어도 문자열 그대로 검색"""
+        client.post('/post', data={'name': 'a', 'message': 'say "hi" OR bye'})
+        for q in ['"hi" OR', 'message:hi', 'NEAR(a b)', 'hi*', '"']:
+            assert client.get('/search', query_string={'q': q}).status_code == 200
+        assert b'<mark>' in client.get('/search', query_string={'q': '"hi" OR'}).data
+
+    def test_short_query_uses_like(self, client):
+        from secure.app import search_messages
+        client.post('/post', data={'name': 'a', 'message': '바늘 찾기'})
+        messages, snippets, _ = search_messages('바늘')
+        assert len(messages) == 1 and snippets == {}
+
+    def test_pagination(self, client):
+        from secure.app import SEARCH_PAGE_SIZE
+        for i in range(SEARCH_PAGE_SIZE + 5):
+            client.post('/post', data={'name': f'u{i}', 'message': f'needle #{i}'})
+        first = client.get('/search', query_string={'q': 'needle'}).data
+        assert first.count(b'<mark>') == SEARCH_PAGE_SIZE and b'page=2' in first
+        second = client.get('/search', query_string={'q': 'needle', 'page': 2}).data
+        assert second.count(b'<mark>') == 5 and b'page=3' not in second
+
+    def test_index_follows_update_and_delete(self, client):
+        from secure.app import db_pool, search_messages
+        client.post('/post', data={'name': 'a', 'message': 'old text'})
+        with db_pool.connection() as conn:
+            conn.execute("UPDATE messages SET message = 'new text'")
+            conn.commit()
+        assert search_messages('old')[0] == [] and len(search_messages('new')[0]) == 1
+        with db_pool.connection() as conn:
+            conn.execute('DELETE FROM messages')
+            conn.commit()
+        assert search_messages('new')[0] == []
+
+    def test_existing_messages_indexed(self, client):
+        """인덱스가 없던 DB도 init_db()가 만들고 기존 글을 색인"""
+        from secure.app import db_pool, init_db, search_messages
+        client.post('/post', data={'name': 'a', 'message': 'legacy needle'})
+        with db_pool.connection() as conn:
+            conn.execute('DROP TABLE message_search')
+            conn.commit()
+        init_db()
+        assert len(search_messages('needle')[0]) == 1
+
+
+class TestMessageListing:
+    """created_at 인덱스 + /messages keyset 페이지"""
+
+    def query_plan(self, sql, params):
+        from secure.app import db_pool
+        with db_pool.connection() as conn:
+            return ' / '.join(row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params))
+
+    def test_listing_uses_index(self, client):
+        from secure.app import LATEST_MESSAGES_SQL, OLDER_MESSAGES_SQL
+        for sql, params in [(LATEST_MESSAGES_SQL, (20,)),
+                            (OLDER_MESSAGES_SQL, ('2024-01-01 00:00:00', 1, 20))]:
+            plan = self.query_plan(sql, params)
+            assert 'idx_messages_created_at' in plan, plan
+            assert 'TEMP B-TREE' not in plan, plan  # 전체 정렬 없음
+
+    def test_old_database_gets_index(self, client):
+        import sqlite3
+        from secure.app import init_db
+        os.remove('guestbook_secure.db')
+        conn = sqlite3.connect('guestbook_secure.db')
+        conn.execute("CREATE TABLE messages (id INTEGER PRIMARY KEY, name TEXT, message TEXT, "
+                     "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+        conn.commit()
+        conn.close()
+        init_db()
+        conn = sqlite3.connect('guestbook_secure.db')
+        names = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")]
+        conn.close()
+        assert 'idx_messages_created_at' in names
+
+    def test_keyset_pages(self, client):
+        from secure.app import db_pool
+        # 같은 초에 쓴 글이 섞여 있어도 (created_at, id) 순서로 빠짐없이 한 번씩
+        with db_pool.connection() as conn:
+            conn.executemany('INSERT INTO messages (name, message, created_at) VALUES (?, ?, ?)',
+                             [(f'u{i}', f'm{i}', f'2024-01-01 00:00:{i // 3:02d}') for i in range(45)])
+            conn.commit()
+        seen, before = [], None
+        while True:
+            params = {'limit': 20, **({'before': before} if before else {})}
+            data = client.get('/messages', query_string=params).get_json()
+            seen += [m['id'] for m in data['messages']]
+            before = data['next_before']
+            if before is None:
+                break
+        assert seen == list(range(45, 0, -1))
+        first_page = client.get('/').data.decode()
+        assert first_page.index('m44') < first_page.index('m43') and 'm24' not in first_page
+
+    def test_bad_cursor(self, client):
+        assert client.get('/messages?before=abc').status_code == 400
+        assert client.get('/messages?before=999').status_code == 404
+
+
+class TestSecurityHeaders:
+    """labcommon SecurityHeadersMiddleware: 미리 만든 헤더, 경로별 CSP, nonce"""
+
+    def make_app(self, **options):
+        from flask import Flask, request
+        from labcommon.security_headers import SecurityHeadersMiddleware, csp_nonce
+        app = Flask(__name__)
+
+        @app.route('/', defaults={'path': ''})
+        @app.route('/<path:path>')
+        def page(path):
+            return csp_nonce(request.environ) or 'no nonce'
+
+        app.wsgi_app = SecurityHeadersMiddleware(app.wsgi_app, {'X-Frame-Options': 'DENY'}, **options)
+        return app.test_client()
+
+    def test_guestbook_headers(self):
+        from secure.app import app, init_db
+        init_db()
+        client = app.test_client()
+        page = client.get('/')
+        assert page.headers['Content-Security-Policy'] == "default-src 'self'; script-src 'self'"
+        for name in ['Content-Security-Policy', 'X-Frame-Options', 'X-Content-Type-Options',
+                     'X-XSS-Protection']:
+            assert len(page.headers.getlist(name)) == 1
+        api = client.get('/messages')
+        assert api.headers['Content-Security-Policy'].startswith("default-src 'none'")
+        # 304 응답에도 헤더가 붙음
+        cached = client.get('/', headers={'If-None-Match': page.headers['ETag']})
+        assert cached.status_code == 304 and cached.headers['X-Frame-Options'] == 'DENY'
+
+    def test_longest_prefix_wins(self):
+        client = self.make_app(csp="default-src 'self'",
+                               csp_routes={'/api/': "default-src 'none'", '/api/admin/': 'sandbox'})
+        assert client.get('/').headers['Content-Security-Policy'] == "default-src 'self'"
+        assert client.get('/api/x').headers['Content-Security-Policy'] == "default-src 'none'"
+        assert client.get('/api/admin/x').headers['Content-Security-Policy'] == 'sandbox'
+
+    def test_nonce_per_request(self):
+        client = self.make_app(csp="script-src 'nonce-{nonce}'", csp_routes={'/plain': "default-src 'self'"})
+        first, second = client.get('/'), client.get('/')
+        assert first.headers['Content-Security-Policy'] == f"script-src 'nonce-{first.text}'"
+        assert first.text != second.text and len(first.text) >= 16
+        plain = client.get('/plain')
+        assert plain.text == 'no nonce' and plain.headers['Content-Security-Policy'] == "default-src 'self'"
+
+
+# bleach와 결과를 비교할 입력 조각 (허용 / 금지 태그, 깨진 태그, 엔티티, 제어 문자 등)
+SANITIZER_FRAGMENTS = [
+    'hello', ' ', '\n', '\r\n', '\r', '\t', '&', ' & ', '&amp;', '&lt;', '&copy', '&#39;', '&1',
+    '<', '>', '<3', '< b', '</', '</>', '"', "'", '=', '/', 'é', '한글', '😀', '\x00', '\x0b',
+    '\x85', '\ufffe', '<b>', '</b>', '<i>', '</i>', '<u>', '</u>', '<em>', '</em>', '<strong>',
+    '</strong>', '<p>', '</p>', '<br>', '<br/>', '<br />', '</br>', '<B>', '</B>', "<P class='x'>",
+    '<b id=1>', '<b title="a>b">', '<b a=1 a=2>', '<i\tx>', '<p\n>', '<b/>', '<b', '<b-x>',
+    '<span>', '</span>', "<a href='javascript:x'>", '</a>', '<div>', '</div>', '<h1>', '<li>',
+    '<table>', '<td>', '<svg>', '<textarea>', '<script>', '</script>', '<style>',
+    '<img src=x onerror=alert(1)>', "<x y='<'>", '<!-- c -->', '<!doctype html>', '<?x?>',
+]
+
+
+class TestSanitizer:
+    """빠른 정화 백엔드(stream / nh3)의 결과 == bleach 결과 (differential 테스트)"""
+
+    @pytest.fixture(params=['stream', 'nh3'])
+    def backend(self, request):
+        from secure import sanitizer
+        if request.param == 'nh3' and sanitizer.nh3 is None:
+            pytest.skip('nh3 is not installed')
+        return request.param
+
+    def corpus(self, count=3000):
+        import random
+        rng = random.Random(22)
+        yield from SANITIZER_FRAGMENTS
+        for _ in range(count):
+            yield ''.join(rng.choice(SANITIZER_FRAGMENTS) for _ in range(rng.randint(1, 12)))
+
+    @pytest.mark.parametrize('tags', [['b', 'i', 'u', 'em', 'strong', 'p', 'br'], []])
+    def test_same_output_as_bleach(self, backend, tags):
+        from secure.sanitizer import BleachSanitizer, make_sanitizer
+        reference = BleachSanitizer(tags)
+        fast = make_sanitizer(tags, backend)
+        for text in self.corpus():
+            assert fast.clean(text) == reference.clean(text), repr(text)
+
+    def test_common_messages_skip_bleach(self, backend):
+        """평범한 글은 bleach로 넘기지 않고 빠른 경로에서 처리"""
+        from secure.app import ALLOWED_TAGS
+        from secure.sanitizer import make_sanitizer
+        fast = make_sanitizer(ALLOWED_TAGS, backend)
+        for text in ['안녕하세요 & 반가워요 <3', '<p><b>굵게</b>, <i>기울임</i></p>\r\n<br>',
+                     'a > b, "quoted" it\'s', '<strong>열린 태그']:
+            assert fast.try_clean(text) is not None, repr(text)
+
+    def test_post_uses_sanitizer(self):
+        from secure.app import app, init_db, fetch_messages
+        if os.path.exists('guestbook_secure.db'):
+            os.remove('guestbook_secure.db')
+        init_db()
+        app.test_client().post('/post', data={
+            'name': '<b>bob</b>', 'message': '<script>alert(1)</script><b class="x">hi</b> & bye'})
+        row = fetch_messages('SELECT id, name, message, created_at FROM messages')[0]
+        assert row[1] == 'bob'
+        assert row[2] == 'alert(1)<b>hi</b> &amp; bye'
+
+    def test_unknown_backend(self):
+        from secure.sanitizer import make_sanitizer
+        with pytest.raises(ValueError):
+            make_sanitizer([], 'nope')
+
 
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -5,33 +5,48 @@ from flask import Flask, request, render_template_string, session, redirect
 from flask_wtf import FlaskForm, CSRFProtect
 from wtforms import StringField, IntegerField, SubmitField
 from wtforms.validators import DataRequired, Email
-import sqlite3
 import os
 
+from labcommon.security_headers import SecurityHeadersMiddleware
+from labcommon.sqlite_pool import SQLitePool
+
 app = Flask(__name__)
 app.json.ensure_ascii = False
 app.secret_key = os.urandom(32)
+# SameSite 쿠키: Flask가 세션 쿠키를 만들 때 속성을 붙임 (Set-Cookie 문자열을 고치지 않음)
+app.config["SESSION_COOKIE_SAMESITE"] = "Strict"
+app.config["SESSION_COOKIE_HTTPONLY"] = True
+# 보안 헤더는 미리 만든 목록을 WSGI 미들웨어가 한 번에 추가
+# frame-ancestors / X-Frame-Options: 다른 사이트가 화면을 iframe에 넣어 클릭을 유도하지 못하게
+# form-action: 폼이 다른 사이트로 전송되지 않게
+SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "Referrer-Policy": "same-origin",
+}
+CONTENT_SECURITY_POLICY = "default-src 'self'; form-action 'self'; frame-ancestors 'none'"
+app.wsgi_app = SecurityHeadersMiddleware(app.wsgi_app, SECURITY_HEADERS, csp=CONTENT_SECURITY_POLICY)
 csrf = CSRFProtect(app)
 DB_PATH = "users_secure.db"
+db_pool = SQLitePool(DB_PATH)  # 요청마다 connect/close 하지 않고 재사용
 
 
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY,
-            username TEXT UNIQUE,
-            email TEXT,
-            balance INTEGER DEFAULT 1000
-        )
-    """)
-    cursor.execute("INSERT OR IGNORE INTO users (username, email, balance) VALUES (?, ?, ?)",
-                   ("alice", "alice@example.com", 1000))
-    cursor.execute("INSERT OR IGNORE INTO users (username, email, balance) VALUES (?, ?, ?)",
-                   ("bob", "bob@example.com", 1000))
-    conn.commit()
-    conn.close()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY,
+                username TEXT UNIQUE,
+                email TEXT,
+                balance INTEGER DEFAULT 1000
+            )
+        """)
+        cursor.execute("INSERT OR IGNORE INTO users (username, email, balance) VALUES (?, ?, ?)",
+                       ("alice", "alice@example.com", 1000))
+        cursor.execute("INSERT OR IGNORE INTO users (username, email, balance) VALUES (?, ?, ?)",
+                       ("bob", "bob@example.com", 1000))
+        conn.commit()
 
 
 class TransferForm(FlaskForm):
@@ -88,26 +103,16 @@ TEMPLATE = """
 """
 
 
-@app.after_request
-def set_cookie_options(response):
-    """SameSite 쿠키 설정"""
-    existing_cookie = response.headers.get('Set-Cookie', '')
-    if existing_cookie:
-        response.headers['Set-Cookie'] = existing_cookie + '; SameSite=Strict'
-    return response
-
-
 @app.route("/")
 def index():
     user = session.get("user")
     balance = 0
     if user:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT balance FROM users WHERE username = ?", (user,))
-        result = cursor.fetchone()
-        balance = result[0] if result else 0
-        conn.close()
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT balance FROM users WHERE username = ?", (user,))
+            result = cursor.fetchone()
+            balance = result[0] if result else 0
     return render_template_string(TEMPLATE, user=user, balance=balance)
 
 
@@ -137,12 +142,11 @@ def transfer():
     if amount <= 0:
         return "Invalid amount", 400
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("UPDATE users SET balance = balance - ? WHERE username = ?", (amount, user))
-    cursor.execute("UPDATE users SET balance = balance + ? WHERE username = ?", (amount, to))
-    conn.commit()
-    conn.close()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE users SET balance = balance - ? WHERE username = ?", (amount, user))
+        cursor.execute("UPDATE users SET balance = balance + ? WHERE username = ?", (amount, to))
+        conn.commit()
 
     return redirect("/")
 
@@ -154,11 +158,10 @@ def change_email():
         return "Not logged in", 401
 
     email = request.form.get("email", "")
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("UPDATE users SET email = ? WHERE username = ?", (email, user))
-    conn.commit()
-    conn.close()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE users SET email = ? WHERE username = ?", (email, user))
+        conn.commit()
 
     return redirect("/")
 
@@ -42,6 +42,27 @@ class TestSecureApp:
         resp = client.get('/')
         assert resp.status_code == 200
 
+    def test_uses_db_pool(self, client):
+        """성능: DB 접근은 labcommon 커넥션 풀을 거침 (풀 자체는 labcommon/test_tools.py)"""
+        from secure.app import db_pool
+        client.post('/login', data={'username': 'alice'})
+        client.post('/change_email', data={'email': 'alice0@example.com'})
+        assert db_pool.stats()['open'] == 1
+
+    def test_session_cookie_samesite(self, client):
+        """보안: 세션 쿠키에 SameSite=Strict가 한 번만 붙음"""
+        resp = client.post('/login', data={'username': 'alice'})
+        cookies = resp.headers.getlist('Set-Cookie')
+        assert len(cookies) == 1
+        assert cookies[0].count('SameSite=Strict') == 1 and 'HttpOnly' in cookies[0]
+
+    def test_security_headers(self, client):
+        """보안: 미들웨어가 붙인 헤더는 응답마다 한 번씩"""
+        resp = client.get('/')
+        assert "frame-ancestors 'none'" in resp.headers['Content-Security-Policy']
+        for name in ['Content-Security-Policy', 'X-Frame-Options', 'X-Content-Type-Options']:
+            assert len(resp.headers.getlist(name)) == 1
+
 
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -10,9 +10,12 @@ import re
 from datetime import datetime, timedelta
 from functools import wraps
 
+from labcommon.sqlite_pool import SQLitePool
+
 app = Flask(__name__)
 app.json.ensure_ascii = False
 DB_PATH = "auth_secure.db"
+db_pool = SQLitePool(DB_PATH)  # 요청마다 connect/close 하지 않고 재사용
 
 # 환경 변수에서 시크릿 로드
 JWT_SECRET = os.environ.get("JWT_SECRET", os.urandom(32).hex())
@@ -20,24 +23,23 @@ JWT_ALGORITHM = "HS256"
 
 
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY,
-            username TEXT UNIQUE,
-            password_hash TEXT,
-            role TEXT DEFAULT 'user',
-            failed_attempts INTEGER DEFAULT 0,
-            locked_until TIMESTAMP
-        )
-    """)
-    # bcrypt로 비밀번호 해시
-    admin_hash = bcrypt.hashpw("admin123".encode(), bcrypt.gensalt()).decode()
-    cursor.execute("INSERT OR IGNORE INTO users (username, password_hash, role) VALUES (?, ?, ?)",
-                   ("admin", admin_hash, "admin"))
-    conn.commit()
-    conn.close()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY,
+                username TEXT UNIQUE,
+                password_hash TEXT,
+                role TEXT DEFAULT 'user',
+                failed_attempts INTEGER DEFAULT 0,
+                locked_until TIMESTAMP
+            )
+        """)
+        # bcrypt로 비밀번호 해시
+        admin_hash = bcrypt.hashpw("admin123".encode(), bcrypt.gensalt()).decode()
+        cursor.execute("INSERT OR IGNORE INTO users (username, password_hash, role) VALUES (?, ?, ?)",
+                       ("admin", admin_hash, "admin"))
+        conn.commit()
 
 
 def validate_password(password: str) -> tuple[bool, str]:
@@ -133,17 +135,15 @@ def register():
     # bcrypt로 해시 (자동으로 salt 생성)
     password_hash = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    try:
-        cursor.execute("INSERT INTO users (username, password_hash) VALUES (?, ?)",
-                       (username, password_hash))
-        conn.commit()
-        return jsonify({"status": "success", "message": "User registered successfully"})
-    except sqlite3.IntegrityError:
-        return jsonify({"status": "error", "message": "Username already exists"})
-    finally:
-        conn.close()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("INSERT INTO users (username, password_hash) VALUES (?, ?)",
+                           (username, password_hash))
+            conn.commit()
+            return jsonify({"status": "success", "message": "User registered successfully"})
+        except sqlite3.IntegrityError:
+            return jsonify({"status": "error", "message": "Username already exists"})
 
 
 @app.route("/login", methods=["POST"])
@@ -151,52 +151,49 @@ def login():
     username = request.form.get("username", "")
     password = request.form.get("password", "")
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    # 계정 잠금 확인
-    is_locked, lock_msg = check_account_lock(cursor, username)
-    if is_locked:
-        conn.close()
-        return jsonify({"status": "error", "message": lock_msg})
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
 
-    cursor.execute("SELECT id, username, password_hash, role, failed_attempts FROM users WHERE username = ?",
-                   (username,))
-    user = cursor.fetchone()
+        # 계정 잠금 확인
+        is_locked, lock_msg = check_account_lock(cursor, username)
+        if is_locked:
+            return jsonify({"status": "error", "message": lock_msg})
 
-    if user and bcrypt.checkpw(password.encode(), user[2].encode()):
-        # 로그인 성공: 실패 횟수 초기화
-        cursor.execute("UPDATE users SET failed_attempts = 0, locked_until = NULL WHERE username = ?",
+        cursor.execute("SELECT id, username, password_hash, role, failed_attempts FROM users WHERE username = ?",
                        (username,))
-        conn.commit()
+        user = cursor.fetchone()
 
-        token = jwt.encode({
-            "user_id": user[0],
-            "username": user[1],
-            "role": user[3],
-            "exp": datetime.utcnow() + timedelta(hours=1)  # 짧은 만료 시간
-        }, JWT_SECRET, algorithm=JWT_ALGORITHM)
-
-        conn.close()
-        return jsonify({
-            "status": "success",
-            "token": token,
-            "message": f"Welcome {user[1]}"
-        })
-    else:
-        # 로그인 실패: 실패 횟수 증가
-        if user:
-            failed = user[4] + 1
-            locked_until = None
-            if failed >= 5:
-                locked_until = (datetime.utcnow() + timedelta(minutes=15)).isoformat()
-            cursor.execute("UPDATE users SET failed_attempts = ?, locked_until = ? WHERE username = ?",
-                           (failed, locked_until, username))
+        if user and bcrypt.checkpw(password.encode(), user[2].encode()):
+            # 로그인 성공: 실패 횟수 초기화
+            cursor.execute("UPDATE users SET failed_attempts = 0, locked_until = NULL WHERE username = ?",
+                           (username,))
             conn.commit()
 
-        conn.close()
-        # 타이밍 공격 방지: 동일한 메시지
-        return jsonify({"status": "error", "message": "Invalid username or password"})
+            token = jwt.encode({
+                "user_id": user[0],
+                "username": user[1],
+                "role": user[3],
+                "exp": datetime.utcnow() + timedelta(hours=1)  # 짧은 만료 시간
+            }, JWT_SECRET, algorithm=JWT_ALGORITHM)
+
+            return jsonify({
+                "status": "success",
+                "token": token,
+                "message": f"Welcome {user[1]}"
+            })
+        else:
+            # 로그인 실패: 실패 횟수 증가
+            if user:
+                failed = user[4] + 1
+                locked_until = None
+                if failed >= 5:
+                    locked_until = (datetime.utcnow() + timedelta(minutes=15)).isoformat()
+                cursor.execute("UPDATE users SET failed_attempts = ?, locked_until = ? WHERE username = ?",
+                               (failed, locked_until, username))
+                conn.commit()
+
+            # 타이밍 공격 방지: 동일한 메시지
+            return jsonify({"status": "error", "message": "Invalid username or password"})
 
 
 @app.route("/admin", methods=["GET"])
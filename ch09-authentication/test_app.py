@@ -45,6 +45,12 @@ class TestSecureApp:
         resp = client.get('/')
         assert resp.status_code == 200
 
+    def test_uses_db_pool(self, client):
+        """성능: DB 접근은 labcommon 커넥션 풀을 거침 (풀 자체는 labcommon/test_tools.py)"""
+        from secure.app import db_pool
+        client.post('/login', data={'username': 'nobody', 'password': 'x'})
+        assert db_pool.stats()['open'] == 1
+
 
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
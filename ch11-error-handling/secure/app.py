@@ -11,6 +11,8 @@ import uuid
 import re
 from functools import wraps
 
+from labcommon.sqlite_pool import SQLitePool
+
 app = Flask(__name__)
 app.json.ensure_ascii = False
 
@@ -55,50 +57,51 @@ class RequestContextFilter(logging.Filter):
 logger.addFilter(RequestContextFilter())
 
 
+db_pool = SQLitePool('users.db', row_factory=sqlite3.Row)
+
+
 def get_db():
-    conn = sqlite3.connect('users.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+    """풀에서 커넥션 대여: with get_db() as conn: ..."""
+    return db_pool.connection()
 
 
 def init_db():
-    conn = get_db()
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY,
-            username TEXT UNIQUE,
-            password_hash TEXT,
-            email TEXT,
-            credit_card_last4 TEXT
-        )
-    ''')
-    try:
-        conn.execute(
-            "INSERT INTO users (username, password_hash, email, credit_card_last4) VALUES (?, ?, ?, ?)",
-            ("admin", "hashed_password_here", "admin@example.com", "1111")
-        )
-        conn.execute(
-            "INSERT INTO users (username, password_hash, email, credit_card_last4) VALUES (?, ?, ?, ?)",
-            ("alice", "hashed_password_here", "alice@example.com", "2222")
-        )
-        conn.commit()
-    except:
-        pass
-    # 잔액 테이블
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS accounts (
-            id INTEGER PRIMARY KEY,
-            username TEXT UNIQUE,
-            balance INTEGER DEFAULT 1000
-        )
-    ''')
-    try:
-        conn.execute("INSERT INTO accounts (username, balance) VALUES (?, ?)", ("admin", 1000))
-        conn.execute("INSERT INTO accounts (username, balance) VALUES (?, ?)", ("alice", 1000))
-        conn.commit()
-    except:
-        pass
-    conn.close()
+    with get_db() as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY,
+                username TEXT UNIQUE,
+                password_hash TEXT,
+                email TEXT,
+                credit_card_last4 TEXT
+            )
+        ''')
+        try:
+            conn.execute(
+                "INSERT INTO users (username, password_hash, email, credit_card_last4) VALUES (?, ?, ?, ?)",
+                ("admin", "hashed_password_here", "admin@example.com", "1111")
+            )
+            conn.execute(
+                "INSERT INTO users (username, password_hash, email, credit_card_last4) VALUES (?, ?, ?, ?)",
+                ("alice", "hashed_password_here", "alice@example.com", "2222")
+            )
+            conn.commit()
+        except:
+            pass
+        # 잔액 테이블
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS accounts (
+                id INTEGER PRIMARY KEY,
+                username TEXT UNIQUE,
+                balance INTEGER DEFAULT 1000
+            )
+        ''')
+        try:
+            conn.execute("INSERT INTO accounts (username, balance) VALUES (?, ?)", ("admin", 1000))
+            conn.execute("INSERT INTO accounts (username, balance) VALUES (?, ?)", ("alice", 1000))
+            conn.commit()
+        except:
+            pass
 
 
 def handle_errors(f):
@@ -165,13 +168,12 @@ def get_user():
     # 보안: 민감하지 않은 정보만 로깅
     logger.info(f"User lookup for ID: {user_id}")
 
-    conn = get_db()
-    cursor = conn.execute(
-        "SELECT id, username FROM users WHERE id = ?",
-        (user_id,)
-    )
-    user = cursor.fetchone()
-    conn.close()
+    with get_db() as conn:
+        cursor = conn.execute(
+            "SELECT id, username FROM users WHERE id = ?",
+            (user_id,)
+        )
+        user = cursor.fetchone()
 
     if not user:
         # 보안: 일반적인 에러 메시지
@@ -202,14 +204,13 @@ def login():
     # 보안: 비밀번호는 로깅하지 않음
     logger.info(f"Login attempt for user: {username}")
 
-    conn = get_db()
-    # 실제로는 password_hash와 비교해야 함
-    cursor = conn.execute(
-        "SELECT id, username FROM users WHERE username = ?",
-        (username,)
-    )
-    user = cursor.fetchone()
-    conn.close()
+    with get_db() as conn:
+        # 실제로는 password_hash와 비교해야 함
+        cursor = conn.execute(
+            "SELECT id, username FROM users WHERE username = ?",
+            (username,)
+        )
+        user = cursor.fetchone()
 
     # 보안: 동일한 에러 메시지 사용 (사용자 열거 방지)
     if not user:
@@ -228,9 +229,8 @@ def login():
 @handle_errors
 def get_balance():
     """잔액 조회"""
-    conn = get_db()
-    rows = conn.execute("SELECT username, balance FROM accounts").fetchall()
-    conn.close()
+    with get_db() as conn:
+        rows = conn.execute("SELECT username, balance FROM accounts").fetchall()
     return jsonify([dict(row) for row in rows])
 
 
@@ -249,38 +249,36 @@ def transfer():
     if amount <= 0:
         raise ValueError("Amount must be positive")
 
-    conn = get_db()
-    try:
-        # 1단계: 보내는 사람 잔액 차감
-        conn.execute(
-            "UPDATE accounts SET balance = balance - ? WHERE username = ?",
-            (amount, sender)
-        )
+    with get_db() as conn:
+        try:
+            # 1단계: 보내는 사람 잔액 차감
+            conn.execute(
+                "UPDATE accounts SET balance = balance - ? WHERE username = ?",
+                (amount, sender)
+            )
 
-        # 2단계: 받는 사람 잔액 증가 (여기서 에러 발생 가능)
-        if receiver == "error":
-            raise Exception("DB connection lost")  # 시뮬레이션: 네트워크 에러
+            # 2단계: 받는 사람 잔액 증가 (여기서 에러 발생 가능)
+            if receiver == "error":
+                raise Exception("DB connection lost")  # 시뮬레이션: 네트워크 에러
 
-        conn.execute(
-            "UPDATE accounts SET balance = balance + ? WHERE username = ?",
-            (amount, receiver)
-        )
+            conn.execute(
+                "UPDATE accounts SET balance = balance + ? WHERE username = ?",
+                (amount, receiver)
+            )
+
+            # 모든 단계 성공 후에만 커밋
+            conn.commit()
+            logger.info(f"Transfer success: {sender} → {receiver}: {amount}")
 
-        # 모든 단계 성공 후에만 커밋
-        conn.commit()
-        logger.info(f"Transfer success: {sender} → {receiver}: {amount}")
-
-        return jsonify({
-            "status": "success",
-            "message": f"{sender} → {receiver}: {amount}원 송금 완료"
-        })
-    except Exception as e:
-        # 안전: rollback으로 모든 변경 취소
-        conn.rollback()
-        logger.error(f"Transfer failed, rolled back: {type(e).__name__}")
-        raise  # handle_errors 데코레이터에서 처리
-    finally:
-        conn.close()
+            return jsonify({
+                "status": "success",
+                "message": f"{sender} → {receiver}: {amount}원 송금 완료"
+            })
+        except Exception as e:
+            # 안전: rollback으로 모든 변경 취소
+            conn.rollback()
+            logger.error(f"Transfer failed, rolled back: {type(e).__name__}")
+            raise  # handle_errors 데코레이터에서 처리
 
 
 @app.errorhandler(404)
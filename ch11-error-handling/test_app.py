@@ -93,6 +93,12 @@ class TestSecureApp:
         admin_after = next(b['balance'] for b in balances if b['username'] == 'admin')
         assert admin_after == admin_before  # 잔액 보존!
 
+    def test_uses_db_pool(self, client):
+        """성능: DB 접근은 labcommon 커넥션 풀을 거침 (풀 자체는 labcommon/test_tools.py)"""
+        from secure.app import db_pool
+        client.get('/balance')
+        assert db_pool.stats()['open'] == 1
+
     def test_transfer_success(self, client):
         """정상 송금 테스트"""
         resp = client.post('/transfer', data={
@@ -0,0 +1,3 @@
+"""
+여러 챕터의 secure 앱이 함께 쓰는 공용 모듈
+"""
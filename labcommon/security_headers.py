@@ -0,0 +1,77 @@
+"""
+보안 헤더 WSGI 미들웨어
+- 응답마다 헤더를 하나씩 대입하지 않고, 시작할 때 만들어 둔 (이름, 값) 목록을 한 번에 추가
+- 경로 접두사별 Content-Security-Policy 덮어쓰기 (가장 긴 접두사 우선)
+- CSP에 {nonce}가 있으면 요청마다 nonce를 만들어 넣고 environ["labcommon.csp_nonce"]로 전달
+
+사용 예:
+    app.wsgi_app = SecurityHeadersMiddleware(
+        app.wsgi_app,
+        {"X-Content-Type-Options": "nosniff", "X-Frame-Options": "DENY"},
+        csp="default-src 'self'; script-src 'self' 'nonce-{nonce}'",
+        csp_routes={"/api/": "default-src 'none'"},
+    )
+    # 템플릿에서: <script nonce="{{ request.environ['labcommon.csp_nonce'] }}">
+
+앱이 같은 이름의 헤더를 직접 설정하면 헤더가 두 번 나가므로, 여기서 관리하는 헤더는
+앱에서 설정하지 않는다.
+"""
+import secrets
+
+NONCE_ENVIRON_KEY = "labcommon.csp_nonce"
+NONCE_PLACEHOLDER = "{nonce}"
+NONCE_BYTES = 16
+
+
+def csp_nonce(environ) -> str:
+    """현재 요청의 CSP nonce (nonce를 쓰지 않는 정책이면 None)"""
+    return environ.get(NONCE_ENVIRON_KEY)
+
+
+class _Policy:
+    """경로 하나에 붙일 헤더: 고정 헤더 목록 + (nonce를 넣을 CSP 조각)"""
+
+    __slots__ = ("headers", "nonce_parts")
+
+    def __init__(self, static_headers: list, csp: str):
+        if csp and NONCE_PLACEHOLDER in csp:
+            self.headers = static_headers
+            self.nonce_parts = csp.split(NONCE_PLACEHOLDER)
+        else:
+            csp_header = [("Content-Security-Policy", csp)] if csp else []
+            self.headers = static_headers + csp_header
+            self.nonce_parts = None
+
+
+class SecurityHeadersMiddleware:
+    """모든 응답에 미리 만든 보안 헤더 목록을 추가하는 WSGI 미들웨어"""
+
+    def __init__(self, app, headers: dict, csp: str = None, csp_routes: dict = None):
+        self.app = app
+        static_headers = [(str(name), str(value)) for name, value in headers.items()]
+        self._default = _Policy(static_headers, csp)
+        # 긴 접두사부터 비교해야 /api/admin/이 /api/보다 먼저 맞음
+        self._routes = tuple(
+            (prefix, _Policy(static_headers, policy))
+            for prefix, policy in sorted((csp_routes or {}).items(), key=lambda item: -len(item[0]))
+        )
+
+    def policy_for(self, path: str) -> _Policy:
+        for prefix, policy in self._routes:
+            if path.startswith(prefix):
+                return policy
+        return self._default
+
+    def __call__(self, environ, start_response):
+        policy = self.policy_for(environ.get("PATH_INFO", "")) if self._routes else self._default
+        extra = policy.headers
+        if policy.nonce_parts is not None:
+            nonce = secrets.token_urlsafe(NONCE_BYTES)
+            environ[NONCE_ENVIRON_KEY] = nonce
+            extra = extra + [("Content-Security-Policy", nonce.join(policy.nonce_parts))]
+
+        def start_with_headers(status, response_headers, exc_info=None):
+            response_headers.extend(extra)
+            return start_response(status, response_headers, exc_info)
+
+        return self.app(environ, start_with_headers)
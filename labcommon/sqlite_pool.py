@@ -0,0 +1,209 @@
+"""
+SQLite 커넥션 풀
+- 요청마다 connect()/close() 하지 않고 커넥션을 재사용
+- WAL 저널 모드 + synchronous=NORMAL + busy_timeout
+- 스레드 안전 (같은 스레드의 중첩 사용은 같은 커넥션을 돌려받음)
+- 체크아웃 시 헬스 체크 (DB 파일 교체 감지, 오래 쉰 커넥션 ping)
+
+사용 예:
+    db_pool = SQLitePool("app.db")
+    with db_pool.connection() as conn:
+        conn.execute("INSERT ...")
+        conn.commit()
+
+블록을 빠져나올 때 커밋되지 않은 트랜잭션은 롤백된 뒤 풀로 돌아갑니다.
+"""
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+
+# 배포 환경별로 환경 변수로 조정
+DEFAULT_POOL_SIZE = int(os.environ.get("SQLITE_POOL_SIZE", "8"))
+DEFAULT_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+DEFAULT_HEALTH_CHECK = os.environ.get("SQLITE_POOL_HEALTH_CHECK", "1") != "0"
+
+
+class PoolTimeout(sqlite3.OperationalError):
+    """풀의 모든 커넥션이 사용 중이고 대기 시간이 초과됨"""
+
+
+class _PooledConnection:
+    __slots__ = ("conn", "generation", "last_used", "depth")
+
+    def __init__(self, conn, generation):
+        self.conn = conn
+        self.generation = generation
+        self.last_used = time.monotonic()
+        self.depth = 0
+
+
+class SQLitePool:
+    """스레드 안전 SQLite 커넥션 풀"""
+
+    def __init__(self, path, max_size=None, timeout=5.0, busy_timeout_ms=None,
+                 health_check=None, health_check_interval=30.0, row_factory=None,
+                 journal_mode="WAL", synchronous="NORMAL"):
+        self.path = path
+        self.max_size = max_size or DEFAULT_POOL_SIZE
+        self.timeout = timeout
+        self.busy_timeout_ms = DEFAULT_BUSY_TIMEOUT_MS if busy_timeout_ms is None else busy_timeout_ms
+        self.health_check = DEFAULT_HEALTH_CHECK if health_check is None else health_check
+        self.health_check_interval = health_check_interval
+        self.row_factory = row_factory
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+
+        self._idle = []  # LIFO: 가장 최근에 쓴 커넥션을 먼저 재사용
+        self._open = 0
+        self._generation = 0
+        self._file_id = None
+        self._cond = threading.Condition()
+        self._local = threading.local()
+
+    # --- 커넥션 생성/폐기 ---------------------------------------------------
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,  # 풀이 스레드 간에 넘겨주므로
+        )
+        if self.row_factory is not None:
+            conn.row_factory = self.row_factory
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        if self.journal_mode:
+            conn.execute(f"PRAGMA journal_mode = {self.journal_mode}")
+        if self.synchronous:
+            conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+        return conn
+
+    def _current_file_id(self):
+        if self.path == ":memory:" or self.path.startswith("file:"):
+            return None
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_dev, st.st_ino)
+
+    def _discard(self, pooled):
+        """풀 밖으로 버림 (호출자가 self._cond를 잡고 있어야 함)"""
+        self._open -= 1
+        try:
+            pooled.conn.close()
+        except sqlite3.Error:
+            pass
+        self._cond.notify()
+
+    def _is_healthy(self, pooled):
+        if pooled.generation != self._generation:
+            return False
+        if not self.health_check:
+            return True
+        if time.monotonic() - pooled.last_used < self.health_check_interval:
+            return True
+        try:
+            pooled.conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _check_file(self):
+        """DB 파일이 삭제/교체되었으면 기존 커넥션을 모두 무효화.
+
+        지워진 파일을 가리키는 커넥션은 예전 데이터를 계속 보여주고, 남은
+        -wal 파일이 새 DB에 섞여 들어갈 수 있으므로 새 커넥션을 열기 전에
+        모두 닫는다. (self._cond를 잡고 호출)
+        """
+        if not self.health_check:
+            return
+        file_id = self._current_file_id()
+        if self._file_id is not None and file_id != self._file_id:
+            self._generation += 1
+            while self._idle:
+                self._discard(self._idle.pop())
+        self._file_id = file_id
+
+    # --- 체크아웃/반납 -------------------------------------------------------
+
+    def _acquire(self):
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            self._check_file()
+            while True:
+                while self._idle:
+                    pooled = self._idle.pop()
+                    if self._is_healthy(pooled):
+                        return pooled
+                    self._discard(pooled)
+                if self._open < self.max_size:
+                    self._open += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(
+                        f"SQLite pool exhausted ({self.max_size} connections busy)"
+                    )
+                self._cond.wait(remaining)
+
+        try:
+            pooled = _PooledConnection(self._connect(), self._generation)
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            if self._file_id is None:
+                self._file_id = self._current_file_id()
+        return pooled
+
+    def _release(self, pooled):
+        try:
+            if pooled.conn.in_transaction:
+                pooled.conn.rollback()
+            healthy = True
+        except sqlite3.Error:
+            healthy = False
+        pooled.last_used = time.monotonic()
+        with self._cond:
+            if healthy and pooled.generation == self._generation:
+                self._idle.append(pooled)
+                self._cond.notify()
+            else:
+                self._discard(pooled)
+
+    @contextlib.contextmanager
+    def connection(self):
+        """풀에서 커넥션을 빌려 with 블록 동안 사용"""
+        pooled = getattr(self._local, "pooled", None)
+        if pooled is None:
+            pooled = self._acquire()
+            self._local.pooled = pooled
+        pooled.depth += 1
+        try:
+            yield pooled.conn
+        finally:
+            pooled.depth -= 1
+            if pooled.depth == 0:
+                self._local.pooled = None
+                self._release(pooled)
+
+    def close_all(self):
+        """유휴 커넥션을 모두 닫고, 사용 중인 커넥션은 반납 시 닫히게 함"""
+        with self._cond:
+            self._generation += 1
+            while self._idle:
+                self._discard(self._idle.pop())
+            self._file_id = None
+
+    def stats(self):
+        with self._cond:
+            return {
+                "max_size": self.max_size,
+                "open": self._open,
+                "idle": len(self._idle),
+                "in_use": self._open - len(self._idle),
+            }
@@ -0,0 +1,82 @@
+"""
+labcommon: 공용 모듈 테스트 (챕터 테스트는 앱이 db_pool을 쓰는지만 확인)
+Run: pytest test_tools.py -v
+"""
+import os
+import sqlite3
+import threading
+
+import pytest
+
+from labcommon.sqlite_pool import PoolTimeout, SQLitePool
+
+
+class TestSQLitePool:
+    @pytest.fixture
+    def pool(self, tmp_path):
+        pool = SQLitePool(str(tmp_path / 'pool.db'), max_size=2, timeout=0.2)
+        with pool.connection() as conn:
+            conn.execute('CREATE TABLE t (x INTEGER)')
+            conn.commit()
+        yield pool
+        pool.close_all()
+
+    def test_connection_reused(self, pool):
+        """요청마다 새 커넥션을 열지 않고 풀에서 재사용"""
+        for i in range(5):
+            with pool.connection() as conn:
+                conn.execute('INSERT INTO t VALUES (?)', (i,))
+                conn.commit()
+        assert pool.stats()['open'] == 1
+        with pool.connection() as conn:
+            assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+            assert conn.execute('SELECT COUNT(*) FROM t').fetchone()[0] == 5
+
+    def test_nested_use_same_connection(self, pool):
+        with pool.connection() as outer:
+            with pool.connection() as inner:
+                assert inner is outer
+        assert pool.stats() == {'max_size': 2, 'open': 1, 'idle': 1, 'in_use': 0}
+
+    def test_uncommitted_rolled_back(self, pool):
+        with pool.connection() as conn:
+            conn.execute('INSERT INTO t VALUES (1)')
+        with pool.connection() as conn:
+            assert not conn.in_transaction
+            assert conn.execute('SELECT COUNT(*) FROM t').fetchone()[0] == 0
+
+    def test_timeout_when_exhausted(self, tmp_path):
+        pool = SQLitePool(str(tmp_path / 'pool.db'), max_size=1, timeout=0.1)
+        held, done = threading.Event(), threading.Event()
+
+        def hold():
+            with pool.connection():
+                held.set()
+                done.wait(5)
+
+        t = threading.Thread(target=hold)
+        t.start()
+        held.wait(5)
+        try:
+            with pytest.raises(PoolTimeout):
+                with pool.connection():
+                    pass
+        finally:
+            done.set()
+            t.join()
+        assert issubclass(PoolTimeout, sqlite3.OperationalError)
+        with pool.connection():  # 반납 후에는 다시 빌릴 수 있음
+            pass
+
+    def test_db_file_replaced(self, pool):
+        """DB 파일이 지워지고 다시 만들어지면 예전 커넥션을 버림"""
+        with pool.connection() as old:
+            pass
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(pool.path + suffix):
+                os.remove(pool.path + suffix)
+        sqlite3.connect(pool.path).close()
+        with pool.connection() as conn:
+            assert conn is not old
+            assert conn.execute("SELECT name FROM sqlite_master WHERE name = 't'").fetchone() is None
+        assert pool.stats()['open'] == 1
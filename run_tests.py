@@ -1,20 +1,64 @@
 #!/usr/bin/env python3
 """
 Python Secure Coding Labs - Master Test Runner
-Usage: python run_tests.py [chapter] [--verbose]
+Usage: python run_tests.py [chapter] [--verbose] [--jobs N] [--engine ENGINE]
+                           [--changed-only] [--force] [--report FILE] [--top N]
 
 Examples:
     python run_tests.py              # Run all tests
     python run_tests.py ch04         # Run ch04 tests only
     python run_tests.py --verbose    # Verbose output
+    python run_tests.py --jobs 4     # Run up to 4 chapters in parallel
+    python run_tests.py --engine inprocess   # Reuse one warm interpreter
+    python run_tests.py --engine forkserver  # Fork a warm interpreter per chapter
+    python run_tests.py --changed-only       # Skip unchanged chapters that passed
+    python run_tests.py --changed-only --force   # Ignore the cache, re-run all
+    python run_tests.py --report timings.json    # Per-test/per-chapter timings
+
+Engines:
+    subprocess  - a fresh `python -m pytest` per chapter (default)
+    inprocess   - pytest.main() in this interpreter; chapters run one at a time
+                  and the 300 s timeout is not enforced
+    forkserver  - this interpreter imports the lab dependencies once, then
+                  forks a child per chapter that runs pytest.main()
+
+Every run records each chapter's content hash and result in .labcache/.
+With --changed-only, a chapter whose secure/, vulnerable/, test file and
+requirements hash the same as last time and that passed last time is not run.
+
+--report collects per-test durations (from pytest's junit XML) and each
+chapter's wall time, CPU time and peak RSS, writes them as JSON and prints
+the slowest chapters and the top-N slowest tests. With --engine inprocess
+the peak RSS is the runner's own high-water mark, not the chapter's.
 """
+import argparse
+import contextlib
+import fnmatch
+import hashlib
+import importlib
+import io
+import json
+import shutil
+import signal
 import subprocess
 import sys
 import os
+import tempfile
+import time
+import traceback
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
 from pathlib import Path
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
 
 CHAPTERS = [
+    'labcommon',
     'ch02-input-validation',
     'ch03-command-injection',
     'ch04-sql-injection',
@@ -28,29 +72,166 @@ CHAPTERS = [
     'ch12-supply-chain',
 ]
 
+CHAPTER_TIMEOUT = 300
 
-def run_chapter_tests(chapter_dir: str, verbose: bool = False) -> tuple:
-    """Run tests for a specific chapter"""
-    test_file = Path(chapter_dir) / 'test_app.py'
-    if not test_file.exists():
-        test_file = Path(chapter_dir) / 'test_tools.py'
+# Third-party packages the labs import; loaded once by the warm engines
+WARM_MODULES = [
+    'pytest', 'flask', 'flask_sqlalchemy', 'sqlalchemy', 'flask_wtf', 'wtforms',
+    'pydantic', 'email_validator', 'bcrypt', 'jwt', 'cryptography', 'Crypto',
+    'bleach', 'magic', 'markupsafe', 'werkzeug', 'itsdangerous',
+]
+
+# Files the labs create at runtime; never copied into a parallel working copy
+# and never part of a chapter's content hash
+RUNTIME_ARTIFACT_PATTERNS = (
+    '__pycache__', '.pytest_cache', 'instance', 'uploads*', '*.db', '*.db-*', '*.log', '*.pyc',
+)
+RUNTIME_ARTIFACTS = shutil.ignore_patterns(*RUNTIME_ARTIFACT_PATTERNS)
+
+# Repository-level packages the apps import (the chapter's parent directory goes
+# on PYTHONPATH / sys.path); copied next to the chapter in a working copy and
+# part of every chapter's hash
+SHARED_DIRS = ['labcommon']
 
+CACHE_DIR_NAME = '.labcache'
+CACHE_FILE_NAME = 'results.json'
+
+# `python -c` entry point used instead of `-m pytest` when metrics are collected
+CHILD_BOOTSTRAP = (
+    'import sys; sys.path.insert(1, sys.argv.pop(1)); '
+    'import run_tests; run_tests.pytest_child_main()'
+)
+
+
+def shared_root(work_dir) -> str:
+    """Directory holding SHARED_DIRS for a chapter or its working copy"""
+    return str(Path(work_dir).resolve().parent)
+
+
+def chapter_env(work_dir) -> dict:
+    """os.environ with the shared packages' directory prepended to PYTHONPATH"""
+    paths = [shared_root(work_dir)] + [
+        p for p in os.environ.get('PYTHONPATH', '').split(os.pathsep) if p]
+    return dict(os.environ, PYTHONPATH=os.pathsep.join(paths))
+
+
+def find_test_file(work_dir: str):
+    """Locate a chapter's test module (None if it has none)"""
+    test_file = Path(work_dir) / 'test_app.py'
     if not test_file.exists():
+        test_file = Path(work_dir) / 'test_tools.py'
+    return test_file if test_file.exists() else None
+
+
+def pytest_args(test_file: Path, verbose: bool, junit_xml: Path = None) -> list:
+    args = [str(test_file), '-v' if verbose else '-q']
+    if junit_xml:
+        args.append(f'--junitxml={junit_xml}')
+    return args
+
+
+def resource_usage() -> dict:
+    """CPU seconds and peak RSS (KiB) of the current process"""
+    if resource is None:
+        return {'cpu_time': time.process_time(), 'peak_rss_kb': None}
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    peak = usage.ru_maxrss // 1024 if sys.platform == 'darwin' else usage.ru_maxrss
+    return {'cpu_time': usage.ru_utime + usage.ru_stime, 'peak_rss_kb': peak}
+
+
+def write_usage(path):
+    Path(path).write_text(json.dumps(resource_usage()), encoding='utf-8')
+
+
+def pytest_child_main():
+    """Run pytest, then record this process's resource usage.
+
+    argv: <usage.json> <pytest args...>; see CHILD_BOOTSTRAP.
+    """
+    import pytest
+    usage_path = sys.argv.pop(1)
+    returncode = int(pytest.main(sys.argv[1:]))
+    write_usage(usage_path)
+    sys.exit(returncode)
+
+
+def read_junit(path) -> list:
+    """Per-test name/duration/outcome from a pytest junit XML file"""
+    try:
+        root = ET.parse(path).getroot()
+    except (OSError, ET.ParseError):
+        return []
+
+    tests = []
+    for case in root.iter('testcase'):
+        outcome = 'passed'
+        for child in case:
+            if child.tag in ('failure', 'error', 'skipped'):
+                outcome = {'failure': 'failed', 'error': 'error', 'skipped': 'skipped'}[child.tag]
+        tests.append({
+            'name': f"{case.get('classname', '')}::{case.get('name', '')}",
+            'duration': float(case.get('time') or 0),
+            'outcome': outcome,
+        })
+    return tests
+
+
+class MetricsFiles:
+    """Scratch files a chapter run writes its junit XML and usage into"""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self._tmp = tempfile.TemporaryDirectory(prefix='labmetrics-') if metrics is not None else None
+        self.junit_xml = Path(self._tmp.name) / 'junit.xml' if self._tmp else None
+        self.usage = Path(self._tmp.name) / 'usage.json' if self._tmp else None
+
+    def collect(self, wall_time: float):
+        """Copy what the run produced into the metrics dict"""
+        if self.metrics is None:
+            return
+        try:
+            self.metrics['wall_time'] = wall_time
+            self.metrics['tests'] = read_junit(self.junit_xml)
+            try:
+                self.metrics.update(json.loads(self.usage.read_text(encoding='utf-8')))
+            except (OSError, ValueError):
+                pass
+        finally:
+            self._tmp.cleanup()
+
+
+def run_chapter_tests(chapter_dir: str, verbose: bool = False, cwd: str = None,
+                      metrics: dict = None) -> tuple:
+    """Run tests for a specific chapter
+
+    If `metrics` is a dict it is filled with wall/CPU time, peak RSS and
+    per-test durations.
+    """
+    work_dir = cwd or chapter_dir
+    test_file = find_test_file(work_dir)
+
+    if test_file is None:
         return chapter_dir, 'SKIP', 'No test file found'
 
-    cmd = [sys.executable, '-m', 'pytest', str(test_file)]
-    if verbose:
-        cmd.append('-v')
+    files = MetricsFiles(metrics)
+    if metrics is None:
+        cmd = [sys.executable, '-m', 'pytest'] + pytest_args(test_file, verbose)
     else:
-        cmd.append('-q')
+        cmd = [sys.executable, '-c', CHILD_BOOTSTRAP, str(Path(__file__).resolve().parent),
+               str(files.usage)] + pytest_args(test_file, verbose, files.junit_xml)
 
-    result = subprocess.run(
-        cmd,
-        capture_output=True,
-        text=True,
-        cwd=chapter_dir,
-        timeout=300
-    )
+    started = time.perf_counter()
+    try:
+        result = subprocess.run(
+            cmd,
+            capture_output=True,
+            text=True,
+            cwd=work_dir,
+            env=chapter_env(work_dir),
+            timeout=CHAPTER_TIMEOUT
+        )
+    finally:
+        files.collect(time.perf_counter() - started)
 
     if result.returncode == 0:
         return chapter_dir, 'PASS', result.stdout
@@ -58,14 +239,439 @@ def run_chapter_tests(chapter_dir: str, verbose: bool = False) -> tuple:
         return chapter_dir, 'FAIL', result.stdout + result.stderr
 
 
-def main():
-    verbose = '--verbose' in sys.argv or '-v' in sys.argv
-    specific_chapter = None
+def _is_runtime_artifact(name: str) -> bool:
+    return any(fnmatch.fnmatch(name, pattern) for pattern in RUNTIME_ARTIFACT_PATTERNS)
+
+
+def _fingerprint_inputs(chapter_dir: Path) -> list:
+    """Files whose content decides a chapter's test result"""
+    files = []
+    roots = [chapter_dir / sub for sub in ('secure', 'vulnerable')]
+    roots += [chapter_dir.parent / shared for shared in SHARED_DIRS]
+    for root in roots:
+        if not root.is_dir():
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames if not _is_runtime_artifact(d))
+            files.extend(Path(dirpath) / f for f in filenames if not _is_runtime_artifact(f))
+    # test_app.py / test_tools.py and the scripts ch12 tests directly
+    files.extend(chapter_dir.glob('*.py'))
+    files.extend(chapter_dir.glob('requirements*.txt'))
+    return sorted(set(files))
+
+
+def chapter_fingerprint(chapter_dir) -> str:
+    """sha256 over the chapter's sources, tests, requirements and shared packages"""
+    chapter_dir = Path(chapter_dir).resolve()
+    digest = hashlib.sha256()
+    digest.update(sys.version.encode())
+    for path in _fingerprint_inputs(chapter_dir):
+        digest.update(path.relative_to(chapter_dir.parent).as_posix().encode() + b'\0')
+        digest.update(path.read_bytes())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Chapter -> (content hash, last status), persisted as JSON"""
+
+    def __init__(self, cache_dir: Path):
+        self.path = Path(cache_dir) / CACHE_FILE_NAME
+        try:
+            self.entries = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def is_fresh_pass(self, chapter: str, fingerprint: str) -> bool:
+        entry = self.entries.get(chapter) or {}
+        return entry.get('hash') == fingerprint and entry.get('status') == 'PASS'
+
+    def record(self, chapter: str, fingerprint: str, status: str):
+        self.entries[chapter] = {'hash': fingerprint, 'status': status}
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(self.entries, indent=2, sort_keys=True), encoding='utf-8')
+        os.replace(tmp_path, self.path)
+
+
+def warm_imports():
+    """Import the lab dependencies once so every chapter run reuses them"""
+    for name in WARM_MODULES:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            # Optional in some chapters (e.g. magic needs libmagic); the
+            # chapter's own import will report the real error.
+            pass
+
+
+def _is_chapter_module(module, work_dir: str) -> bool:
+    """True for modules loaded from the chapter (secure.app, test_app, ...)"""
+    paths = [getattr(module, '__file__', None) or '']
+    paths.extend(getattr(module, '__path__', None) or [])
+    return any(p and os.path.abspath(p).startswith(work_dir + os.sep) for p in paths)
+
+
+@contextlib.contextmanager
+def chapter_context(work_dir: str):
+    """Enter a chapter's directory and forget its modules afterwards.
+
+    Every chapter ships its own top-level `secure`/`vulnerable` packages and a
+    `test_app` module, so they must be dropped from sys.modules before the
+    next chapter imports the same names from a different directory.
+    """
+    work_dir = os.path.abspath(work_dir)
+    saved_cwd = os.getcwd()
+    saved_path = list(sys.path)
+    os.chdir(work_dir)
+    sys.path.insert(0, work_dir)
+    sys.path.insert(1, shared_root(work_dir))
+    try:
+        yield
+    finally:
+        os.chdir(saved_cwd)
+        sys.path[:] = saved_path
+        for name, module in list(sys.modules.items()):
+            if module is not None and _is_chapter_module(module, work_dir):
+                del sys.modules[name]
+
+
+def _run_pytest_main(test_file: Path, verbose: bool, junit_xml: Path = None) -> int:
+    import pytest
+    return int(pytest.main(pytest_args(test_file, verbose, junit_xml)))
+
+
+def run_chapter_inprocess(chapter_dir: str, verbose: bool = False, cwd: str = None,
+                          metrics: dict = None) -> tuple:
+    """Run a chapter through pytest.main() in the current interpreter"""
+    work_dir = cwd or chapter_dir
+    test_file = find_test_file(work_dir)
+
+    if test_file is None:
+        return chapter_dir, 'SKIP', 'No test file found'
+
+    files = MetricsFiles(metrics)
+    buffer = io.StringIO()
+    before = resource_usage()
+    started = time.perf_counter()
+    with chapter_context(work_dir), \
+            contextlib.redirect_stdout(buffer), contextlib.redirect_stderr(buffer):
+        returncode = _run_pytest_main(test_file, verbose, files.junit_xml)
+    wall_time = time.perf_counter() - started
+    if metrics is not None:
+        after = resource_usage()
+        after['cpu_time'] -= before['cpu_time']
+        files.usage.write_text(json.dumps(after), encoding='utf-8')
+    files.collect(wall_time)
 
-    for arg in sys.argv[1:]:
-        if not arg.startswith('-'):
-            specific_chapter = arg
-            break
+    status = 'PASS' if returncode == 0 else 'FAIL'
+    return chapter_dir, status, buffer.getvalue()
+
+
+class ForkedChapter:
+    """A chapter running in a child forked from the warm runner process"""
+
+    def __init__(self, chapter_dir: str, verbose: bool = False, isolated: bool = False,
+                 metrics: dict = None):
+        self.chapter_dir = chapter_dir
+        self.verbose = verbose
+        self.isolated = isolated
+        self.metrics = metrics
+        self.pid = None
+        self.result = None
+        self._tmp = None
+        self._output = None
+        self._files = None
+
+    def start(self):
+        self._tmp = tempfile.TemporaryDirectory(prefix='labtest-') if self.isolated else None
+        work_dir = self.chapter_dir
+        if self._tmp:
+            work_dir = str(copy_chapter(self.chapter_dir, self._tmp.name))
+
+        test_file = find_test_file(work_dir)
+        if test_file is None:
+            self._finish('SKIP', 'No test file found')
+            return
+
+        self._output = tempfile.TemporaryFile(mode='w+')
+        self._files = MetricsFiles(self.metrics)
+        self._started = time.perf_counter()
+        self._deadline = time.monotonic() + CHAPTER_TIMEOUT
+        sys.stdout.flush()
+        sys.stderr.flush()
+        self.pid = os.fork()
+        if self.pid == 0:
+            self._child(work_dir, test_file)
+
+    def _child(self, work_dir: str, test_file: Path):
+        returncode = 1
+        try:
+            fd = self._output.fileno()
+            os.dup2(fd, 1)
+            os.dup2(fd, 2)
+            with chapter_context(work_dir):
+                returncode = _run_pytest_main(test_file, self.verbose, self._files.junit_xml)
+            if self._files.usage:
+                write_usage(self._files.usage)
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(returncode)
+
+    def poll(self) -> bool:
+        """Reap the child if it exited (or kill it past the deadline)"""
+        if self.result is not None:
+            return True
+
+        pid, wait_status = os.waitpid(self.pid, os.WNOHANG)
+        if pid == 0:
+            if time.monotonic() < self._deadline:
+                return False
+            os.kill(self.pid, signal.SIGKILL)
+            os.waitpid(self.pid, 0)
+            self._finish('TIMEOUT', '')
+            return True
+
+        self._output.seek(0)
+        output = self._output.read()
+        status = 'PASS' if os.waitstatus_to_exitcode(wait_status) == 0 else 'FAIL'
+        self._finish(status, output)
+        return True
+
+    def _finish(self, status: str, output: str):
+        self.result = (self.chapter_dir, status, output)
+        try:
+            # Collect (and remove the scratch dir) on TIMEOUT as well
+            if self._files:
+                self._files.collect(time.perf_counter() - self._started)
+        finally:
+            if self._output:
+                self._output.close()
+            if self._tmp:
+                self._tmp.cleanup()
+
+
+def _metrics_for(metrics_by_chapter, chapter_dir: str):
+    if metrics_by_chapter is None:
+        return None
+    return metrics_by_chapter.setdefault(chapter_dir, {})
+
+
+def iter_forked_results(chapter_paths: list, verbose: bool = False, jobs: int = 1,
+                        metrics_by_chapter: dict = None):
+    """Fork up to `jobs` children at a time and yield results as they exit.
+
+    Forking only ever happens from the main thread: forking while other
+    threads hold locks (imports, logging) can deadlock the child.
+    """
+    pending = [
+        ForkedChapter(str(p), verbose, isolated=jobs > 1,
+                      metrics=_metrics_for(metrics_by_chapter, str(p)))
+        for p in chapter_paths
+    ]
+    running = []
+    while pending or running:
+        while pending and len(running) < max(jobs, 1):
+            chapter = pending.pop(0)
+            try:
+                chapter.start()
+            except Exception as e:
+                chapter.result = (chapter.chapter_dir, 'ERROR', str(e))
+            running.append(chapter)
+
+        for chapter in list(running):
+            if chapter.poll():
+                running.remove(chapter)
+                yield chapter.result
+
+        if running:
+            time.sleep(0.02)
+
+
+def copy_chapter(chapter_dir: str, dest_root: str) -> Path:
+    """Copy a chapter and the shared packages it imports into dest_root"""
+    chapter_dir = Path(chapter_dir).resolve()
+    work_dir = Path(dest_root) / chapter_dir.name
+    shutil.copytree(chapter_dir, work_dir, ignore=RUNTIME_ARTIFACTS)
+    for shared in SHARED_DIRS:
+        if shared != chapter_dir.name and (chapter_dir.parent / shared).is_dir():
+            shutil.copytree(chapter_dir.parent / shared, Path(dest_root) / shared,
+                            ignore=RUNTIME_ARTIFACTS)
+    return work_dir
+
+
+def run_chapter_isolated(chapter_dir: str, verbose: bool = False, runner=None,
+                         metrics: dict = None) -> tuple:
+    """Run a chapter's tests inside a throwaway copy of the chapter directory.
+
+    The labs keep their SQLite files and uploads relative to the working
+    directory, so chapters running at the same time must not share one.
+    """
+    runner = runner or run_chapter_tests
+    with tempfile.TemporaryDirectory(prefix='labtest-') as tmp:
+        work_dir = copy_chapter(chapter_dir, tmp)
+        return runner(chapter_dir, verbose, cwd=str(work_dir), metrics=metrics)
+
+
+def run_chapter_safely(chapter_dir: str, verbose: bool = False, isolated: bool = False,
+                       runner=None, metrics: dict = None) -> tuple:
+    """Run a chapter and turn timeouts/crashes into a result tuple"""
+    runner = runner or run_chapter_tests
+    try:
+        if isolated:
+            return run_chapter_isolated(chapter_dir, verbose, runner, metrics)
+        return runner(chapter_dir, verbose, metrics=metrics)
+    except subprocess.TimeoutExpired:
+        return chapter_dir, 'TIMEOUT', ''
+    except Exception as e:
+        return chapter_dir, 'ERROR', str(e)
+
+
+def iter_results(chapter_paths: list, verbose: bool = False, jobs: int = 1,
+                 engine: str = 'subprocess', metrics_by_chapter: dict = None):
+    """Yield (chapter, status, output) as each chapter finishes
+
+    If `metrics_by_chapter` is a dict, each chapter's timing metrics are
+    stored in it under the chapter path.
+    """
+    if engine == 'forkserver':
+        warm_imports()
+        yield from iter_forked_results(chapter_paths, verbose, jobs, metrics_by_chapter)
+        return
+
+    if engine == 'inprocess':
+        # One interpreter means one cwd and one sys.modules: no parallelism
+        warm_imports()
+        for chapter_path in chapter_paths:
+            yield run_chapter_safely(str(chapter_path), verbose, runner=run_chapter_inprocess,
+                                     metrics=_metrics_for(metrics_by_chapter, str(chapter_path)))
+        return
+
+    if jobs <= 1:
+        for chapter_path in chapter_paths:
+            yield run_chapter_safely(str(chapter_path), verbose,
+                                     metrics=_metrics_for(metrics_by_chapter, str(chapter_path)))
+        return
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [
+            pool.submit(run_chapter_safely, str(chapter_path), verbose, True,
+                        metrics=_metrics_for(metrics_by_chapter, str(chapter_path)))
+            for chapter_path in chapter_paths
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def print_result(chapter: str, status: str, output: str, verbose: bool, label: bool):
+    """Print one chapter's result line"""
+    if label:
+        print(f"Testing {Path(chapter).name}...", end=' ')
+
+    if status == 'PASS':
+        print("[OK] PASS")
+    elif status == 'SKIP':
+        print("[--] SKIP")
+    elif status == 'TIMEOUT':
+        print("[!!] TIMEOUT")
+    elif status == 'ERROR':
+        print(f"[!!] ERROR: {output}")
+    else:
+        print("[!!] FAIL")
+
+    if verbose and output and status in ('PASS', 'SKIP', 'FAIL'):
+        print(output)
+
+
+def build_report(results: list, metrics_by_chapter: dict, args, top: int) -> dict:
+    """Assemble the JSON timing report"""
+    chapters = []
+    for name, status in results:
+        metrics = metrics_by_chapter.get(name)
+        entry = {'chapter': Path(name).name, 'status': status, 'cached': metrics is None}
+        if metrics:
+            entry.update({
+                'wall_time': round(metrics.get('wall_time', 0.0), 4),
+                'cpu_time': round(metrics['cpu_time'], 4) if metrics.get('cpu_time') is not None else None,
+                'peak_rss_kb': metrics.get('peak_rss_kb'),
+                'tests': metrics.get('tests', []),
+            })
+        chapters.append(entry)
+
+    all_tests = [
+        dict(test, chapter=entry['chapter'])
+        for entry in chapters for test in entry.get('tests', [])
+    ]
+    all_tests.sort(key=lambda t: t['duration'], reverse=True)
+
+    return {
+        'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'engine': args.engine,
+        'jobs': args.jobs,
+        'chapters': chapters,
+        'slowest_tests': all_tests[:top],
+    }
+
+
+def print_timing_tables(report: dict, top: int):
+    """Print the slowest chapters and the top-N slowest tests"""
+    timed = [c for c in report['chapters'] if not c['cached']]
+    timed.sort(key=lambda c: c['wall_time'], reverse=True)
+
+    print()
+    print("=" * 60)
+    print("Slowest chapters")
+    print("=" * 60)
+    print(f"  {'chapter':<26} {'wall s':>8} {'cpu s':>8} {'peak MiB':>9}")
+    for c in timed:
+        cpu = f"{c['cpu_time']:.2f}" if c['cpu_time'] is not None else '-'
+        rss = f"{c['peak_rss_kb'] / 1024:.1f}" if c['peak_rss_kb'] else '-'
+        print(f"  {c['chapter']:<26} {c['wall_time']:>8.2f} {cpu:>8} {rss:>9}")
+
+    print()
+    print(f"Top {top} slowest tests")
+    print("-" * 60)
+    for test in report['slowest_tests']:
+        print(f"  {test['duration']:>8.3f}s  {test['chapter']}  {test['name']}")
+
+
+ENGINES = ['subprocess', 'inprocess', 'forkserver']
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Python Secure Coding Labs - Test Runner')
+    parser.add_argument('chapter', nargs='?', help='run only chapters whose name contains this')
+    parser.add_argument('-v', '--verbose', action='store_true', help='verbose pytest output')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='number of chapters to run in parallel (default: 1)')
+    parser.add_argument('--engine', choices=ENGINES, default='subprocess',
+                        help='how each chapter is executed (default: subprocess)')
+    parser.add_argument('--changed-only', action='store_true',
+                        help='skip chapters unchanged since their last passing run')
+    parser.add_argument('--force', action='store_true',
+                        help='ignore the result cache and run every selected chapter')
+    parser.add_argument('--report', metavar='FILE',
+                        help='write per-chapter and per-test timings to FILE as JSON')
+    parser.add_argument('--top', type=int, default=10,
+                        help='number of slowest tests to list with --report (default: 10)')
+    args = parser.parse_args(argv)
+    if args.engine == 'forkserver' and not hasattr(os, 'fork'):
+        parser.error('--engine forkserver requires os.fork() (POSIX only)')
+    if args.engine == 'inprocess' and args.jobs > 1:
+        parser.error('--engine inprocess runs chapters one at a time; drop --jobs')
+    return args
+
+
+def main():
+    args = parse_args()
+    verbose = args.verbose
+    specific_chapter = args.chapter
 
     base_dir = Path(__file__).parent
 
@@ -83,34 +689,48 @@ def main():
             print(f"No chapter matching '{specific_chapter}' found")
             sys.exit(1)
 
-    for chapter in chapters_to_test:
-        chapter_path = base_dir / chapter
-        if not chapter_path.exists():
-            continue
+    chapter_paths = [base_dir / c for c in chapters_to_test if (base_dir / c).exists()]
+    parallel = args.jobs > 1
 
-        print(f"Testing {chapter}...", end=' ', flush=True)
+    cache = ResultCache(base_dir / CACHE_DIR_NAME)
+    fingerprints = {str(p): chapter_fingerprint(p) for p in chapter_paths}
+    if args.changed_only and not args.force:
+        unchanged = [p for p in chapter_paths
+                     if cache.is_fresh_pass(p.name, fingerprints[str(p)])]
+        for chapter_path in unchanged:
+            print(f"Testing {chapter_path.name}... [OK] PASS (cached)")
+            results.append((str(chapter_path), 'PASS'))
+        chapter_paths = [p for p in chapter_paths if p not in unchanged]
 
-        try:
-            name, status, output = run_chapter_tests(str(chapter_path), verbose)
-
-            if status == 'PASS':
-                print("[OK] PASS")
-            elif status == 'SKIP':
-                print("[--] SKIP")
-            else:
-                print("[!!] FAIL")
-
-            if verbose and output:
-                print(output)
-
-            results.append((name, status))
-
-        except subprocess.TimeoutExpired:
-            print("[!!] TIMEOUT")
-            results.append((chapter, 'TIMEOUT'))
-        except Exception as e:
-            print(f"[!!] ERROR: {e}")
-            results.append((chapter, 'ERROR'))
+    if args.engine != 'subprocess':
+        print(f"Engine: {args.engine}")
+    if parallel and chapter_paths:
+        print(f"Running {len(chapter_paths)} chapters with {args.jobs} workers...")
+        print()
+
+    metrics_by_chapter = {} if args.report else None
+    results_iter = iter_results(chapter_paths, verbose, args.jobs, args.engine, metrics_by_chapter)
+    for chapter_path in chapter_paths:
+        if not parallel:
+            print(f"Testing {chapter_path.name}...", end=' ', flush=True)
+
+        name, status, output = next(results_iter)
+        print_result(name, status, output, verbose, label=parallel)
+        results.append((name, status))
+        cache.record(Path(name).name, fingerprints[name], status)
+
+    cache.save()
+
+    # Completion order differs between runs in parallel mode; keep the summary stable
+    order = {str(base_dir / c): i for i, c in enumerate(chapters_to_test)}
+    results.sort(key=lambda r: order.get(r[0], len(order)))
+
+    if args.report:
+        report = build_report(results, metrics_by_chapter, args, args.top)
+        Path(args.report).write_text(json.dumps(report, indent=2), encoding='utf-8')
+        print_timing_tables(report, args.top)
+        print()
+        print(f"Timing report written to {args.report}")
 
     print()
     print("=" * 60)